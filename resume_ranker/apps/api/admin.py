@@ -0,0 +1,12 @@
+from django.contrib import admin
+from .models import ApiToken
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    list_display = ("id", "prefix", "name", "user", "revoked", "created_at", "last_used_at")
+    list_filter = ("revoked", "created_at")
+    search_fields = ("name", "prefix", "user__username")
+    readonly_fields = ("prefix", "created_at", "last_used_at")
+
+    def has_add_permission(self, request):
+        return False  # keys are shown once; use `manage.py create_api_token`
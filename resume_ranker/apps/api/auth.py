@@ -0,0 +1,50 @@
+from datetime import timedelta
+from functools import wraps
+
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+
+from .models import ApiToken, hash_key
+
+# last_used_at is informational; don't write it on every request
+LAST_USED_RESOLUTION = timedelta(minutes=1)
+
+
+def _bearer_key(request) -> str:
+    header = request.headers.get("Authorization", "")
+    scheme, _, key = header.partition(" ")
+    if scheme.lower() not in ("bearer", "token"):
+        return ""
+    return key.strip()
+
+
+def token_required(view):
+    """Authenticate with `Authorization: Bearer <key>` and set request.user; 401 JSON otherwise."""
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = _bearer_key(request)
+        token = None
+        if key:
+            token = (
+                ApiToken.objects
+                .select_related("user")
+                .filter(key_hash=hash_key(key), revoked=False, user__is_active=True)
+                .first()
+            )
+        if token is None:
+            resp = JsonResponse({"error": "Invalid or missing API token."}, status=401)
+            resp["WWW-Authenticate"] = "Bearer"
+            return resp
+
+        now = timezone.now()
+        if token.last_used_at is None or now - token.last_used_at > LAST_USED_RESOLUTION:
+            ApiToken.objects.filter(pk=token.pk).update(last_used_at=now)
+
+        request.user = token.user
+        request.api_token = token
+        return view(request, *args, **kwargs)
+
+    return wrapper
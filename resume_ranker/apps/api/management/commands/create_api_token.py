@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api.models import ApiToken
+
+
+class Command(BaseCommand):
+    help = "Issue an API token for a user and print the key (it is not stored and cannot be shown again)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--name", default="", help="Label, e.g. the integration using it.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+
+        token, raw_key = ApiToken.issue(user, options["name"])
+        self.stdout.write(self.style.SUCCESS(f"Token {token.prefix}... created for {user.username}"))
+        self.stdout.write(raw_key)
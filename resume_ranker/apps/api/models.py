@@ -0,0 +1,32 @@
+import hashlib
+import secrets
+
+from django.db import models
+from django.conf import settings
+
+
+def hash_key(raw_key: str) -> str:
+    return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+
+class ApiToken(models.Model):
+    """Bearer token for the JSON API. Only a SHA-256 of the key is stored."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="api_tokens")
+    name = models.CharField(max_length=100, blank=True)
+    prefix = models.CharField(max_length=8, editable=False)  # shown in admin to tell tokens apart
+    key_hash = models.CharField(max_length=64, unique=True, editable=False)
+
+    revoked = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def issue(cls, user, name: str = "") -> tuple["ApiToken", str]:
+        """Create a token; the raw key is returned once and never stored."""
+        raw_key = secrets.token_urlsafe(32)
+        token = cls.objects.create(user=user, name=name, prefix=raw_key[:8], key_hash=hash_key(raw_key))
+        return token, raw_key
+
+    def __str__(self):
+        return f"{self.prefix}... ({self.user})"
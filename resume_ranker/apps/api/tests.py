@@ -0,0 +1,85 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.api.models import ApiToken
+from apps.jobs.models import JobDescription
+from apps.ranking.models import RankingBatch, RankingResult
+from apps.resumes.models import Resume
+
+SCORES = [90, 80, 80, 80, 70, 70, 10]
+
+
+class ApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="recruiter")
+        cls.key = ApiToken.issue(cls.user)[1]
+
+    def get(self, url: str, key: str | None = None, **params):
+        return self.client.get(url, params, headers={"Authorization": f"Bearer {key or self.key}"})
+
+    def walk(self, url: str, **params) -> list[dict]:
+        """Follow next_cursor to the end; returns every page's payload."""
+        pages, cursor = [], None
+        while True:
+            response = self.get(url, cursor=cursor, **params) if cursor else self.get(url, **params)
+            self.assertEqual(response.status_code, 200, response.content)
+            pages.append(response.json())
+            cursor = pages[-1]["next_cursor"]
+            if cursor is None:
+                return pages
+
+
+class JobsPaginationTests(ApiTestCase):
+    def test_newest_first(self):
+        ids = [JobDescription.objects.create(created_by=self.user, title=f"JD {i}", raw_text="x").id for i in range(5)]
+        pages = self.walk(reverse("api:jobs"), limit=2)
+        self.assertEqual([[job["id"] for job in page["jobs"]] for page in pages],
+                         [ids[4:2:-1], ids[2:0:-1], ids[:1]])
+
+
+class ResultsPaginationTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        job = JobDescription.objects.create(created_by=cls.user, title="Python Dev", raw_text="Python")
+        cls.batch = RankingBatch.objects.create(created_by=cls.user, job=job, status="completed")
+        resumes = Resume.objects.bulk_create(
+            Resume(uploaded_by=cls.user, file=f"resumes/cv{i}.pdf", original_filename=f"cv{i}.pdf")
+            for i in range(len(SCORES))
+        )
+        RankingResult.objects.bulk_create(
+            RankingResult(batch=cls.batch, job=job, resume=resume, score=score, reasoning="because")
+            for resume, score in zip(resumes, SCORES)
+        )
+        cls.url = reverse("api:batch_results", args=[cls.batch.id])
+
+    def test_pages_cover_ties_once(self):
+        expected = list(
+            RankingResult.objects.filter(batch=self.batch).order_by("-score", "id").values_list("id", flat=True)
+        )
+        for limit in (1, 2, 3, len(SCORES), 100):
+            with self.subTest(limit=limit):
+                pages = self.walk(self.url, limit=limit)
+                self.assertTrue(all(len(page["results"]) <= limit for page in pages))
+                self.assertEqual([r["id"] for page in pages for r in page["results"]], expected)
+                self.assertEqual(len(pages), -(-len(SCORES) // limit))
+
+    def test_fields(self):
+        page = self.get(self.url, fields="score,reasoning", limit=2).json()
+        self.assertEqual(page["results"], [{"score": 90, "reasoning": "because"}, {"score": 80, "reasoning": "because"}])
+        self.assertIsNotNone(page["next_cursor"])  # id still drives the cursor when not requested
+
+        response = self.get(self.url, fields="score,secret")
+        self.assertEqual(response.status_code, 400)
+
+    def test_bad_cursor_and_limit(self):
+        self.assertEqual(self.get(self.url, cursor="not-a-cursor").status_code, 400)
+        self.assertEqual(self.get(self.url, limit="ten").status_code, 400)
+        self.assertEqual(len(self.get(self.url, limit=0).json()["results"]), 1)
+
+    def test_only_own_batches(self):
+        other_key = ApiToken.issue(User.objects.create(username="other"))[1]
+        self.assertEqual(self.get(self.url, key=other_key).status_code, 404)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
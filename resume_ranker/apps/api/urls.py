@@ -0,0 +1,12 @@
+from django.urls import path
+from . import views
+
+app_name = "api"
+
+urlpatterns = [
+    path("jobs/", views.jobs, name="jobs"),
+    path("batches/", views.batches, name="batches"),
+    path("batches/<int:batch_id>/", views.batch_detail, name="batch_detail"),
+    path("batches/<int:batch_id>/results/", views.batch_results, name="batch_results"),
+    path("queue/", views.queue_stats, name="queue_stats"),
+]
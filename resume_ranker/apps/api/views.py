@@ -0,0 +1,272 @@
+"""
+Token-authenticated JSON API (see apps/api/urls.py for the routes).
+
+Lists use cursor pagination: responses carry `next_cursor`, to be passed back
+as `?cursor=` until it is null. Results accept `?fields=a,b,c` so clients
+only pull the columns they need; the large JSON columns are never read
+unless asked for.
+"""
+import base64
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods
+
+from apps.jobs.models import JobDescription
+from apps.ranking.models import RankingBatch, RankingResult
+from apps.ranking.services.admission import Overloaded
+from apps.ranking.services.batches import batch_progress, submit_batch
+from apps.ranking.services.scheduling import wait_time_stats
+from apps.resumes.models import Resume
+from .auth import token_required
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+ALLOWED_UPLOAD_EXTENSIONS = (".pdf", ".docx")
+
+JOB_FIELDS = ("id", "title", "created_at")
+
+# public name -> ORM path
+RESULT_FIELDS = {
+    "id": "id",
+    "job_id": "job_id",
+    "resume_id": "resume_id",
+    "resume_filename": "resume__original_filename",
+    "duplicate_of": "resume__duplicate_of_id",
+    "score": "score",
+    "score_breakdown": "score_breakdown",
+    "reasoning": "reasoning",
+    "missing_required": "missing_required",
+    "strengths": "strengths",
+    "candidate_suggestions": "candidate_suggestions",
+    "model_meta": "model_meta",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+DEFAULT_RESULT_FIELDS = ("id", "resume_id", "resume_filename", "score")
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _error(message: str, status: int = 400) -> JsonResponse:
+    return JsonResponse({"error": message}, status=status)
+
+
+def api_view(methods: list[str]):
+    """token auth + allowed methods + ApiError -> JSON error response."""
+
+    def decorator(view):
+        @require_http_methods(methods)
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            try:
+                return view(request, *args, **kwargs)
+            except ApiError as e:
+                return _error(str(e), e.status)
+
+        return token_required(inner)
+
+    return decorator
+
+
+def _json_body(request) -> dict:
+    try:
+        data = json.loads(request.body or b"{}")
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError("Request body is not valid JSON.")
+    if not isinstance(data, dict):
+        raise ApiError("Request body must be a JSON object.")
+    return data
+
+
+def _page_size(request) -> int:
+    try:
+        size = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ApiError("limit must be an integer.")
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _encode_cursor(*values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(raw: str, n: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4)))
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != n or not all(isinstance(v, int) for v in values):
+        raise ApiError("Invalid cursor.")
+    return values
+
+
+def _parse_ids(values, name: str = "resume_ids") -> list[int]:
+    if isinstance(values, str):
+        values = [v for v in values.split(",") if v.strip()]
+    try:
+        return [int(v) for v in values or []]
+    except (TypeError, ValueError):
+        raise ApiError(f"{name} must be a list of integers.")
+
+
+def _visible_jobs(user):
+    qs = JobDescription.objects.all()
+    return qs if user.is_superuser else qs.filter(created_by=user)
+
+
+def _get_batch(request, batch_id: int) -> RankingBatch:
+    batch = RankingBatch.objects.filter(id=batch_id, created_by=request.user).first()
+    if batch is None:
+        raise ApiError("Batch not found.", 404)
+    return batch
+
+
+@api_view(["GET", "POST"])
+def jobs(request):
+    """GET: list your job descriptions (cursor by id, newest first). POST {title, raw_text}: create one."""
+    if request.method == "POST":
+        data = _json_body(request)
+        title = str(data.get("title") or "").strip()
+        raw_text = str(data.get("raw_text") or "").strip()
+        if not title or not raw_text:
+            raise ApiError("title and raw_text are required.")
+        job = JobDescription.objects.create(created_by=request.user, title=title[:255], raw_text=raw_text)
+        return JsonResponse({"id": job.id, "title": job.title, "created_at": job.created_at}, status=201)
+
+    size = _page_size(request)
+    qs = _visible_jobs(request.user).order_by("-id")
+    if request.GET.get("cursor"):
+        (last_id,) = _decode_cursor(request.GET["cursor"], 1)
+        qs = qs.filter(id__lt=last_id)
+    rows = list(qs.values(*JOB_FIELDS)[: size + 1])
+    next_cursor = _encode_cursor(rows[size - 1]["id"]) if len(rows) > size else None
+    return JsonResponse({"jobs": rows[:size], "next_cursor": next_cursor})
+
+
+@api_view(["POST"])
+def batches(request):
+    """
+    Submit a batch. Either multipart (job_id, files under `resumes`, optional
+    resume_ids) or JSON {"job_id": .., "resume_ids": [..]} for resumes
+    uploaded earlier. Optional `job_ids` adds more JDs (multi-JD batch).
+    Returns 202 with the batch id; poll its status URL. Status "deferred"
+    means the system is busy and ranking starts automatically later; 429
+    with Retry-After when the caller or the system is over its limit.
+    """
+    if request.content_type == "application/json":
+        data = _json_body(request)
+        job_id, resume_ids, files = data.get("job_id"), _parse_ids(data.get("resume_ids")), []
+        extra_job_ids = _parse_ids(data.get("job_ids"), "job_ids")
+    else:
+        job_id = request.POST.get("job_id")
+        resume_ids = _parse_ids(request.POST.getlist("resume_ids"))
+        files = request.FILES.getlist("resumes")
+        extra_job_ids = _parse_ids(request.POST.getlist("job_ids"), "job_ids")
+
+    try:
+        job = _visible_jobs(request.user).get(id=int(job_id))
+    except (TypeError, ValueError, JobDescription.DoesNotExist):
+        raise ApiError("job_id is missing or not one of your job descriptions.")
+
+    extra_jobs = list(_visible_jobs(request.user).filter(id__in=extra_job_ids))
+    unknown_jobs = sorted(set(extra_job_ids) - {j.id for j in extra_jobs})
+    if unknown_jobs:
+        raise ApiError(f"Unknown job_ids: {unknown_jobs[:20]}")
+
+    resume_ids = list(dict.fromkeys(resume_ids))
+    total = len(resume_ids) + len(files)
+    limit = int(getattr(settings, "API_MAX_BATCH_RESUMES", 500))
+    if total == 0:
+        raise ApiError("Provide resume files and/or resume_ids.")
+    if total > limit:
+        raise ApiError(f"At most {limit} resumes per batch (got {total}).", 413)
+
+    bad_files = [f.name for f in files if not f.name.lower().endswith(ALLOWED_UPLOAD_EXTENSIONS)]
+    if bad_files:
+        raise ApiError(f"Only PDF/DOCX supported: {', '.join(bad_files[:10])}")
+
+    if resume_ids:
+        owned = Resume.objects.filter(id__in=resume_ids)
+        if not request.user.is_superuser:
+            owned = owned.filter(uploaded_by=request.user)
+        unknown = sorted(set(resume_ids) - set(owned.values_list("id", flat=True)))
+        if unknown:
+            raise ApiError(f"Unknown resume_ids: {unknown[:20]}")
+
+    try:
+        batch = submit_batch(request.user, job, files=files, resume_ids=resume_ids, extra_jobs=extra_jobs)
+    except Overloaded as e:
+        response = JsonResponse({"error": str(e), "retry_after": e.retry_after}, status=429)
+        response["Retry-After"] = str(e.retry_after)
+        return response
+    return JsonResponse({
+        "id": batch.id,
+        "status": batch.status,
+        "job_id": job.id,
+        "job_ids": list(dict.fromkeys([job.id, *(j.id for j in extra_jobs)])),
+        "resumes": total,
+        "status_url": reverse("api:batch_detail", args=[batch.id]),
+    }, status=202)
+
+
+@api_view(["GET"])
+def batch_detail(request, batch_id: int):
+    """Batch status and progress counters."""
+    progress = batch_progress(batch_id, request.user)
+    if progress is None:
+        raise ApiError("Batch not found.", 404)
+    return JsonResponse(progress)
+
+
+@api_view(["GET"])
+def batch_results(request, batch_id: int):
+    """Results, best score first. ?fields=..., ?limit=..., ?cursor=..., ?job=<id>[,<id>] for multi-JD batches."""
+    batch = _get_batch(request, batch_id)
+
+    fields = [f.strip() for f in request.GET.get("fields", "").split(",") if f.strip()] or list(DEFAULT_RESULT_FIELDS)
+    unknown = [f for f in fields if f not in RESULT_FIELDS]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(RESULT_FIELDS)}")
+
+    size = _page_size(request)
+    qs = RankingResult.objects.filter(batch=batch).order_by("-score", "id")
+    if request.GET.get("job"):
+        qs = qs.filter(job_id__in=_parse_ids(request.GET["job"], "job"))
+    if request.GET.get("cursor"):
+        last_score, last_id = _decode_cursor(request.GET["cursor"], 2)
+        qs = qs.filter(Q(score__lt=last_score) | Q(score=last_score, id__gt=last_id))
+
+    paths = dict.fromkeys(["id", "score", *(RESULT_FIELDS[f] for f in fields)])  # id/score drive the cursor
+    rows = list(qs.values(*paths)[: size + 1])
+
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = _encode_cursor(rows[-1]["score"], rows[-1]["id"])
+
+    return JsonResponse({
+        "batch_id": batch.id,
+        "batch_status": batch.status,
+        "results": [{f: row[RESULT_FIELDS[f]] for f in fields} for row in rows],
+        "next_cursor": next_cursor,
+    })
+
+
+@api_view(["GET"])
+def queue_stats(request):
+    """Queue wait per user and lane (?hours=24). Your own rows; staff see every user."""
+    try:
+        hours = float(request.GET.get("hours", 24))
+    except ValueError:
+        raise ApiError("hours must be a number.")
+    user = None if request.user.is_staff else request.user
+    return JsonResponse({"hours": hours, "users": wait_time_stats(user=user, hours=hours)})
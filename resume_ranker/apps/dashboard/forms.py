@@ -10,9 +10,10 @@ class MultipleFileField(forms.FileField):
             if self.required:
                 raise forms.ValidationError("Please upload at least one resume.")
             return []
+        single_clean = super().clean  # zero-arg super() fails inside a comprehension before Python 3.12
         if isinstance(data, (list, tuple)):
-            return [super().clean(d, initial) for d in data]
-        return [super().clean(data, initial)]
+            return [single_clean(d, initial) for d in data]
+        return [single_clean(data, initial)]
 
 class RankUploadForm(forms.Form):
     job = forms.ModelChoiceField(
@@ -21,6 +22,12 @@ class RankUploadForm(forms.Form):
         widget=forms.Select(attrs={"class": "form-select"}),
         required=True,
     )
+    extra_jobs = forms.ModelMultipleChoiceField(
+        queryset=JobDescription.objects.none(),
+        required=False,
+        widget=forms.SelectMultiple(attrs={"class": "form-select", "size": 6}),
+        help_text="Optional: also rank the same resumes against these JDs (one pass, candidate x role matrix).",
+    )
     resumes = MultipleFileField(
         required=True,
         widget=MultiFileInput(attrs={
@@ -36,3 +43,4 @@ class RankUploadForm(forms.Form):
         if user and not user.is_superuser:
             qs = qs.filter(created_by=user)
         self.fields["job"].queryset = qs.order_by("-id")
+        self.fields["extra_jobs"].queryset = qs.order_by("title", "id")
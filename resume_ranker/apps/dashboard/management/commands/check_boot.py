@@ -0,0 +1,73 @@
+"""
+Boot budget for web processes: start a fresh interpreter, load the WSGI
+application and every URLconf/view the way a gunicorn worker does, and
+fail if it takes too long, uses too much memory or imported a module that
+only workers need (see apps/ranking/services/llm.py and
+apps/resumes/services/extraction.py for the lazy imports).
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# loaded lazily by the extraction/enrichment stages; a web worker must not import them
+WORKER_ONLY_MODULES = ("openai", "pypdf", "docx", "lxml", "pydantic", "httpx", "zstandard")
+
+PROBE = """
+import json, os, resource, sys, time
+start = time.perf_counter()
+from config.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns  # import every app's urls and views
+elapsed = time.perf_counter() - start
+rss_kb = None
+try:
+    with open("/proc/self/status") as fh:
+        rss_kb = next(int(line.split()[1]) for line in fh if line.startswith("VmRSS:"))
+except OSError:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1)
+print(json.dumps({"seconds": elapsed, "rss_kb": rss_kb, "modules": sorted(sys.modules)}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Check web-worker startup time, memory and imports against a budget (non-zero exit when over)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-seconds", type=float, default=1.0, help="Import/boot time budget.")
+        parser.add_argument("--max-rss-mb", type=float, default=80.0, help="Resident memory budget after boot.")
+        parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to start; the best run counts.")
+
+    def handle(self, *args, **options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings.dev")}
+        runs = []
+        for _ in range(max(1, options["runs"])):
+            proc = subprocess.run(
+                [sys.executable, "-c", PROBE], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                raise CommandError(f"Web boot failed:\n{proc.stderr}")
+            runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+        seconds = min(r["seconds"] for r in runs)
+        rss_mb = min(r["rss_kb"] for r in runs) / 1024
+        loaded = sorted({m for r in runs for m in r["modules"] if m.split(".")[0] in WORKER_ONLY_MODULES})
+        top_level = sorted({m.split(".")[0] for m in loaded})
+
+        self.stdout.write(f"boot time   {seconds:.3f}s  (budget {options['max_seconds']:.3f}s)")
+        self.stdout.write(f"RSS         {rss_mb:.1f} MiB  (budget {options['max_rss_mb']:.1f} MiB)")
+        self.stdout.write(f"worker-only {', '.join(top_level) or 'none loaded'}")
+
+        problems = []
+        if seconds > options["max_seconds"]:
+            problems.append(f"boot took {seconds:.3f}s")
+        if rss_mb > options["max_rss_mb"]:
+            problems.append(f"RSS {rss_mb:.1f} MiB")
+        if top_level:
+            problems.append(f"imported {', '.join(top_level)}")
+        if problems:
+            raise CommandError("Web boot over budget: " + "; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Web boot within budget."))
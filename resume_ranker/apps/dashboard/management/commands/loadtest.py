@@ -0,0 +1,245 @@
+"""
+Load test: the same dashboard views served by gunicorn (WSGI, sync workers)
+and by uvicorn (ASGI, one process).
+
+Traffic, all concurrent for --duration seconds:
+  long-poll  clients parked on /batches/<running>/progress/ (each waits --wait s)
+  upload     clients POSTing a resume to /rank/ in slow chunks (--upload-kbps)
+  probe      clients fetching a completed batch's results page; their latency
+             shows whether the server stays responsive while the others wait
+
+Uses the configured database; creates a `loadtest` user with one job and two
+batches on first run. With CELERY_EAGER the uploads also rank inline, which
+both servers pay equally.
+"""
+import asyncio
+import io
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.jobs.models import JobDescription
+from apps.ranking.models import RankingBatch
+
+CSRF_TOKEN = "a" * 32
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _sample_docx(lines: list[str] | None = None) -> bytes:
+    import docx
+
+    d = docx.Document()
+    for line in lines or ["Jane Doe", "Python developer", "Skills: Python, Django, REST, Docker, PostgreSQL"]:
+        d.add_paragraph(line)
+    buf = io.BytesIO()
+    d.save(buf)
+    return buf.getvalue()
+
+
+def _session_cookie(user) -> str:
+    """Cookie header for a logged-in session of `user`, with a fixed CSRF token."""
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return f"{settings.SESSION_COOKIE_NAME}={session.session_key}; {settings.CSRF_COOKIE_NAME}={CSRF_TOKEN}"
+
+
+class _Client:
+    """Tiny HTTP/1.1 client on asyncio streams (one connection per request)."""
+
+    def __init__(self, port: int, cookie: str):
+        self.port = port
+        self.cookie = cookie
+
+    async def request(self, method: str, path: str, body: bytes = b"", content_type: str = "",
+                      chunk: int = 0, chunk_delay: float = 0.0, timeout: float = 60.0) -> int:
+        status, _, _ = await self.fetch(method, path, body, content_type, chunk, chunk_delay, timeout)
+        return status
+
+    async def fetch(self, method: str, path: str, body: bytes = b"", content_type: str = "",
+                    chunk: int = 0, chunk_delay: float = 0.0, timeout: float = 60.0) -> tuple[int, dict, bytes]:
+        """(status, lower-cased headers, body)"""
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        try:
+            head = [
+                f"{method} {path} HTTP/1.1",
+                f"Host: 127.0.0.1:{self.port}",
+                f"Cookie: {self.cookie}",
+                f"X-CSRFToken: {CSRF_TOKEN}",
+                "Connection: close",
+            ]
+            if body:
+                head += [f"Content-Type: {content_type}", f"Content-Length: {len(body)}"]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode())
+            if chunk and chunk_delay:
+                for i in range(0, len(body), chunk):
+                    writer.write(body[i:i + chunk])
+                    await writer.drain()
+                    await asyncio.sleep(chunk_delay)
+            else:
+                writer.write(body)
+            await writer.drain()
+
+            status_line = await asyncio.wait_for(reader.readline(), timeout)
+            raw = await asyncio.wait_for(reader.read(), timeout)  # until close
+            head, _, payload = raw.partition(b"\r\n\r\n")
+            headers = {}
+            for line in head.decode("latin-1").split("\r\n"):
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            return int(status_line.split()[1]), headers, payload
+        finally:
+            writer.close()
+
+
+def _multipart(fields: dict, files: dict) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, value in files.items():
+        for filename, data in value if isinstance(value, list) else [value]:
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f"Content-Type: application/octet-stream\r\n\r\n".encode() + data + b"\r\n"
+            )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class Command(BaseCommand):
+    help = "Compare gunicorn (WSGI) and uvicorn (ASGI) under long-polls, slow uploads and page loads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--servers", default="wsgi,asgi", help="Comma-separated: wsgi, asgi.")
+        parser.add_argument("--wsgi-workers", type=int, default=4, help="gunicorn sync workers.")
+        parser.add_argument("--longpoll", type=int, default=40, help="Concurrent long-poll clients.")
+        parser.add_argument("--uploads", type=int, default=8, help="Concurrent slow-upload clients.")
+        parser.add_argument("--probes", type=int, default=4, help="Concurrent results-page clients.")
+        parser.add_argument("--duration", type=float, default=15.0, help="Seconds of traffic per server.")
+        parser.add_argument("--wait", type=float, default=5.0, help="Long-poll wait per request (s).")
+        parser.add_argument("--upload-kbps", type=float, default=64.0, help="Upload speed per client.")
+
+    def handle(self, *args, **options):
+        servers = [s.strip() for s in options["servers"].split(",") if s.strip()]
+        unknown = set(servers) - {"wsgi", "asgi"}
+        if unknown:
+            raise CommandError(f"Unknown server(s): {', '.join(sorted(unknown))}")
+
+        fixtures = self._fixtures()
+        for name in servers:
+            port = _free_port()
+            proc = self._start(name, port, options["wsgi_workers"])
+            try:
+                self._wait_ready(port, proc)
+                stats = asyncio.run(self._traffic(port, fixtures, options))
+            finally:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+            label = f"gunicorn x{options['wsgi_workers']}" if name == "wsgi" else "uvicorn x1"
+            self._report(label, stats, options["duration"])
+
+    def _fixtures(self) -> dict:
+        User = get_user_model()
+        user, _ = User.objects.get_or_create(username="loadtest")
+        job = JobDescription.objects.filter(created_by=user).first() or JobDescription.objects.create(
+            created_by=user, title="Load test", raw_text="Python Django REST Docker PostgreSQL",
+        )
+        running = RankingBatch.objects.filter(created_by=user, job=job, status="running").first()
+        running = running or RankingBatch.objects.create(created_by=user, job=job, status="running")
+        done = RankingBatch.objects.filter(created_by=user, job=job, status="completed").first()
+        done = done or RankingBatch.objects.create(created_by=user, job=job, status="completed")
+
+        return {"cookie": _session_cookie(user), "job": job, "running": running, "done": done, "docx": _sample_docx()}
+
+    def _start(self, name: str, port: int, workers: int) -> subprocess.Popen:
+        bind = f"127.0.0.1:{port}"
+        if name == "wsgi":
+            cmd = [sys.executable, "-m", "gunicorn", "config.wsgi:application", "-w", str(workers),
+                   "-b", bind, "--timeout", "120", "--log-level", "warning"]
+        else:
+            cmd = [sys.executable, "-m", "uvicorn", "config.asgi:application",
+                   "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings.dev")}
+        return subprocess.Popen(cmd, cwd=settings.BASE_DIR, env=env)
+
+    def _wait_ready(self, port: int, proc: subprocess.Popen):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise CommandError(f"Server exited with code {proc.returncode} (is it installed?)")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError("Server did not start within 30s")
+
+    async def _traffic(self, port: int, fx: dict, opts: dict) -> dict:
+        client = _Client(port, fx["cookie"])
+        stop_at = time.monotonic() + opts["duration"]
+        stats = {k: {"lat": [], "errors": 0} for k in ("long-poll", "upload", "probe")}
+
+        progress_path = f"/batches/{fx['running'].id}/progress/?wait={opts['wait']}&since=running:0:0"
+        results_path = f"/batches/{fx['done'].id}/"
+        body, ctype = _multipart({"job": fx["job"].id}, {"resumes": ("loadtest.docx", fx["docx"])})
+        chunk = 4096
+        chunk_delay = chunk / (opts["upload_kbps"] * 1024)
+
+        async def loop(kind: str, make_request, ok_status):
+            while time.monotonic() < stop_at:
+                start = time.monotonic()
+                try:
+                    status = await make_request()
+                except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                    status = None
+                if status in ok_status:
+                    stats[kind]["lat"].append(time.monotonic() - start)
+                else:
+                    stats[kind]["errors"] += 1
+                    await asyncio.sleep(0.1)
+
+        tasks = (
+            [loop("long-poll", lambda: client.request("GET", progress_path), {200})
+             for _ in range(opts["longpoll"])]
+            + [loop("upload", lambda: client.request("POST", "/rank/", body, ctype, chunk, chunk_delay), {302})
+               for _ in range(opts["uploads"])]
+            + [loop("probe", lambda: client.request("GET", results_path), {200})
+               for _ in range(opts["probes"])]
+        )
+        await asyncio.gather(*tasks)
+        return stats
+
+    def _report(self, label: str, stats: dict, duration: float):
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        for kind, s in stats.items():
+            lat = sorted(s["lat"])
+            if lat:
+                p50 = statistics.median(lat) * 1000
+                p95 = lat[int(0.95 * (len(lat) - 1))] * 1000
+                self.stdout.write(
+                    f"  {kind:<10} {len(lat):6d} ok  {s['errors']:4d} err  {len(lat) / duration:7.1f}/s  "
+                    f"p50={p50:8.1f}ms  p95={p95:8.1f}ms"
+                )
+            else:
+                self.stdout.write(f"  {kind:<10}      0 ok  {s['errors']:4d} err")
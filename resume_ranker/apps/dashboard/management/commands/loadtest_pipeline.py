@@ -0,0 +1,477 @@
+"""
+Load test of the whole ranking path: N simulated recruiters upload batches
+through /rank/, long-poll their progress and open the results page, while
+real Celery workers extract the uploads and rank the batches.
+
+  --broker memory  web server (threaded WSGI), a Celery worker (thread pool)
+                   and OpenAI stub all run in this process; nothing else
+                   needs to be running
+  --broker redis   uvicorn and `celery worker` subprocesses on REDIS_URL;
+                   the OpenAI stub still runs in this process
+
+The redis mode runs one worker for "interactive" (+ the default queue) and
+one for "bulk", each with --workers concurrency, as in deployment; the
+memory mode runs one in-process worker with the combined concurrency.
+
+OpenAI requests go to a local stub (OPENAI_BASE_URL) that answers after
+--llm-latency seconds, so enrichment is exercised without cost. Reports
+throughput, latency percentiles per step, queue wait per lane, and database
+write latency / lock errors (statements run in this process) plus waiting
+locks sampled from pg_locks on Postgres.
+
+Uses the configured database and MEDIA_ROOT; recruiters are users named
+`loadtest-r<n>`. --cleanup removes their resumes, files and batches first.
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.db import OperationalError, connection, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+from apps.jobs.models import JobDescription
+from apps.ranking.models import RankingBatch
+from apps.ranking.services.scheduling import wait_time_stats
+from apps.resumes.models import Resume
+from .loadtest import _Client, _free_port, _multipart, _sample_docx, _session_cookie
+
+LANE_QUEUES = [["interactive", "celery"], ["bulk"]]
+MEMORY_CELERY = {
+    "CELERY_TASK_ALWAYS_EAGER": False,
+    "CELERY_BROKER_URL": "memory://",
+    "CELERY_RESULT_BACKEND": "cache+memory://",
+    "CELERY_BROKER_TRANSPORT_OPTIONS": {"polling_interval": 0.05},  # kombu's memory transport polls (1s default)
+}
+SKILLS = [
+    "Python", "Django", "REST", "Docker", "PostgreSQL", "Kubernetes", "AWS", "React", "Celery",
+    "Redis", "SQL", "Git", "Linux", "FastAPI", "TypeScript", "GraphQL", "Terraform", "Kafka",
+]
+JD_TEXT = "Backend engineer: Python, Django, REST APIs, PostgreSQL, Docker, Celery, Redis, AWS, Git."
+WORDS = "built shipped led designed migrated optimised tested deployed scaled monitored".split()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Answers chat.completions like the real API, in the JSON shapes apps/ranking/tasks.py asks for."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        prompt = (body.get("messages") or [{}])[-1].get("content", "")
+        ids = re.findall(r"### RESUME id=(\w+)", prompt)
+        answer = {
+            "reasoning": "Stubbed reasoning.",
+            "strengths": ["Stubbed strength"],
+            "candidate_suggestions": ["Stubbed suggestion"],
+        }
+        content = {"results": [{"id": i, **answer} for i in ids]} if ids else answer
+        prompt_tokens, completion_tokens = len(prompt) // 4, 450 * max(1, len(ids))
+
+        time.sleep(self.server.latency)
+        self.server.record(prompt_tokens + completion_tokens)
+
+        data = json.dumps({
+            "id": "chatcmpl-loadtest",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(content)},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class _StubOpenAI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.latency = latency
+        self.requests = 0
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, tokens: int):
+        with self._lock:
+            self.requests += 1
+            self.tokens += tokens
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class _DbStats:
+    """execute_wrapper on every DB connection of this process: write latency and lock errors."""
+
+    WRITES = ("INSERT", "UPDATE", "DELETE")
+
+    def __init__(self):
+        self.statements = 0
+        self.writes: list[float] = []
+        self.lock_errors = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        locked = False
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as e:
+            locked = "lock" in str(e).lower()
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.statements += 1
+                self.lock_errors += locked
+                if sql.lstrip()[:6].upper() in self.WRITES:
+                    self.writes.append(elapsed)
+
+    def install(self):
+        for conn in connections.all(initialized_only=True):
+            conn.execute_wrappers.append(self)
+        connection_created.connect(self._on_connection, weak=False)
+
+    def uninstall(self):
+        connection_created.disconnect(self._on_connection)
+        for conn in connections.all(initialized_only=True):
+            if self in conn.execute_wrappers:
+                conn.execute_wrappers.remove(self)
+
+    def _on_connection(self, sender, connection, **kwargs):
+        connection.execute_wrappers.append(self)
+
+
+def _sample_pg_locks(stop: threading.Event, samples: list[int]):
+    try:
+        while not stop.wait(0.5):
+            with connection.cursor() as cur:
+                cur.execute("SELECT COUNT(*) FROM pg_locks WHERE NOT granted")
+                samples.append(cur.fetchone()[0])
+    finally:
+        connection.close()
+
+
+def _resume_docx(rng: random.Random, name: str) -> bytes:
+    skills = rng.sample(SKILLS, rng.randint(4, 10))
+    lines = [name, "Software engineer", "Skills: " + ", ".join(skills)]
+    lines += [
+        f"{rng.choice(WORDS).capitalize()} {rng.choice(skills)} services for {rng.randint(2, 90)}k users "
+        f"over {rng.randint(1, 6)} years"
+        for _ in range(rng.randint(5, 15))
+    ]
+    return _sample_docx(lines)
+
+
+def _pct(values: list[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    values = sorted(values)
+    return values[max(0, math.ceil(p * len(values)) - 1)] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = "Simulate concurrent recruiters against the upload -> rank -> results path with real Celery workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recruiters", type=int, default=8, help="Concurrent simulated recruiters.")
+        parser.add_argument("--batches", type=int, default=3, help="Batches each recruiter submits.")
+        parser.add_argument("--resumes", type=int, default=10, help="Resumes per batch.")
+        parser.add_argument("--big-every", type=int, default=0,
+                            help="Every n-th recruiter uploads --big-resumes per batch instead (0 = none).")
+        parser.add_argument("--big-resumes", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=4, help="Celery concurrency per lane.")
+        parser.add_argument("--broker", choices=["memory", "redis"], default="memory")
+        parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds the OpenAI stub takes per call.")
+        parser.add_argument("--no-openai", action="store_true", help="Rank heuristically only.")
+        parser.add_argument("--wait", type=float, default=10.0, help="Progress long-poll wait (s).")
+        parser.add_argument("--think", type=float, default=0.5, help="Pause between a recruiter's batches (s).")
+        parser.add_argument("--timeout", type=float, default=600.0, help="Give up on a batch after this long (s).")
+        parser.add_argument("--cleanup", action="store_true", help="Delete earlier load-test data first.")
+        parser.add_argument("--seed", type=int, default=None, help="Fixed seed for the generated resumes.")
+
+    def handle(self, *args, **options):
+        if options["cleanup"]:
+            self._cleanup()
+        fixtures = self._fixtures(options)
+
+        stub = _StubOpenAI(options["llm_latency"])
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+        db = _DbStats()
+        stop_sampler = threading.Event()
+        lock_samples: list[int] = []
+        if connection.vendor == "postgresql":
+            threading.Thread(target=_sample_pg_locks, args=(stop_sampler, lock_samples), daemon=True).start()
+
+        openai_settings = {
+            "USE_OPENAI": not options["no_openai"],
+            "OPENAI_API_KEY": "loadtest",
+            "OPENAI_BASE_URL": stub.base_url,
+        }
+        started = time.monotonic()
+        try:
+            if options["broker"] == "memory":
+                with override_settings(**openai_settings, **MEMORY_CELERY):
+                    db.install()
+                    try:
+                        stats = self._run_in_process(fixtures, options)
+                    finally:
+                        db.uninstall()
+            else:
+                stats = self._run_subprocesses(fixtures, options, openai_settings)
+        finally:
+            stop_sampler.set()
+            stub.shutdown()
+        wall = time.monotonic() - started
+
+        self._report(stats, options, wall, stub, db if options["broker"] == "memory" else None, lock_samples)
+
+    # -- setup ---------------------------------------------------------------
+
+    def _cleanup(self):
+        users = get_user_model().objects.filter(username__startswith="loadtest-r")
+        resumes = Resume.objects.filter(uploaded_by__in=users)
+        for resume in resumes.only("id", "file").iterator():
+            resume.file.delete(save=False)
+        RankingBatch.objects.filter(created_by__in=users).delete()
+        deleted, _ = resumes.delete()
+        self.stdout.write(f"Removed {deleted} rows of earlier load-test data.")
+
+    def _fixtures(self, opts: dict) -> list[dict]:
+        User = get_user_model()
+        rng = random.Random(opts["seed"])
+        out = []
+        for i in range(opts["recruiters"]):
+            user, _ = User.objects.get_or_create(username=f"loadtest-r{i}")
+            job = JobDescription.objects.filter(created_by=user).first() or JobDescription.objects.create(
+                created_by=user, title="Load test backend", raw_text=JD_TEXT,
+            )
+            big = opts["big_every"] and i % opts["big_every"] == 0
+            n = opts["big_resumes"] if big else opts["resumes"]
+            # up to 25 distinct documents per recruiter, re-uploaded across batches
+            docs = [_resume_docx(rng, f"Candidate {i}-{k}") for k in range(min(n, 25))]
+            out.append({"user": user, "job": job, "cookie": _session_cookie(user), "docs": docs, "n": n})
+        return out
+
+    def _run_in_process(self, fixtures: list[dict], opts: dict) -> dict:
+        from config.celery import app as celery_app
+
+        # the Django settings are overridden too: they win over conf.update() before the app is configured
+        celery_app.conf.update(
+            task_always_eager=False, broker_url="memory://", result_backend="cache+memory://",
+            broker_transport_options=MEMORY_CELERY["CELERY_BROKER_TRANSPORT_OPTIONS"],
+        )
+        # a single worker for every queue: two WorkControllers cannot share the app in one process
+        worker = celery_app.WorkController(
+            pool_cls="threads", concurrency=opts["workers"] * len(LANE_QUEUES), queues=sum(LANE_QUEUES, []),
+            loglevel="WARNING", without_mingle=True, without_gossip=True, without_heartbeat=True,
+            hostname="loadtest@localhost",
+        )
+        threading.Thread(target=worker.start, daemon=True).start()
+
+        httpd = ThreadedWSGIServer(("127.0.0.1", 0), _QuietHandler)
+        httpd.daemon_threads = True
+        httpd.set_app(get_internal_wsgi_application())
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        try:
+            return asyncio.run(self._traffic(httpd.server_address[1], fixtures, opts))
+        finally:
+            httpd.shutdown()
+            worker.stop(in_sighandler=False)
+
+    def _run_subprocesses(self, fixtures: list[dict], opts: dict, openai_settings: dict) -> dict:
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings.dev"),
+            "CELERY_EAGER": "False",
+            **{k: str(v) for k, v in openai_settings.items()},
+        }
+        port = _free_port()
+        procs = [
+            subprocess.Popen([sys.executable, "-m", "uvicorn", "config.asgi:application", "--host", "127.0.0.1",
+                              "--port", str(port), "--log-level", "warning"], cwd=settings.BASE_DIR, env=env),
+            *(
+                subprocess.Popen([sys.executable, "-m", "celery", "-A", "config", "worker", "-Q", ",".join(queues),
+                                  "-c", str(opts["workers"]), "--loglevel", "WARNING", "-n", f"loadtest-{n}@%h"],
+                                 cwd=settings.BASE_DIR, env=env)
+                for n, queues in enumerate(LANE_QUEUES)
+            ),
+        ]
+        try:
+            self._wait_ready(port, procs)
+            return asyncio.run(self._traffic(port, fixtures, opts))
+        finally:
+            for proc in procs:
+                proc.terminate()
+            for proc in procs:
+                try:
+                    proc.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+
+    def _wait_ready(self, port: int, procs: list[subprocess.Popen]):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            for proc in procs:
+                if proc.poll() is not None:
+                    raise CommandError(f"{proc.args[2]} exited with code {proc.returncode} (installed? broker up?)")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError("Server did not start within 30s")
+
+    # -- traffic ---------------------------------------------------------------
+
+    async def _traffic(self, port: int, fixtures: list[dict], opts: dict) -> dict:
+        stats = {
+            "upload": [], "end-to-end": [], "results page": [], "progress poll": [],
+            "completed": 0, "failed": 0, "errors": 0, "rejected": 0, "resumes": 0,
+        }
+
+        async def recruiter(fx: dict):
+            client = _Client(port, fx["cookie"])
+            for n in range(opts["batches"]):
+                files = [(f"{fx['user'].username}-{n}-{k}.docx", fx["docs"][k % len(fx["docs"])])
+                         for k in range(fx["n"])]
+                body, ctype = _multipart({"job": fx["job"].id}, {"resumes": files})
+
+                start = time.monotonic()
+                try:
+                    status, headers, _ = await client.fetch("POST", "/rank/", body, ctype, timeout=opts["timeout"])
+                except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                    status, headers = None, {}
+                match = re.search(r"/batches/(\d+)/", headers.get("location", ""))
+                if status == 429:  # admission control (apps/ranking/services/admission.py)
+                    stats["rejected"] += 1
+                    await asyncio.sleep(min(float(headers.get("retry-after", 5)), opts["think"] + 5))
+                    continue
+                if status != 302 or not match:
+                    stats["errors"] += 1
+                    continue
+                stats["upload"].append(time.monotonic() - start)
+                batch_id = int(match.group(1))
+
+                done = await self._await_batch(client, batch_id, start, opts, stats)
+                if done is None:
+                    stats["errors"] += 1
+                    continue
+                stats[done] += 1
+                stats["resumes"] += fx["n"]
+                stats["end-to-end"].append(time.monotonic() - start)
+
+                page_start = time.monotonic()
+                status, _, _ = await client.fetch("GET", f"/batches/{batch_id}/")
+                if status == 200:
+                    stats["results page"].append(time.monotonic() - page_start)
+                else:
+                    stats["errors"] += 1
+                await asyncio.sleep(opts["think"])
+
+        await asyncio.gather(*(recruiter(fx) for fx in fixtures))
+        return stats
+
+    async def _await_batch(self, client: _Client, batch_id: int, start: float, opts: dict, stats: dict) -> str | None:
+        since = ""
+        while time.monotonic() - start < opts["timeout"]:
+            poll_start = time.monotonic()
+            try:
+                status, _, payload = await client.fetch(
+                    "GET", f"/batches/{batch_id}/progress/?wait={opts['wait']}&since={quote(since)}",
+                    timeout=opts["wait"] + 30,
+                )
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                status = None
+            if status != 200:
+                stats["errors"] += 1
+                await asyncio.sleep(1)
+                continue
+            stats["progress poll"].append(time.monotonic() - poll_start)
+            progress = json.loads(payload)
+            if progress["status"] in ("completed", "failed"):
+                return progress["status"]
+            since = progress["token"]
+        return None
+
+    # -- report ----------------------------------------------------------------
+
+    def _report(self, stats: dict, opts: dict, wall: float, stub: _StubOpenAI, db: _DbStats | None,
+                lock_samples: list[int]):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{opts['recruiters']} recruiters x {opts['batches']} batches, {opts['workers']} workers, "
+            f"broker={opts['broker']}, {connection.vendor}"
+        ))
+        self.stdout.write(
+            f"  {stats['completed']} batches completed, {stats['failed']} failed, {stats['errors']} errors, "
+            f"{stats['rejected']} rejected (429) "
+            f"in {wall:.1f}s: {stats['completed'] / wall:.2f} batches/s, {stats['resumes'] / wall:.1f} resumes/s"
+        )
+        for kind in ("upload", "end-to-end", "results page", "progress poll"):
+            lat = stats[kind]
+            if not lat:
+                self.stdout.write(f"  {kind:<14}      0")
+                continue
+            self.stdout.write(
+                f"  {kind:<14} {len(lat):6d}  p50={statistics.median(lat) * 1000:8.1f}ms  "
+                f"p95={_pct(lat, 0.95) * 1000:8.1f}ms  p99={_pct(lat, 0.99) * 1000:8.1f}ms  "
+                f"max={max(lat) * 1000:8.1f}ms"
+            )
+
+        usernames = {f"loadtest-r{i}" for i in range(opts["recruiters"])}
+        for row in wait_time_stats(hours=(wall + 5) / 3600):
+            if row["username"] in usernames and row["started"]:
+                self.stdout.write(
+                    f"  queue wait     {row['username']:<14} {row['lane']:<12} {row['started']:4d} chunks  "
+                    f"avg={row['avg_wait_s']:6.2f}s  p95={row['p95_wait_s']:6.2f}s  max={row['max_wait_s']:6.2f}s"
+                )
+
+        self.stdout.write(f"  openai stub    {stub.requests} requests, {stub.tokens:,} tokens")
+        if db is not None:
+            writes = db.writes
+            self.stdout.write(
+                f"  db             {db.statements:,} statements, {len(writes):,} writes  "
+                f"write p50={statistics.median(writes or [0]) * 1000:.2f}ms  p99={_pct(writes, 0.99) * 1000:.2f}ms  "
+                f"max={max(writes, default=0) * 1000:.1f}ms  lock errors={db.lock_errors}"
+            )
+        else:
+            self.stdout.write("  db             statements run in the worker/server subprocesses are not traced")
+        if lock_samples:
+            self.stdout.write(
+                f"  pg_locks       waiting locks avg={statistics.mean(lock_samples):.1f} max={max(lock_samples)}"
+            )
@@ -0,0 +1,228 @@
+"""
+Query budgets: SQL statement count, DB time and repeated statements (the
+N+1 signature) per request or task, checked against DEFAULT_BUDGETS with the
+overrides in settings.QUERY_BUDGETS.
+
+One execute_wrapper is installed on every DB connection at startup
+(DashboardConfig.ready); it records into the QueryStats of the current
+context (a contextvar, so it follows sync_to_async threads) and is a no-op
+outside track_queries(). Nested scopes (an eager task inside a request)
+add their numbers to the enclosing one.
+
+    QueryBudgetMiddleware   per request; logs and adds a Server-Timing header
+    @query_budget           per Celery task; rank_chunk/enrich_chunk store their
+                            summary on the chunk, finalize_batch merges them
+                            on the batch
+"""
+import functools
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGETS = {
+    "request": {"queries": 30, "db_ms": 300, "repeats": 5},
+    "task": {"queries": 500, "db_ms": 5000, "repeats": 50},
+}
+TOP_REPEATS = 5
+SQL_PREVIEW = 300
+
+_current: ContextVar["QueryStats | None"] = ContextVar("query_stats", default=None)
+
+_IN_LIST = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """SQL with IN-lists and inline numbers collapsed, so per-row repeats of one statement compare equal."""
+    sql = _IN_LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", _NUMBER.sub("N", sql)).strip()
+
+
+def budget_for(kind: str, name: str = "") -> dict:
+    """Defaults for `kind` ("request" or "task"), overridden per view name / task name."""
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    return {**DEFAULT_BUDGETS[kind], **budgets.get(kind, {}), **budgets.get(name, {})}
+
+
+class QueryStats:
+    def __init__(self, kind: str, name: str = ""):
+        self.kind, self.name = kind, name
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, sql: str, seconds: float) -> None:
+        self.queries += 1
+        self.db_seconds += seconds
+        self.statements[fingerprint(sql)] += 1
+
+    def absorb(self, other: "QueryStats") -> None:
+        self.queries += other.queries
+        self.db_seconds += other.db_seconds
+        self.statements.update(other.statements)
+
+    def repeated(self, min_count: int = 2) -> list[tuple[str, int]]:
+        return [(sql, n) for sql, n in self.statements.most_common(TOP_REPEATS) if n >= min_count]
+
+    def over_budget(self, budget: dict | None = None) -> list[str]:
+        budget = budget or budget_for(self.kind, self.name)
+        problems = []
+        if budget.get("queries") and self.queries > budget["queries"]:
+            problems.append(f"{self.queries} queries > {budget['queries']}")
+        if budget.get("db_ms") and self.db_seconds * 1000 > budget["db_ms"]:
+            problems.append(f"{self.db_seconds * 1000:.0f} ms in the DB > {budget['db_ms']}")
+        worst = self.statements.most_common(1)
+        if budget.get("repeats") and worst and worst[0][1] > budget["repeats"]:
+            problems.append(f"one statement ran {worst[0][1]} times > {budget['repeats']} (N+1?)")
+        return problems
+
+    def summary(self) -> dict:
+        return {
+            "queries": self.queries,
+            "db_ms": round(self.db_seconds * 1000, 1),
+            "repeated": [{"sql": sql[:SQL_PREVIEW], "count": n} for sql, n in self.repeated()],
+            "over_budget": self.over_budget(),
+        }
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, time.perf_counter() - start)
+
+
+def _on_connection(sender, connection, **kwargs):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def install() -> None:
+    """Attach the recorder to current and future connections (idempotent)."""
+    connection_created.connect(_on_connection, dispatch_uid="querybudget")
+    for conn in connections.all(initialized_only=True):
+        _on_connection(None, conn)
+
+
+def current_stats() -> "QueryStats | None":
+    return _current.get()
+
+
+@contextmanager
+def track_queries(kind: str, name: str = ""):
+    stats = QueryStats(kind, name)
+    parent = _current.get()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        if parent is not None:
+            parent.absorb(stats)
+
+
+def report(stats: QueryStats) -> None:
+    """Warn when over budget (with the most repeated statements), else a DEBUG line."""
+    problems = stats.over_budget()
+    if problems:
+        logger.warning(
+            "Query budget exceeded by %s %s: %s. Most repeated: %s",
+            stats.kind, stats.name or "?", "; ".join(problems),
+            " | ".join(f"{n}x {sql[:120]}" for sql, n in stats.repeated()) or "none",
+            extra={"queries": stats.summary()},
+        )
+    else:
+        logger.debug("%s %s: %s queries, %.1f ms in the DB", stats.kind, stats.name, stats.queries,
+                     stats.db_seconds * 1000)
+
+
+def query_budget(func):
+    """
+    Track a task's queries and report them against QUERY_BUDGETS["task"]
+    (or the entry for its dotted name). Goes under @shared_task.
+    """
+    name = f"{func.__module__}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with track_queries("task", name) as stats:
+            try:
+                return func(*args, **kwargs)
+            finally:
+                report(stats)
+
+    return wrapper
+
+
+def merge_query_summaries(summaries: list[dict]) -> dict:
+    """Combine per-task summaries (a batch's chunks) into one."""
+    summaries = [s for s in summaries if s]
+    if not summaries:
+        return {}
+    repeated: Counter[str] = Counter()
+    for s in summaries:
+        for r in s.get("repeated", []):
+            repeated[r["sql"]] += r["count"]
+    return {
+        "tasks": len(summaries),
+        "queries": sum(s["queries"] for s in summaries),
+        "db_ms": round(sum(s["db_ms"] for s in summaries), 1),
+        "max_task_queries": max(s["queries"] for s in summaries),
+        "tasks_over_budget": sum(bool(s.get("over_budget")) for s in summaries),
+        "repeated": [{"sql": sql, "count": n} for sql, n in repeated.most_common(TOP_REPEATS)],
+    }
+
+
+class QueryBudgetMiddleware:
+    """
+    Per-request query stats, enabled by settings.QUERY_BUDGET_VIEWS (on with
+    DEBUG). Over-budget requests log a warning; every response gets
+    `Server-Timing: db;dur=<ms>;desc="<n> queries"` for the browser devtools.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_BUDGET_VIEWS", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with track_queries("request") as stats:
+            response = self.get_response(request)
+        return self._finish(request, response, stats)
+
+    async def __acall__(self, request):
+        with track_queries("request") as stats:
+            response = await self.get_response(request)
+        return self._finish(request, response, stats)
+
+    def _finish(self, request, response, stats: QueryStats):
+        match = getattr(request, "resolver_match", None)
+        stats.name = match.view_name if match else request.path
+        report(stats)
+        response.headers.setdefault(
+            "Server-Timing", f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"',
+        )
+        return response
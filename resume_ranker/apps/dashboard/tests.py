@@ -0,0 +1,137 @@
+import json
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from celery import current_app
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.dashboard.management.commands.check_boot import PROBE, WORKER_ONLY_MODULES
+from apps.jobs.models import JobDescription
+from apps.ranking import tasks
+from apps.ranking.caching import bump_batch_cache_version, result_state
+from apps.ranking.models import RankingBatch, RankingResult
+from apps.resumes.models import Resume
+from apps.resumes.services.parsing import PARSER_VERSION, parse_resume_heuristic
+
+
+@override_settings(USE_OPENAI=False)
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="recruiter")
+        cls.job = JobDescription.objects.create(created_by=cls.user, title="Python Dev", raw_text="Python")
+        cls.batch = RankingBatch.objects.create(created_by=cls.user, job=cls.job, status="completed")
+        cls.result = cls.add_result(0, 80)
+
+    @classmethod
+    def add_result(cls, n: int, score: int) -> RankingResult:
+        resume = Resume.objects.create(uploaded_by=cls.user, file=f"resumes/cv{n}.pdf", original_filename=f"cv{n}.pdf")
+        return RankingResult.objects.create(batch=cls.batch, job=cls.job, resume=resume, score=score,
+                                            model_meta={"enrichment": "off"})
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse("dashboard:results", args=[self.batch.id])
+
+    def test_results_304(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("Last-Modified", first.headers)
+        self.assertIn("private", first.headers["Cache-Control"])
+
+        again = self.client.get(self.url, headers={"If-None-Match": first.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+        since = self.client.get(self.url, headers={"If-Modified-Since": first.headers["Last-Modified"]})
+        self.assertEqual(since.status_code, 304)
+
+    def test_etag_changes_with_results(self):
+        etag = self.client.get(self.url).headers["ETag"]
+
+        bump_batch_cache_version(self.batch.id)
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+        etag = response.headers["ETag"]
+        self.add_result(1, 60)
+        self.assertEqual(self.client.get(self.url, headers={"If-None-Match": etag}).status_code, 200)
+
+    def test_etag_changes_with_status(self):
+        etag = self.client.get(self.url).headers["ETag"]
+        RankingBatch.objects.filter(id=self.batch.id).update(status="running")
+        self.assertEqual(self.client.get(self.url, headers={"If-None-Match": etag}).status_code, 200)
+
+    def test_etag_is_per_user(self):
+        etag = self.client.get(self.url).headers["ETag"]
+        self.client.force_login(User.objects.create(username="other"))
+        self.assertEqual(self.client.get(self.url, headers={"If-None-Match": etag}).status_code, 404)
+
+    def test_result_detail_304(self):
+        url = reverse("dashboard:result_detail", args=[self.result.id])
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": first.headers["ETag"]}).status_code, 304)
+
+    def test_pending_enrichment_has_no_validators(self):
+        RankingResult.objects.filter(id=self.result.id).update(model_meta={"enrichment": "pending"})
+        self.assertEqual(result_state(self.result.id, self.user, pending_is_stale=True),
+                         {"etag": None, "last_modified": None})
+        self.assertIsNotNone(result_state(self.result.id, self.user, pending_is_stale=False)["etag"])
+
+
+@override_settings(USE_OPENAI=False)
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for name in ("task_always_eager", "task_eager_propagates"):
+            self.addCleanup(setattr, current_app.conf, name, getattr(current_app.conf, name))
+            setattr(current_app.conf, name, True)
+
+        user = User.objects.create(username="recruiter")
+        self.job = JobDescription.objects.create(created_by=user, title="Python Dev", raw_text="Python, Django")
+        self.batch = RankingBatch.objects.create(created_by=user, job=self.job, status="queued")
+        text = "Skills\nPython, Django, Docker"
+        self.batch.resumes.add(Resume.objects.create(
+            uploaded_by=user, file="resumes/cv.pdf", extracted_text=text, extracted=parse_resume_heuristic(text),
+            parser_version=PARSER_VERSION, status="parsed",
+        ))
+        self.client.force_login(user)
+        self.url = reverse("dashboard:results", args=[self.batch.id])
+
+    def rank(self) -> int:
+        # a worker in another process: its version bump never reaches this process's cache
+        with mock.patch.object(tasks, "bump_batch_cache_version"):
+            tasks.run_batch_ranking.delay(self.batch.id)
+        return RankingResult.objects.get(batch=self.batch).score
+
+    def test_rerank_changes_page(self):
+        first = self.rank()
+        self.assertContains(self.client.get(self.url), f">{first}</span>")
+
+        self.job.raw_text = "Python, Django, Docker, Kubernetes, Terraform, AWS"
+        self.job.save()
+        second = self.rank()
+        self.assertNotEqual(first, second)
+        response = self.client.get(self.url)
+        self.assertContains(response, f">{second}</span>")
+        self.assertNotContains(response, f">{first}</span>")
+
+
+class WebBootTests(SimpleTestCase):
+    def test_web_process_skips_worker_modules(self):
+        """A fresh process loading the WSGI app and every view, as check_boot does."""
+        proc = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE},
+        )
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        modules = json.loads(proc.stdout.strip().splitlines()[-1])["modules"]
+        self.assertEqual(sorted({m.split(".")[0] for m in modules} & set(WORKER_ONLY_MODULES)), [])
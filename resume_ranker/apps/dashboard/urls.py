@@ -7,5 +7,7 @@ urlpatterns = [
     path("", views.home, name="home"),
     path("rank/", views.upload_and_rank, name="upload"),
     path("batches/<int:batch_id>/", views.results, name="results"),
+    path("batches/<int:batch_id>/matrix/", views.batch_matrix, name="batch_matrix"),
+    path("batches/<int:batch_id>/progress/", views.batch_progress, name="batch_progress"),
     path("results/<int:result_id>/", views.result_detail, name="result_detail"),
 ]
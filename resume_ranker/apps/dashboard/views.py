@@ -1,12 +1,23 @@
+import asyncio
+import time
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponseForbidden
-from django.shortcuts import render, redirect, get_object_or_404
-
-from apps.jobs.models import JobDescription
-from apps.resumes.models import Resume
+from django.http import Http404, HttpResponseForbidden, JsonResponse
+from django.shortcuts import aget_object_or_404, render, redirect, get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from apps.ranking.caching import abatch_state, fragment_timeout, result_state
 from apps.ranking.models import RankingBatch, RankingResult
-from apps.ranking.tasks import run_batch_ranking
+from apps.ranking.services.admission import Overloaded
+from apps.ranking.services.batches import abatch_progress, submit_batch
+from apps.ranking.tasks import enrich_result, openai_enabled
 from .forms import RankUploadForm
 
 
@@ -15,53 +26,208 @@ def home(request):
     return redirect("dashboard:upload")
 
 
+async def _auser(request):
+    # resolve the user once on the event loop; templates read request.user,
+    # which would otherwise hit the DB synchronously
+    user = await request.auser()
+    request.user = user
+    return user
+
+
+def _with_validators(response, etag: str | None, last_modified: datetime | None):
+    if response.status_code == 200:
+        if etag:
+            response.headers.setdefault("ETag", etag)
+        if last_modified:
+            response.headers.setdefault("Last-Modified", http_date(last_modified.timestamp()))
+    return response
+
+
 @login_required
-def upload_and_rank(request):
+async def upload_and_rank(request):
+    # Under ASGI the request body is received without holding a thread; the
+    # file copies + inserts run in one worker thread inside submit_batch's transaction.
+    user = await _auser(request)
     if request.method == "POST":
-        form = RankUploadForm(request.POST, request.FILES, user=request.user)
-        if form.is_valid():
+        form = RankUploadForm(request.POST, request.FILES, user=user)
+        if await sync_to_async(form.is_valid)():
             job = form.cleaned_data["job"]
 
-            if (not request.user.is_superuser) and job.created_by_id != request.user.id:
+            if (not user.is_superuser) and job.created_by_id != user.id:
                 return HttpResponseForbidden("You do not have access to this Job Description.")
 
             files = form.cleaned_data["resumes"]
-
-            resume_ids = []
-            for f in files:
-                r = Resume.objects.create(
-                    uploaded_by=request.user,
-                    file=f,
-                    original_filename=getattr(f, "name", ""),
+            extra_jobs = list(form.cleaned_data["extra_jobs"])
+            try:
+                batch = await sync_to_async(submit_batch)(user, job, files=files, extra_jobs=extra_jobs)
+            except Overloaded as e:
+                messages.error(request, f"{e} (retry in about {max(1, round(e.retry_after / 60))} min).")
+                response = await sync_to_async(render)(request, "dashboard/upload.html", {"form": form}, status=429)
+                response["Retry-After"] = str(e.retry_after)
+                return response
+
+            if batch.status == "deferred":
+                messages.info(
+                    request,
+                    f"Uploaded {len(files)} resume(s). The system is busy, so this batch is queued for later; "
+                    "ranking starts automatically when capacity frees up.",
                 )
-                resume_ids.append(r.id)
+            else:
+                messages.success(request, f"Uploaded {len(files)} resume(s). Ranking started.")
+            return redirect("dashboard:results", batch_id=batch.id)
+
+    else:
+        form = RankUploadForm(user=user)
+
+    # the job <select> queries while rendering
+    return await sync_to_async(render)(request, "dashboard/upload.html", {"form": form})
+
+
+async def _batch_state_or_304(request, batch_id: int, user):
+    """
+    (state, None) or (state, 304/412 response). Conditional GET by hand:
+    @condition would compute the validators synchronously.
+    """
+    state = await abatch_state(batch_id, user)
+    if state is None:
+        raise Http404("No RankingBatch matches the given query.")
+    last_modified = state["last_modified"]
+    return state, get_conditional_response(
+        request, etag=state["etag"], last_modified=last_modified and int(last_modified.timestamp()),
+    )
 
-            batch = RankingBatch.objects.create(created_by=request.user, job=job, status="queued")
-            batch.resumes.add(*resume_ids)
 
-            run_batch_ranking.delay(batch.id)
+async def _get_batch(batch_id: int, user) -> RankingBatch:
+    return await aget_object_or_404(
+        RankingBatch.objects.select_related("job").prefetch_related("jobs"), id=batch_id, created_by=user,
+    )
 
-            messages.success(request, f"Uploaded {len(files)} resume(s). Ranking started.")
-            return redirect("dashboard:results", batch_id=batch.id)
 
+@login_required
+@cache_control(private=True, no_cache=True)
+async def results(request, batch_id: int):
+    user = await _auser(request)
+    state, not_modified = await _batch_state_or_304(request, batch_id, user)
+    if not_modified is not None:
+        return not_modified
+
+    batch = await _get_batch(batch_id, user)
+    jobs = batch.job_list()
+    # multi-JD batches show one JD's ranking at a time (?job=<id>), primary first
+    job = next((j for j in jobs if str(j.id) == request.GET.get("job")), jobs[0])
+    qs = (
+        batch.results.filter(job=job)
+        .select_related("resume").defer("resume__extracted_text", "resume__minhash")
+        .order_by("-score", "id")
+    )
+    context = {
+        "batch": batch,
+        "jobs": jobs,
+        "job": job,
+        # completed batches never change unless re-ranked; the ETag covers every input of the table
+        "fragment_cacheable": state["cacheable"],
+        "fragment_key": state["etag"],
+        "fragment_timeout": fragment_timeout(),
+    }
+    if state["cacheable"]:
+        # usually served from the fragment cache; the queryset only runs on a miss
+        context["results"] = qs
+        response = await sync_to_async(render)(request, "dashboard/results.html", context)
     else:
-        form = RankUploadForm(user=request.user)
+        context["results"] = [r async for r in qs]
+        response = render(request, "dashboard/results.html", context)
+    return _with_validators(response, state["etag"], state["last_modified"])
+
 
-    return render(request, "dashboard/upload.html", {"form": form})
+@login_required
+@cache_control(private=True, no_cache=True)
+async def batch_matrix(request, batch_id: int):
+    """Candidate x role score matrix for a multi-JD batch, best fit per candidate."""
+    user = await _auser(request)
+    state, not_modified = await _batch_state_or_304(request, batch_id, user)
+    if not_modified is not None:
+        return not_modified
+
+    batch = await _get_batch(batch_id, user)
+    jobs = batch.job_list()
+    cells = RankingResult.objects.filter(batch=batch).values(
+        "id", "resume_id", "resume__original_filename", "job_id", "score",
+    )
+    candidates: dict[int, dict] = {}
+    async for cell in cells:
+        c = candidates.setdefault(cell["resume_id"], {
+            "resume_id": cell["resume_id"],
+            "name": cell["resume__original_filename"],
+            "by_job": {},
+        })
+        c["by_job"][cell["job_id"]] = cell
+
+    rows = []
+    for c in candidates.values():
+        row_cells = [c["by_job"].get(j.id) for j in jobs]
+        best_idx = max(range(len(jobs)), key=lambda i: row_cells[i]["score"] if row_cells[i] else -1)
+        rows.append({
+            "resume_id": c["resume_id"],
+            "name": c["name"],
+            "cells": row_cells,
+            "best_index": best_idx,
+            "best_job": jobs[best_idx],
+            "best_score": row_cells[best_idx]["score"] if row_cells[best_idx] else None,
+        })
+    rows.sort(key=lambda r: (-(r["best_score"] or 0), r["name"] or "", r["resume_id"]))
+
+    response = render(request, "dashboard/matrix.html", {"batch": batch, "jobs": jobs, "rows": rows})
+    return _with_validators(response, state["etag"], state["last_modified"])
 
 
 @login_required
-def results(request, batch_id: int):
-    batch = get_object_or_404(RankingBatch, id=batch_id, created_by=request.user)
-    qs = batch.results.select_related("resume").order_by("-score", "id")
-    return render(request, "dashboard/results.html", {"batch": batch, "results": qs})
+async def batch_progress(request, batch_id: int):
+    """
+    Progress JSON for a batch. Long-polls: with ?since=<token from the last
+    response>&wait=<seconds>, waits until the status or counters change.
+    """
+    user = await _auser(request)
+    try:
+        wait = max(0.0, min(float(request.GET.get("wait", 0)), settings.PROGRESS_LONG_POLL_MAX_WAIT))
+    except ValueError:
+        wait = 0.0
+    since = request.GET.get("since", "")
+    deadline = time.monotonic() + wait
+
+    while True:
+        progress = await abatch_progress(batch_id, user)
+        if progress is None:
+            raise Http404("No RankingBatch matches the given query.")
+        token = f"{progress['status']}:{progress['results']}:{progress['failed']}"
+        finished = progress["status"] in ("completed", "failed")
+        if token != since or finished or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(settings.PROGRESS_POLL_INTERVAL)
+
+    progress["token"] = token
+    response = JsonResponse(progress)
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+# stays sync: on-demand enrichment is a blocking OpenAI call
+def _result_state(request, result_id: int):
+    if not hasattr(request, "_result_state"):
+        request._result_state = result_state(result_id, request.user, pending_is_stale=openai_enabled())
+    return request._result_state
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(
+    etag_func=lambda request, result_id: (_result_state(request, result_id) or {}).get("etag"),
+    last_modified_func=lambda request, result_id: (_result_state(request, result_id) or {}).get("last_modified"),
+)
 def result_detail(request, result_id: int):
     result = get_object_or_404(
-        RankingResult.objects.select_related("job", "resume", "batch"),
+        RankingResult.objects.with_details().select_related("job", "resume", "batch").defer("resume__extracted_text", "resume__minhash"),
         id=result_id,
         batch__created_by=request.user,
     )
+    enrich_result(result)
     return render(request, "dashboard/result_detail.html", {"r": result})
@@ -1,11 +1,16 @@
 from django.contrib import admin
+
+from apps.dashboard.admin_utils import ScalableAdminMixin
 from .models import JobDescription
 
 @admin.register(JobDescription)
-class JobDescriptionAdmin(admin.ModelAdmin):
+class JobDescriptionAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "title", "created_by", "created_at")
     search_fields = ("title", "raw_text")
+    ordering = ("-id",)
     list_filter = ("created_at",)
+    list_select_related = ("created_by",)
+    changelist_defer = ("raw_text", "extracted")
 
     def save_model(self, request, obj, form, change):
         if not obj.pk and not obj.created_by_id:
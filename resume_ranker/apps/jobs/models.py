@@ -8,6 +8,8 @@ class JobDescription(models.Model):
 
     extracted = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # part of the key of cached JD profiles (apps/ranking/services/profiles.py)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -1,13 +1,42 @@
 from django.contrib import admin
-from .models import RankingBatch, RankingResult
+
+from apps.dashboard.admin_utils import AutocompleteFilter, ScalableAdminMixin
+from .models import BatchChunk, RankingBatch, RankingResult
 
 @admin.register(RankingBatch)
-class RankingBatchAdmin(admin.ModelAdmin):
+class RankingBatchAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "job", "created_by", "status", "created_at", "completed_at")
     list_filter = ("status", "created_at")
+    list_select_related = ("job", "created_by")
+    search_fields = ("=id", "job__title")
+    ordering = ("-id",)
+    raw_id_fields = ("job",)
+    changelist_defer = ("metrics", "job__raw_text", "job__extracted")
 
 @admin.register(RankingResult)
-class RankingResultAdmin(admin.ModelAdmin):
+class RankingResultAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "batch", "job", "resume", "score", "created_at")
+    # served by result_score_idx; the admin appends -pk as a tie-breaker
     ordering = ("-score",)
-    list_filter = ("job", "batch", "created_at")
+    list_filter = (("job", AutocompleteFilter), ("batch", AutocompleteFilter), "created_at")
+    list_select_related = ("batch", "job", "resume")
+    raw_id_fields = ("batch", "job", "resume")
+    changelist_defer = (
+        "job__raw_text", "job__extracted", "batch__metrics",
+        "resume__extracted_text", "resume__extracted", "resume__minhash",
+    )
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        # the default manager defers the detail columns; the change form shows them
+        if request.resolver_match and not request.resolver_match.url_name.endswith("_changelist"):
+            qs = qs.with_details()
+        return qs
+
+@admin.register(BatchChunk)
+class BatchChunkAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ("id", "batch", "index", "created_by", "lane", "status", "created_at", "started_at", "finished_at")
+    list_filter = ("lane", "status", "created_at")
+    list_select_related = ("batch", "created_by")
+    raw_id_fields = ("batch",)
+    changelist_defer = ("resume_ids", "metrics", "batch__metrics")
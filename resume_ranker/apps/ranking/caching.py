@@ -0,0 +1,119 @@
+"""
+HTTP validators and template-fragment cache keys for the results pages.
+
+A batch's cache state is derived from database state every process sees:
+its status, completed_at, result count, latest result update and the sum of
+its resumes' parser versions (a reparse raises it). A per-batch version
+counter in the Django cache, bumped whenever results are rewritten, is mixed
+in as well; with a process-local cache (the locmem default) a worker's bump
+never reaches the web processes, so the fragment key must not depend on it
+alone. The fragment cache key is the batch ETag.
+"""
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+from django.db.models.fields.json import KT
+
+from apps.ranking.models import RankingBatch, RankingResult
+
+VERSION_KEY = "batch:{}:results_version"
+
+
+def batch_cache_version(batch_id: int) -> int:
+    return cache.get(VERSION_KEY.format(batch_id), 0)
+
+
+def bump_batch_cache_version(batch_id: int) -> None:
+    """Invalidate cached fragments / ETags for a batch after its results changed."""
+    key = VERSION_KEY.format(batch_id)
+    try:
+        cache.incr(key)
+    except ValueError:  # key missing (never set or evicted)
+        cache.set(key, 1, None)
+
+
+def _etag(*parts) -> str:
+    raw = ":".join("" if p is None else str(p) for p in parts)
+    return '"' + hashlib.md5(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def _latest(*dts: datetime | None) -> datetime | None:
+    dts = [d for d in dts if d]
+    return max(dts) if dts else None
+
+
+def _batch_state_query(batch_id: int, user):
+    return (
+        RankingBatch.objects
+        .filter(id=batch_id, created_by=user)
+        .annotate(
+            n_results=Count("results"),
+            last_result=Max("results__updated_at"),
+            parsed=Sum("results__resume__parser_version"),
+        )
+        .values("status", "created_at", "completed_at", "n_results", "last_result", "parsed")
+    )
+
+
+def _batch_state(batch_id: int, user, row: dict | None, version: int) -> dict | None:
+    if row is None:
+        return None
+    return {
+        "etag": _etag(
+            "batch", user.pk, batch_id, row["status"], row["completed_at"] and row["completed_at"].isoformat(),
+            row["n_results"], row["last_result"] and row["last_result"].isoformat(), row["parsed"], version,
+        ),
+        "last_modified": _latest(row["created_at"], row["completed_at"], row["last_result"]),
+        "cacheable": row["status"] == "completed",
+    }
+
+
+def batch_state(batch_id: int, user) -> dict | None:
+    """
+    One aggregate query: {"etag", "last_modified", "cacheable"},
+    or None when the batch doesn't exist / isn't owned by `user`.
+    """
+    row = _batch_state_query(batch_id, user).first()
+    return _batch_state(batch_id, user, row, batch_cache_version(batch_id))
+
+
+async def abatch_state(batch_id: int, user) -> dict | None:
+    """Async batch_state() for async views."""
+    row = await _batch_state_query(batch_id, user).afirst()
+    version = await cache.aget(VERSION_KEY.format(batch_id), 0)
+    return _batch_state(batch_id, user, row, version)
+
+
+def result_state(result_id: int, user, *, pending_is_stale: bool) -> dict | None:
+    """
+    Validators for a result detail page. When `pending_is_stale` (OpenAI on and
+    the result still awaits on-demand enrichment) no validators are returned,
+    so the view always runs and enriches it.
+    """
+    row = (
+        RankingResult.objects
+        .filter(id=result_id, batch__created_by=user)
+        .annotate(enrichment=KT("model_meta__enrichment"))
+        .values("updated_at", "batch_id", "batch__completed_at", "enrichment")
+        .first()
+    )
+    if row is None:
+        return None
+    if pending_is_stale and row["enrichment"] == "pending":
+        return {"etag": None, "last_modified": None}
+
+    return {
+        "etag": _etag(
+            "result", user.pk, result_id, row["updated_at"].isoformat(),
+            row["batch__completed_at"] and row["batch__completed_at"].isoformat(),
+            batch_cache_version(row["batch_id"]),
+        ),
+        "last_modified": _latest(row["updated_at"], row["batch__completed_at"]),
+    }
+
+
+def fragment_timeout() -> int:
+    return int(getattr(settings, "RESULTS_FRAGMENT_CACHE_TIMEOUT", 3600))
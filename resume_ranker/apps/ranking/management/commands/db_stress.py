@@ -0,0 +1,126 @@
+import os
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from apps.jobs.models import JobDescription
+from apps.ranking.models import RankingBatch, RankingResult
+from apps.resumes.models import Resume
+
+
+STRESS_ALIAS = "db_stress"
+
+
+def _writer(alias: str, batch_id: int, job_id: int, user_id: int, ops: int, stats: dict, lock: threading.Lock):
+    """One simulated Celery worker: per resume, write the Resume and its RankingResult in one transaction."""
+    latencies, locked, other = [], 0, 0
+    try:
+        for i in range(ops):
+            start = time.perf_counter()
+            try:
+                with transaction.atomic(using=alias):
+                    r = Resume.objects.using(alias).create(
+                        uploaded_by_id=user_id,
+                        file=f"stress/{uuid.uuid4().hex}.docx",
+                        original_filename="stress.docx",
+                        extracted_text="python django docker " * 50,
+                        extracted={"skills": ["Python", "Django"]},
+                        status="parsed",
+                    )
+                    RankingResult.objects.using(alias).create(
+                        batch_id=batch_id, job_id=job_id, resume=r, score=i % 100,
+                        model_meta={"mode": "stress"},
+                    )
+                latencies.append(time.perf_counter() - start)
+            except OperationalError as e:
+                if "locked" in str(e).lower() or "busy" in str(e).lower():
+                    locked += 1
+                else:
+                    other += 1
+    finally:
+        connections[alias].close()
+    with lock:
+        stats["latencies"].extend(latencies)
+        stats["locked"] += locked
+        stats["other_errors"] += other
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent-writer stress test for the DB profile. On SQLite it runs against a throw-away "
+        "database twice (plain vs tuned profile) and compares; on other engines it runs once on "
+        "the default DB and deletes its rows afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8, help="Concurrent writer threads (one DB connection each).")
+        parser.add_argument("--ops", type=int, default=200, help="Transactions per writer.")
+
+    def handle(self, *args, **options):
+        default = connections.databases["default"]
+        if default["ENGINE"] == "django.db.backends.sqlite3":
+            with tempfile.TemporaryDirectory() as tmp:
+                for label, db_options in [
+                    ("sqlite plain", {}),
+                    ("sqlite tuned", dict(settings.SQLITE_TUNED_OPTIONS)),
+                ]:
+                    self._configure_alias(default, os.path.join(tmp, f"{label.replace(' ', '_')}.sqlite3"), db_options)
+                    call_command("migrate", database=STRESS_ALIAS, verbosity=0)
+                    self._report(label, self._run(STRESS_ALIAS, options["writers"], options["ops"]))
+                    connections[STRESS_ALIAS].close()
+                    del connections[STRESS_ALIAS]
+                    del connections.databases[STRESS_ALIAS]
+        else:
+            self._report(default["ENGINE"], self._run("default", options["writers"], options["ops"]))
+
+    def _configure_alias(self, default: dict, name: str, db_options: dict):
+        cfg = dict(default)
+        cfg["NAME"] = name
+        cfg["OPTIONS"] = db_options
+        cfg["TEST"] = dict(default.get("TEST", {}))
+        connections.databases[STRESS_ALIAS] = cfg
+
+    def _run(self, alias: str, writers: int, ops: int) -> dict:
+        User = get_user_model()
+        user = User.objects.using(alias).create(username=f"db-stress-{uuid.uuid4().hex[:8]}")
+        job = JobDescription.objects.using(alias).create(created_by=user, title="stress", raw_text="python")
+        batch = RankingBatch.objects.using(alias).create(created_by=user, job=job, status="running")
+        connections[alias].close()  # each writer opens its own connection
+
+        stats = {"latencies": [], "locked": 0, "other_errors": 0}
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=_writer, args=(alias, batch.id, job.id, user.id, ops, stats, lock))
+            for _ in range(writers)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats["elapsed"] = time.perf_counter() - start
+        stats["attempted"] = writers * ops
+
+        if alias == "default":
+            user.delete()  # cascades to the job, batch, resumes and results created above
+        return stats
+
+    def _report(self, label: str, stats: dict):
+        lat = sorted(stats["latencies"])
+        ok = len(lat)
+        if not stats["attempted"]:
+            raise CommandError("Nothing to run.")
+        p50 = statistics.median(lat) * 1000 if lat else 0.0
+        p95 = lat[int(0.95 * (ok - 1))] * 1000 if lat else 0.0
+        self.stdout.write(
+            f"{label:<14} ok={ok}/{stats['attempted']}  locked={stats['locked']}  other={stats['other_errors']}  "
+            f"{ok / stats['elapsed']:8.1f} tx/s  p50={p50:6.1f}ms  p95={p95:7.1f}ms"
+        )
@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ranking.services.scheduling import wait_time_stats
+
+
+class Command(BaseCommand):
+    help = "Per-user queue wait of ranking chunks (created -> started), by lane."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=float, default=24.0, help="Look-back window.")
+        parser.add_argument("--user", help="Only this username.")
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            user = get_user_model().objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"Unknown user: {options['user']}")
+
+        rows = wait_time_stats(user=user, hours=options["hours"])
+        if not rows:
+            self.stdout.write("No ranking chunks in the window.")
+            return
+
+        self.stdout.write(
+            f"{'user':<20} {'lane':<12} {'started':>8} {'avg':>8} {'p95':>8} {'max':>8} {'waiting':>8} {'oldest':>8}"
+        )
+        for r in rows:
+            self.stdout.write(
+                f"{r['username'][:20]:<20} {r['lane']:<12} {r['started']:>8} {r['avg_wait_s']:>7.1f}s "
+                f"{r['p95_wait_s']:>7.1f}s {r['max_wait_s']:>7.1f}s {r['waiting']:>8} {r['oldest_waiting_s']:>7.1f}s"
+            )
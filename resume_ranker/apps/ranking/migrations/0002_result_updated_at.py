@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ranking', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rankingresult',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
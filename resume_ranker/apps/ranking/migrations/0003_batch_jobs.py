@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+        ('ranking', '0002_result_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rankingbatch',
+            name='jobs',
+            field=models.ManyToManyField(blank=True, related_name='multi_batches', to='jobs.jobdescription'),
+        ),
+    ]
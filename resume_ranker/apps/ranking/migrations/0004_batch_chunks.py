@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ranking', '0003_batch_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rankingbatch',
+            name='status',
+            field=models.CharField(choices=[('queued', 'queued'), ('running', 'running'), ('finalizing', 'finalizing'), ('completed', 'completed'), ('failed', 'failed')], default='queued', max_length=30),
+        ),
+        migrations.CreateModel(
+            name='BatchChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lane', models.CharField(choices=[('interactive', 'interactive'), ('bulk', 'bulk')], max_length=20)),
+                ('index', models.PositiveIntegerField()),
+                ('resume_ids', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('queued', 'queued'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('dispatched_at', models.DateTimeField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='ranking.rankingbatch')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['lane', 'status', 'created_at'], name='chunk_dispatch_idx'), models.Index(fields=['created_by', 'created_at'], name='chunk_user_wait_idx')],
+                'constraints': [models.UniqueConstraint(fields=('batch', 'index'), name='uniq_chunk_per_batch')],
+            },
+        ),
+    ]
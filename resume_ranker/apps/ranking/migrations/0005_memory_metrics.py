@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ranking', '0004_batch_chunks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batchchunk',
+            name='metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='rankingbatch',
+            name='metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
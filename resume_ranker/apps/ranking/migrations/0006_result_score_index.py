@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+        ('ranking', '0005_memory_metrics'),
+        ('resumes', '0004_resume_parser_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rankingresult',
+            index=models.Index(fields=['score', 'id'], name='result_score_idx'),
+        ),
+    ]
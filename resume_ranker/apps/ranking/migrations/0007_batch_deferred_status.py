@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ranking', '0006_result_score_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rankingbatch',
+            name='status',
+            field=models.CharField(choices=[('deferred', 'deferred'), ('queued', 'queued'), ('running', 'running'), ('finalizing', 'finalizing'), ('completed', 'completed'), ('failed', 'failed')], default='queued', max_length=30),
+        ),
+    ]
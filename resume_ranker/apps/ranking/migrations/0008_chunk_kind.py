@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ranking', '0007_batch_deferred_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='batchchunk',
+            name='uniq_chunk_per_batch',
+        ),
+        migrations.AddField(
+            model_name='batchchunk',
+            name='kind',
+            field=models.CharField(choices=[('rank', 'rank'), ('enrich', 'enrich')], default='rank', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='batchchunk',
+            name='openai_tokens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='batchchunk',
+            constraint=models.UniqueConstraint(fields=('batch', 'kind', 'index'), name='uniq_chunk_per_batch'),
+        ),
+    ]
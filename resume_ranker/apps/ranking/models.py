@@ -1,18 +1,92 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class RankingBatch(models.Model):
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # primary JD; multi-JD batches also list every JD (this one included) in `jobs`
     job = models.ForeignKey("jobs.JobDescription", on_delete=models.CASCADE, related_name="batches")
+    jobs = models.ManyToManyField("jobs.JobDescription", related_name="multi_batches", blank=True)
     resumes = models.ManyToManyField("resumes.Resume", related_name="batches")
 
     status = models.CharField(
         max_length=30,
         default="queued",
-        choices=[("queued","queued"),("running","running"),("completed","completed"),("failed","failed")],
+        choices=[
+            ("deferred","deferred"),("queued","queued"),("running","running"),("finalizing","finalizing"),
+            ("completed","completed"),("failed","failed"),
+        ],
     )
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    # worker-side measurements gathered from the chunks at finalize (e.g. "memory")
+    metrics = models.JSONField(default=dict, blank=True)
+
+    @property
+    def is_multi_job(self) -> bool:
+        return len(self.job_list()) > 1
+
+    def job_list(self) -> list:
+        """JDs this batch scores against, primary first (uses a prefetch of `jobs` when present)."""
+        if not hasattr(self, "_job_list"):
+            jobs = sorted(self.jobs.all(), key=lambda j: (j.id != self.job_id, j.id))
+            self._job_list = jobs or [self.job]
+        return self._job_list
+
+class BatchChunk(models.Model):
+    """
+    A slice of a batch's resumes, scheduled fairly across users
+    (apps/ranking/services/scheduling.py): scored by rank_chunk, then, with
+    OpenAI on, enriched by enrich_chunk.
+    """
+
+    batch = models.ForeignKey(RankingBatch, on_delete=models.CASCADE, related_name="chunks")
+    # copy of batch.created_by so the dispatcher groups by user without a join
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    kind = models.CharField(max_length=10, default="rank", choices=[("rank", "rank"), ("enrich", "enrich")])
+    lane = models.CharField(max_length=20, choices=[("interactive", "interactive"), ("bulk", "bulk")])
+    index = models.PositiveIntegerField()
+    resume_ids = models.JSONField(default=list)
+
+    status = models.CharField(
+        max_length=20,
+        default="pending",
+        choices=[("pending","pending"),("queued","queued"),("running","running"),("done","done"),("failed","failed")],
+    )
+    created_at = models.DateTimeField(default=timezone.now)  # start of the queue wait
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    metrics = models.JSONField(default=dict, blank=True)
+    # OpenAI tokens spent by an enrich chunk so far; summed per batch against OPENAI_BATCH_TOKEN_BUDGET
+    openai_tokens = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["batch", "kind", "index"], name="uniq_chunk_per_batch"),
+        ]
+        indexes = [
+            models.Index(fields=["lane", "status", "created_at"], name="chunk_dispatch_idx"),
+            models.Index(fields=["created_by", "created_at"], name="chunk_user_wait_idx"),
+        ]
+
+
+# Large per-result JSON/text columns, left out of default queries (list pages
+# only need score + resume); use .with_details() where they are rendered.
+RESULT_DETAIL_FIELDS = (
+    "score_breakdown", "reasoning", "missing_required", "strengths", "candidate_suggestions", "model_meta",
+)
+
+
+class RankingResultQuerySet(models.QuerySet):
+    def with_details(self):
+        return self.defer(None)
+
+
+class RankingResultManager(models.Manager.from_queryset(RankingResultQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().defer(*RESULT_DETAIL_FIELDS)
+
 
 class RankingResult(models.Model):
     batch = models.ForeignKey(RankingBatch, on_delete=models.CASCADE, related_name="results")
@@ -29,8 +103,15 @@ class RankingResult(models.Model):
     model_meta = models.JSONField(default=dict, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = RankingResultManager()
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["batch", "job", "resume"], name="uniq_result_per_batch"),
         ]
+        indexes = [
+            # admin / API "best first" ordering (ORDER BY score DESC, id DESC walks it backwards)
+            models.Index(fields=["score", "id"], name="result_score_idx"),
+        ]
@@ -0,0 +1,112 @@
+"""
+Admission control for new batches, measured in resumes (the unit of work).
+
+    backlog    resumes in batches that are queued, running or finalizing
+               (being enriched)
+    deferred   resumes in batches parked as "deferred"
+    user load  one user's resumes in backlog and deferred batches
+
+A submission is rejected (Overloaded, HTTP 429 with Retry-After) when it
+would take its user past RANKING_USER_MAX_IN_FLIGHT, or the system past
+RANKING_BACKLOG_HARD_LIMIT (backlog + deferred). Otherwise it is admitted,
+but stored as "deferred" instead of queued when the backlog is already at
+RANKING_BACKLOG_SOFT_LIMIT; drain_deferred_batches starts deferred batches
+oldest-first whenever the backlog falls below that limit (after each
+finished batch, and periodically via Celery beat).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.ranking.models import BatchChunk, RankingBatch
+
+ACTIVE = ("queued", "running", "finalizing")
+MIN_RETRY_AFTER = 30
+MAX_RETRY_AFTER = 3600
+THROUGHPUT_WINDOW = timedelta(minutes=10)
+
+
+class Overloaded(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _limit(name: str, default: int) -> int:
+    return int(getattr(settings, name, default) or 0)
+
+
+def _resumes_in(**filters) -> int:
+    return RankingBatch.resumes.through.objects.filter(
+        **{f"rankingbatch__{k}": v for k, v in filters.items()},
+    ).count()
+
+
+def backlog() -> int:
+    return _resumes_in(status__in=ACTIVE)
+
+
+def deferred() -> int:
+    return _resumes_in(status="deferred")
+
+
+def user_load(user) -> int:
+    return _resumes_in(created_by=user, status__in=(*ACTIVE, "deferred"))
+
+
+def throughput() -> float:
+    """Resumes scored per second over the last THROUGHPUT_WINDOW (chunk-size estimate)."""
+    done = BatchChunk.objects.filter(
+        status="done", finished_at__gte=timezone.now() - THROUGHPUT_WINDOW,
+    ).aggregate(n=Count("id"))["n"]
+    return done * int(getattr(settings, "RANKING_CHUNK_SIZE", 25)) / THROUGHPUT_WINDOW.total_seconds()
+
+
+def retry_after(excess: int) -> int:
+    """Seconds until roughly `excess` resumes of work have been worked off."""
+    rate = throughput()
+    seconds = excess / rate if rate else MIN_RETRY_AFTER * 2
+    return int(min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, seconds)))
+
+
+def admit(user, n_resumes: int) -> str:
+    """
+    "queued" or "deferred" for a new batch of `n_resumes`; raises Overloaded
+    when it must not be accepted at all.
+    """
+    user_max = _limit("RANKING_USER_MAX_IN_FLIGHT", 2000)
+    if user_max:
+        load = user_load(user)
+        if load + n_resumes > user_max:
+            raise Overloaded(
+                f"You already have {load} resume(s) waiting or being ranked; the limit is {user_max}. "
+                "Try again once some of your batches have finished.",
+                retry_after(load + n_resumes - user_max),
+            )
+
+    current = backlog()
+    hard = _limit("RANKING_BACKLOG_HARD_LIMIT", 50000)
+    if hard:
+        total = current + deferred() + n_resumes
+        if total > hard:
+            raise Overloaded("The ranking queue is full right now. Please try again later.", retry_after(total - hard))
+
+    soft = _limit("RANKING_BACKLOG_SOFT_LIMIT", 10000)
+    return "deferred" if soft and current >= soft else "queued"
+
+
+def next_deferred() -> RankingBatch | None:
+    """
+    Claim the oldest deferred batch if the backlog has room (deferred ->
+    queued, so concurrent drains never start one batch twice), else None.
+    """
+    soft = _limit("RANKING_BACKLOG_SOFT_LIMIT", 10000)
+    if soft and backlog() >= soft:
+        return None
+    for batch in RankingBatch.objects.filter(status="deferred").order_by("created_at", "id")[:10]:
+        if RankingBatch.objects.filter(id=batch.id, status="deferred").update(status="queued"):
+            batch.status = "queued"
+            return batch
+    return None
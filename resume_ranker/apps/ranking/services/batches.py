@@ -0,0 +1,90 @@
+"""
+Batch submission shared by the dashboard upload form and the JSON API.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from apps.ranking.models import RankingBatch
+from apps.ranking.services.admission import admit
+from apps.ranking.tasks import run_batch_ranking
+from apps.resumes.models import Resume
+from apps.resumes.tasks import process_resume
+
+
+def create_resumes(user, files, *, process: bool = True) -> list[int]:
+    """
+    Store uploaded files as Resume rows in one INSERT; returns their ids in
+    upload order. Extraction/parsing is queued per resume once committed
+    (unless `process` is False; the batch then parses them when it runs).
+    """
+    resumes = Resume.objects.bulk_create([
+        Resume(uploaded_by=user, file=f, original_filename=getattr(f, "name", ""))
+        for f in files
+    ])
+    ids = [r.id for r in resumes]
+    if ids and process and getattr(settings, "RESUME_PROCESS_ON_UPLOAD", True):
+        transaction.on_commit(lambda: [process_resume.delay(i) for i in ids])
+    return ids
+
+
+def submit_batch(user, job, *, files=(), resume_ids=(), extra_jobs=()) -> RankingBatch:
+    """
+    Create a queued batch for `job` over newly uploaded `files` and/or existing
+    `resume_ids` (caller checks ownership), and start ranking once committed.
+    With `extra_jobs` it is a multi-JD batch: every resume is scored against
+    `job` and each extra JD in the same run.
+
+    Admission control (services/admission.py) runs first: raises Overloaded
+    when the user or the system is over its limit, and returns the batch as
+    "deferred" (started later by drain_deferred_batches) when the backlog is
+    deep.
+    """
+    status = admit(user, len(set(resume_ids)) + len(files))
+    with transaction.atomic():
+        ids = list(dict.fromkeys([*resume_ids, *create_resumes(user, files, process=status == "queued")]))
+        batch = RankingBatch.objects.create(created_by=user, job=job, status=status)
+        batch.resumes.add(*ids)
+        jobs = list({j.id: j for j in [job, *extra_jobs]}.values())
+        if len(jobs) > 1:
+            batch.jobs.add(*jobs)
+        if status == "queued":
+            transaction.on_commit(lambda: run_batch_ranking.delay(batch.id))
+    return batch
+
+
+def _progress_query(batch_id: int, user):
+    return (
+        RankingBatch.objects
+        .filter(id=batch_id, created_by=user)
+        .annotate(
+            n_resumes=Count("resumes", distinct=True),
+            n_failed=Count("resumes", filter=Q(resumes__status="failed"), distinct=True),
+            n_results=Count("results", distinct=True),
+        )
+        .values("id", "job_id", "status", "created_at", "completed_at", "n_resumes", "n_failed", "n_results")
+    )
+
+
+def _progress(row: dict | None) -> dict | None:
+    if row is None:
+        return None
+    return {
+        "id": row["id"],
+        "job_id": row["job_id"],
+        "status": row["status"],
+        "created_at": row["created_at"],
+        "completed_at": row["completed_at"],
+        "resumes": row["n_resumes"],
+        "failed": row["n_failed"],
+        "results": row["n_results"],
+    }
+
+
+def batch_progress(batch_id: int, user) -> dict | None:
+    """Status and counters for one of `user`'s batches in a single query, or None."""
+    return _progress(_progress_query(batch_id, user).first())
+
+
+async def abatch_progress(batch_id: int, user) -> dict | None:
+    return _progress(await _progress_query(batch_id, user).afirst())
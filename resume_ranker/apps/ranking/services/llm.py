@@ -0,0 +1,63 @@
+"""
+LLM client registry. Provider SDKs are imported inside their factory, on the
+first get_client() call, so processes that never enrich (web workers) don't
+load `openai` and its dependency tree at startup.
+
+Clients are cached per provider and connection settings and reused across
+requests (the OpenAI client keeps an HTTP connection pool).
+"""
+import threading
+from typing import Callable
+
+from django.conf import settings
+
+_factories: dict[str, Callable[[], object]] = {}
+_clients: dict[tuple, object] = {}
+_lock = threading.Lock()
+
+
+def register_client(name: str, factory: Callable[[], object]) -> None:
+    """Register (or replace) the factory for provider `name`; drops cached clients."""
+    with _lock:
+        _factories[name] = factory
+        for key in [k for k in _clients if k[0] == name]:
+            del _clients[key]
+
+
+def _cache_key(name: str) -> tuple:
+    return name, settings.OPENAI_API_KEY, getattr(settings, "OPENAI_BASE_URL", "")
+
+
+def get_client(name: str = "openai"):
+    key = _cache_key(name)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                try:
+                    factory = _factories[name]
+                except KeyError:
+                    raise ValueError(f"Unknown LLM provider: {name!r}") from None
+                client = _clients[key] = factory()
+    return client
+
+
+def describe_error(e: Exception) -> str:
+    """'auth_error: ...', 'temporary_error: ...' or 'other_error: ...' for model_meta."""
+    import openai
+
+    if isinstance(e, openai.AuthenticationError):
+        return f"auth_error: {str(e)}"
+    if isinstance(e, (openai.RateLimitError, openai.APIConnectionError)):
+        return f"temporary_error: {str(e)}"
+    return f"other_error: {str(e)}"
+
+
+def _openai_client():
+    from openai import OpenAI
+
+    return OpenAI(api_key=settings.OPENAI_API_KEY, base_url=getattr(settings, "OPENAI_BASE_URL", "") or None)
+
+
+register_client("openai", _openai_client)
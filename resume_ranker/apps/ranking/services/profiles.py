@@ -0,0 +1,112 @@
+"""
+Parsed JD profiles, cached per worker process.
+
+A profile is what every resume of a batch is scored against (the JD's skill
+ids). Parsing a JD costs as much as parsing a resume, so profiles are kept in
+a per-process LRU keyed by (JD id, updated_at, parser version): editing a JD
+or upgrading the parser changes the key, and a stale entry is simply never
+read again and ages out. Worker processes fill it at start with the JDs of
+recent batches (warm_up, hooked to worker_process_init in config/celery.py).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from apps.jobs.models import JobDescription
+from apps.resumes.services.parsing import PARSER_VERSION, parse_resume_heuristic
+from apps.resumes.services.taxonomy import skill_ids_from_extracted
+
+logger = logging.getLogger(__name__)
+
+_profiles: OrderedDict[tuple, dict] = OrderedDict()
+_lock = threading.Lock()
+
+WARMUP_SAMPLE = """Experience
+Senior Software Engineer, Jan 2019 - Present
+Built Python/Django REST APIs on PostgreSQL, Docker and AWS; React dashboards.
+Education
+B.Tech Computer Science, 2018
+Skills
+Python, Django, SQL, Git, Kubernetes
+"""
+
+
+def _cache_size() -> int:
+    return int(getattr(settings, "JD_PROFILE_CACHE_SIZE", 256))
+
+
+def profile_key(job) -> tuple:
+    return job.id, job.updated_at, PARSER_VERSION
+
+
+def _parse(job) -> dict:
+    return {
+        "title": job.title or "Job",
+        "text": job.raw_text or "",
+        "skills": frozenset(skill_ids_from_extracted(parse_resume_heuristic(job.raw_text or ""))),
+    }
+
+
+def jd_profile(job) -> dict:
+    """The scoring profile for `job`: title, text, skill ids (plus the job itself)."""
+    key = profile_key(job)
+    with _lock:
+        cached = _profiles.get(key)
+        if cached is not None:
+            _profiles.move_to_end(key)
+    if cached is None:
+        cached = _parse(job)
+        with _lock:
+            _profiles[key] = cached
+            while len(_profiles) > _cache_size():
+                _profiles.popitem(last=False)
+    return {**cached, "job": job}
+
+
+def cached_profiles() -> int:
+    return len(_profiles)
+
+
+def active_jobs(days: float | None = None, limit: int | None = None):
+    """JDs of batches created in the last `days` (primary or multi-JD), most recently used first."""
+    days = getattr(settings, "JD_PROFILE_WARMUP_DAYS", 7) if days is None else days
+    since = timezone.now() - timedelta(days=days)
+    recent = Q(batches__created_at__gte=since) | Q(multi_batches__created_at__gte=since)
+    return (
+        JobDescription.objects.filter(recent)
+        .annotate(last_used=Max("batches__created_at"))
+        .order_by("-last_used", "-id")
+        .only("id", "title", "raw_text", "updated_at")[: limit or _cache_size()]
+    )
+
+
+def warm_up() -> None:
+    """
+    Pay a worker process's cold-start costs before its first task: the
+    extraction backends and OpenAI client imports, first-call regex and
+    matcher work in the parser, and the profiles of recently used JDs.
+    """
+    from apps.ranking.services import llm
+    from apps.ranking.tasks import openai_enabled
+    from apps.resumes.services.extraction import preload_backends
+
+    start = time.perf_counter()
+    preload_backends()
+    if openai_enabled():
+        llm.get_client("openai")
+    parse_resume_heuristic(WARMUP_SAMPLE)
+
+    try:
+        for job in active_jobs():
+            jd_profile(job)
+    finally:
+        # Celery's Django fixup drops a child's inherited DB handles after this hook; don't leave it ours
+        connections.close_all()
+    logger.info("Worker warm-up: %d JD profile(s) cached in %.2fs", cached_profiles(), time.perf_counter() - start)
@@ -0,0 +1,242 @@
+"""
+Fair-share scheduling of ranking work.
+
+A batch is split into BatchChunks of RANKING_CHUNK_SIZE resumes. Batches of
+up to RANKING_INTERACTIVE_MAX_RESUMES resumes run on the "interactive" lane,
+larger ones on "bulk"; each lane is its own Celery queue with its own slot
+count (RANKING_LANE_SLOTS), so small uploads never queue behind big ones.
+
+Within a lane the dispatcher hands the next free slot to the user with the
+fewest chunks in flight (oldest waiting chunk breaks ties), so one user's
+1,000-resume batch is interleaved with everyone else's work instead of
+holding every worker until it is done.
+
+With OpenAI on, finalize_batch plans a second round of "enrich" chunks once
+scoring is done (plan_enrichment); they go through the same lanes and slots,
+so OpenAI calls for a big batch never run on the interactive queue.
+
+The Celery side (enqueueing claimed chunks) lives in apps/ranking/tasks.py.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from apps.ranking.models import BatchChunk, RankingBatch
+
+LANES = ("interactive", "bulk")
+IN_FLIGHT = ("queued", "running")
+FINISHED = ("done", "failed")
+# pending chunks looked at per lane and dispatch; plenty to find every waiting user
+PENDING_SCAN_LIMIT = 2000
+
+
+def lane_for(n_resumes: int) -> str:
+    return "interactive" if n_resumes <= int(getattr(settings, "RANKING_INTERACTIVE_MAX_RESUMES", 20)) else "bulk"
+
+
+def _lane_slots(lane: str) -> int:
+    return max(1, int(getattr(settings, "RANKING_LANE_SLOTS", {}).get(lane, 4)))
+
+
+def plan_chunks(batch: RankingBatch) -> int:
+    """
+    Mark the batch running and split its resumes into pending chunks.
+    Re-running a batch puts its existing chunks (other than those in flight)
+    back to pending and drops its enrich chunks, which finalize plans anew.
+    Resumes already parsed at upload time go first. Returns the number of chunks.
+    """
+    with transaction.atomic():
+        RankingBatch.objects.filter(id=batch.id).update(status="running", completed_at=None)
+        batch.status, batch.completed_at = "running", None
+
+        batch.chunks.filter(kind="enrich").exclude(status__in=IN_FLIGHT).delete()
+        existing = batch.chunks.filter(kind="rank").count()
+        if existing:
+            batch.chunks.filter(kind="rank").exclude(status__in=IN_FLIGHT).update(
+                status="pending", created_at=timezone.now(), dispatched_at=None, started_at=None, finished_at=None,
+            )
+            return existing
+
+        rows = batch.resumes.order_by("id").values_list("id", "status")
+        ids = [rid for rid, status in sorted(rows, key=lambda r: r[1] != "parsed")]
+        size = max(1, int(getattr(settings, "RANKING_CHUNK_SIZE", 25)))
+        lane = lane_for(len(ids))
+        BatchChunk.objects.bulk_create([
+            BatchChunk(batch=batch, created_by_id=batch.created_by_id, lane=lane, index=n, resume_ids=ids[i:i + size])
+            for n, i in enumerate(range(0, len(ids), size))
+        ])
+        return (len(ids) + size - 1) // size
+
+
+def plan_enrichment(batch: RankingBatch, groups: list[list[int]]) -> int:
+    """
+    Pending enrich chunks of about RANKING_CHUNK_SIZE resumes on the batch's
+    lane. `groups` are resume ids, near-duplicates together and best scores
+    first; a group is never split, so it is still enriched only once.
+    Returns the number of chunks.
+    """
+    lane = batch.chunks.filter(kind="rank").values_list("lane", flat=True).first()
+    if lane is None or not groups:
+        return 0
+    size = max(1, int(getattr(settings, "RANKING_CHUNK_SIZE", 25)))
+    slices, current = [], []
+    for group in groups:
+        if current and len(current) + len(group) > size:
+            slices.append(current)
+            current = []
+        current.extend(group)
+    slices.append(current)
+
+    start = (batch.chunks.filter(kind="enrich").aggregate(n=Max("index"))["n"] or -1) + 1
+    BatchChunk.objects.bulk_create([
+        BatchChunk(batch=batch, created_by_id=batch.created_by_id, kind="enrich", lane=lane, index=start + n,
+                   resume_ids=ids)
+        for n, ids in enumerate(slices)
+    ])
+    return len(slices)
+
+
+def _requeue_stale(now) -> None:
+    """
+    Chunks a dead worker never finished go back to pending: queued ones no
+    worker picked up within RANKING_CHUNK_STALE_SECONDS, and running ones
+    started more than RANKING_CHUNK_RUNNING_STALE_SECONDS ago (a slow chunk
+    is still running well past the queue limit; requeueing it would score it
+    twice). A run whose chunk was requeued can no longer finish it (finish_chunk).
+    """
+    queued = now - timedelta(seconds=int(getattr(settings, "RANKING_CHUNK_STALE_SECONDS", 900)))
+    running = now - timedelta(seconds=int(getattr(settings, "RANKING_CHUNK_RUNNING_STALE_SECONDS", 3 * 3600)))
+    BatchChunk.objects.filter(
+        Q(status="queued", dispatched_at__lt=queued) | Q(status="running", started_at__lt=running),
+    ).update(status="pending", dispatched_at=None, started_at=None)
+
+
+def _pick_fair(pending: list[dict], in_flight: dict[int, int], slots: int) -> list[int]:
+    """
+    pending: chunk rows (id, created_by_id) oldest first. Repeatedly give a
+    slot to the user with the fewest chunks in flight, taking that user's
+    oldest pending chunk.
+    """
+    queues: dict[int, list[int]] = {}
+    for row in pending:
+        queues.setdefault(row["created_by_id"], []).append(row["id"])
+
+    load = {user_id: in_flight.get(user_id, 0) for user_id in queues}
+    picked = []
+    while len(picked) < slots and queues:
+        # dict order is the order of each user's oldest pending chunk
+        user_id = min(queues, key=lambda u: load[u])
+        picked.append(queues[user_id].pop(0))
+        load[user_id] += 1
+        if not queues[user_id]:
+            del queues[user_id]
+    return picked
+
+
+def claim_chunks() -> list[tuple[int, str, str]]:
+    """
+    Fill free lane slots with pending chunks, fairly across users, and mark
+    them queued. Returns [(chunk_id, lane, kind)] for the caller to enqueue. Safe to
+    run concurrently: a chunk is only returned by the dispatcher whose
+    pending -> queued update hit it.
+    """
+    now = timezone.now()
+    claimed = []
+    with transaction.atomic():
+        _requeue_stale(now)
+        for lane in LANES:
+            busy = (
+                BatchChunk.objects.filter(lane=lane, status__in=IN_FLIGHT)
+                .values("created_by_id").annotate(n=Count("id")).order_by()
+            )
+            in_flight = {row["created_by_id"]: row["n"] for row in busy}
+            slots = _lane_slots(lane) - sum(in_flight.values())
+            if slots <= 0:
+                continue
+
+            pending = list(
+                BatchChunk.objects.filter(lane=lane, status="pending")
+                .order_by("created_at", "id")
+                .values("id", "created_by_id", "kind")[:PENDING_SCAN_LIMIT]
+            )
+            kinds = {row["id"]: row["kind"] for row in pending}
+            for chunk_id in _pick_fair(pending, in_flight, slots):
+                if BatchChunk.objects.filter(id=chunk_id, status="pending").update(status="queued", dispatched_at=now):
+                    claimed.append((chunk_id, lane, kinds[chunk_id]))
+    return claimed
+
+
+def start_chunk(chunk_id: int) -> BatchChunk | None:
+    """queued -> running; None if the chunk was already taken or requeued."""
+    if not BatchChunk.objects.filter(id=chunk_id, status="queued").update(status="running", started_at=timezone.now()):
+        return None
+    return BatchChunk.objects.select_related("batch__job").get(id=chunk_id)
+
+
+def finish_chunk(chunk: BatchChunk, status: str, metrics: dict | None = None) -> bool:
+    """
+    Record the outcome of the run that started `chunk`; True when this was
+    the batch's last unfinished chunk. False without recording anything when
+    the chunk was requeued since (another run owns it now).
+    """
+    owned = BatchChunk.objects.filter(id=chunk.id, status="running", started_at=chunk.started_at).update(
+        status=status, finished_at=timezone.now(), metrics=metrics or {},
+    )
+    return bool(owned) and not has_unfinished_chunks(chunk.batch_id)
+
+
+def has_unfinished_chunks(batch_id: int) -> bool:
+    return BatchChunk.objects.filter(batch_id=batch_id).exclude(status__in=FINISHED).exists()
+
+
+def _percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    values = sorted(values)
+    return values[max(0, math.ceil(p * len(values)) - 1)] if values else 0.0
+
+
+def wait_time_stats(*, user=None, hours: float = 24) -> list[dict]:
+    """
+    Queue wait (chunk created -> worker started) per user and lane over the
+    last `hours`, plus what is waiting right now. Pass `user` for one user.
+    """
+    now = timezone.now()
+    qs = BatchChunk.objects.filter(created_at__gte=now - timedelta(hours=hours)) | BatchChunk.objects.filter(
+        status="pending",
+    )
+    if user is not None:
+        qs = qs.filter(created_by=user)
+
+    groups: dict[tuple, dict] = {}
+    for row in qs.values("created_by_id", "created_by__username", "lane", "status", "created_at", "started_at"):
+        key = (row["created_by_id"], row["lane"])
+        g = groups.setdefault(key, {
+            "user_id": row["created_by_id"],
+            "username": row["created_by__username"],
+            "lane": row["lane"],
+            "waits": [],
+            "waiting": 0,
+            "oldest_waiting_s": 0.0,
+        })
+        if row["started_at"] is not None:
+            g["waits"].append((row["started_at"] - row["created_at"]).total_seconds())
+        elif row["status"] in ("pending", "queued"):
+            g["waiting"] += 1
+            g["oldest_waiting_s"] = max(g["oldest_waiting_s"], (now - row["created_at"]).total_seconds())
+
+    out = []
+    for g in groups.values():
+        waits = g.pop("waits")
+        out.append({
+            **g,
+            "started": len(waits),
+            "avg_wait_s": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "p95_wait_s": round(_percentile(waits, 0.95), 3),
+            "max_wait_s": round(max(waits, default=0.0), 3),
+            "oldest_waiting_s": round(g["oldest_waiting_s"], 3),
+        })
+    return sorted(out, key=lambda r: (r["lane"], -r["oldest_waiting_s"], r["username"]))
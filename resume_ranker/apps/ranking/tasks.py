@@ -1,20 +1,35 @@
 from __future__ import annotations
 
 import json
+import logging
+import threading
+from contextlib import nullcontext
+
 from celery import shared_task
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
 from django.utils import timezone
 
-from openai import OpenAI
-from openai import AuthenticationError, RateLimitError, APIConnectionError
-
-from apps.ranking.models import RankingBatch, RankingResult
-from apps.resumes.services.extraction import extract_text
-from apps.resumes.services.parsing import parse_resume_heuristic
+from apps.dashboard.querybudget import current_stats, merge_query_summaries, query_budget
+from apps.ranking.caching import bump_batch_cache_version
+from apps.ranking.models import BatchChunk, RankingBatch, RankingResult
+from apps.ranking.services import admission, llm, scheduling
+from apps.ranking.services.profiles import jd_profile
+from apps.resumes.models import Resume
+from apps.resumes.services.dedup import duplicate_group_ids
+from apps.resumes.services.memory import MemoryProbe, merge_summaries
+from apps.resumes.services.pipeline import ensure_parsed, is_parsed, mark_failed
+from apps.resumes.services.taxonomy import skill_ids_from_extracted, skill_label
 
+logger = logging.getLogger(__name__)
 
-def _normalize_set(items) -> set[str]:
-    return {str(x).strip().lower() for x in (items or []) if str(x).strip()}
+ENRICH_POLICIES = ("all", "top_k", "on_demand")
+# rough completion size per resume, used only for budgeting before a request is sent
+EST_OUTPUT_TOKENS_PER_RESUME = 450
+RESULT_WRITE_BATCH_SIZE = 500
+# a near-duplicate's enrichment is reused only for the same missing skills and a score this close
+REUSE_SCORE_TOLERANCE = 3
 
 
 def _jaccard(a: set[str], b: set[str]) -> float:
@@ -46,8 +61,60 @@ def _heuristic_suggestions(missing: list[str], job_title: str, categories: list[
     return tips[:10]
 
 
-def _openai_explain_and_suggest(*, job_text: str, resume_text: str, score: int, missing: list[str]) -> dict:
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
+class _TokenBudget:
+    """Per-batch OpenAI token budget. limit <= 0 means unlimited."""
+
+    def __init__(self, limit: int):
+        self.limit = int(limit or 0)
+        self.spent = 0
+
+    def can_afford(self, estimate: int) -> bool:
+        return self.limit <= 0 or self.spent + estimate <= self.limit
+
+    def charge(self, resp) -> None:
+        usage = getattr(resp, "usage", None)
+        self.spent += int(getattr(usage, "total_tokens", 0) or 0)
+
+
+class _ChunkTokenBudget(_TokenBudget):
+    """
+    The batch's budget, shared by its enrich chunks: each chunk stores what it
+    spent (BatchChunk.openai_tokens) and the batch total is re-read before
+    every request, so chunks running side by side overshoot by at most the
+    requests they have in flight.
+    """
+
+    def __init__(self, chunk: BatchChunk, limit: int):
+        super().__init__(limit)
+        self.chunk = chunk
+
+    def can_afford(self, estimate: int) -> bool:
+        if self.limit <= 0:
+            return True
+        spent = BatchChunk.objects.filter(batch_id=self.chunk.batch_id).aggregate(n=Sum("openai_tokens"))["n"] or 0
+        return spent + estimate <= self.limit
+
+    def charge(self, resp) -> None:
+        before = self.spent
+        super().charge(resp)
+        if self.spent > before:
+            BatchChunk.objects.filter(id=self.chunk.id).update(openai_tokens=F("openai_tokens") + self.spent - before)
+
+
+def _estimate_tokens(job_text: str, resume_texts: list[str]) -> int:
+    chars = len(job_text[:8000]) + sum(len((t or "")[:8000]) for t in resume_texts) + 1200
+    return chars // 4 + EST_OUTPUT_TOKENS_PER_RESUME * len(resume_texts)
+
+
+def openai_enabled() -> bool:
+    return bool(getattr(settings, "USE_OPENAI", False)) and bool(getattr(settings, "OPENAI_API_KEY", "")) \
+        and settings.OPENAI_API_KEY != "your-openai-api-key"
+
+
+def _openai_explain_and_suggest(
+    *, job_text: str, resume_text: str, score: int, missing: list[str], budget: _TokenBudget | None = None,
+) -> dict:
+    client = llm.get_client("openai")
     model = getattr(settings, "OPENAI_CHAT_MODEL", "gpt-4.1-mini")
 
     system = (
@@ -55,8 +122,12 @@ def _openai_explain_and_suggest(*, job_text: str, resume_text: str, score: int,
         "Return ONLY valid JSON. No markdown. No extra keys."
     )
 
+    # JD goes first so consecutive requests for the same batch share a cacheable prompt prefix.
     user = f"""
-Given the JOB DESCRIPTION and RESUME TEXT, produce:
+JOB DESCRIPTION:
+<<<{job_text[:8000]}>>>
+
+Given the JOB DESCRIPTION above and the RESUME TEXT below, produce:
 - reasoning: short paragraph explaining the match score
 - strengths: 3-7 bullets (with evidence from resume)
 - candidate_suggestions: 6-10 actionable improvements to better match the JD
@@ -71,9 +142,6 @@ Return JSON:
 match_score: {score}
 missing_skills: {missing}
 
-JOB DESCRIPTION:
-<<<{job_text[:8000]}>>>
-
 RESUME TEXT:
 <<<{resume_text[:8000]}>>>
 """.strip()
@@ -87,6 +155,8 @@ RESUME TEXT:
         temperature=0.2,
         response_format={"type": "json_object"},
     )
+    if budget is not None:
+        budget.charge(resp)
 
     content = resp.choices[0].message.content or "{}"
     data = json.loads(content)
@@ -98,109 +168,588 @@ RESUME TEXT:
     }
 
 
-@shared_task(bind=True)
-def run_batch_ranking(self, batch_id: int):
-    batch = (
-        RankingBatch.objects
-        .select_related("job")
-        .prefetch_related("resumes")
-        .get(id=batch_id)
+def _openai_explain_and_suggest_packed(
+    *, job_text: str, items: list[dict], budget: _TokenBudget | None = None,
+) -> dict[str, dict]:
+    """
+    Enrich several resumes in ONE request that carries the JD only once.
+    items: [{"id": "...", "resume_text": "...", "score": int, "missing": [...]}]
+    Returns: {id: {"reasoning", "strengths", "candidate_suggestions", "model_meta"}}
+    Resumes the model did not answer for are simply absent from the result.
+    """
+    client = llm.get_client("openai")
+    model = getattr(settings, "OPENAI_CHAT_MODEL", "gpt-4.1-mini")
+
+    system = (
+        "You are an expert technical recruiter and resume reviewer. "
+        "Return ONLY valid JSON. No markdown. No extra keys."
     )
 
-    batch.status = "running"
-    batch.save(update_fields=["status"])
+    blocks = []
+    for it in items:
+        blocks.append(
+            f"""### RESUME id={it["id"]}
+match_score: {it["score"]}
+missing_skills: {it["missing"]}
+<<<{(it["resume_text"] or "")[:8000]}>>>"""
+        )
+    resumes_txt = "\n\n".join(blocks)
+
+    user = f"""
+JOB DESCRIPTION:
+<<<{job_text[:8000]}>>>
 
-    job = batch.job
-    job_title = job.title or "Job"
-    job_text = job.raw_text or ""
+Below are {len(items)} RESUMES, each starting with "### RESUME id=<id>".
+Evaluate EACH resume independently against the JOB DESCRIPTION above and produce:
+- reasoning: short paragraph explaining the match score
+- strengths: 3-7 bullets (with evidence from that resume)
+- candidate_suggestions: 6-10 actionable improvements to better match the JD
 
-    jd_struct = parse_resume_heuristic(job_text)
-    jd_skills = _normalize_set(jd_struct.get("skills", []))
+Return JSON:
+{{
+  "results": [
+    {{"id": "<id>", "reasoning": "...", "strengths": ["..."], "candidate_suggestions": ["..."]}}
+  ]
+}}
 
-    use_openai = bool(getattr(settings, "USE_OPENAI", False)) and bool(getattr(settings, "OPENAI_API_KEY", "")) \
-        and settings.OPENAI_API_KEY != "your-openai-api-key"
+{resumes_txt}
+""".strip()
+
+    resp = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
+        temperature=0.2,
+        response_format={"type": "json_object"},
+    )
+    if budget is not None:
+        budget.charge(resp)
+
+    content = resp.choices[0].message.content or "{}"
+    data = json.loads(content)
+
+    wanted = {str(it["id"]) for it in items}
+    out: dict[str, dict] = {}
+    for row in data.get("results", []) or []:
+        if not isinstance(row, dict):
+            continue
+        rid = str(row.get("id", "")).strip()
+        if rid not in wanted or rid in out:
+            continue
+        out[rid] = {
+            "reasoning": row.get("reasoning", "") or "",
+            "strengths": row.get("strengths", []) or [],
+            "candidate_suggestions": row.get("candidate_suggestions", []) or [],
+            "model_meta": {"model": model, "packed": len(items)},
+        }
+    return out
+
+
+def _openai_error_meta(e: Exception) -> str:
+    return llm.describe_error(e)
+
+
+def _apply_ai(row: dict, ai: dict) -> None:
+    if ai.get("reasoning"):
+        row["reasoning"] = ai["reasoning"]
+    row["strengths"] = ai.get("strengths", []) or row["strengths"]
+    row["suggestions"] = ai.get("candidate_suggestions", []) or row["suggestions"]
+    row["model_meta"].update(ai.get("model_meta", {}))
+    row["model_meta"]["enrichment"] = "done"
+
+
+def _mark_failed(row: dict, e: Exception) -> None:
+    row["model_meta"]["openai_error"] = _openai_error_meta(e)
+    row["model_meta"]["enrichment"] = "failed"
+
+
+def _enrich_one(job_text: str, row: dict, budget: _TokenBudget | None = None) -> None:
+    try:
+        ai = _openai_explain_and_suggest(
+            job_text=job_text,
+            resume_text=row["resume"].extracted_text,
+            score=row["score"],
+            missing=row["missing"],
+            budget=budget,
+        )
+        _apply_ai(row, ai)
+    except Exception as e:
+        _mark_failed(row, e)
+
+
+def _enrich_with_openai(job_text: str, rows: list[dict], budget: _TokenBudget | None = None) -> None:
+    """
+    Fill reasoning/strengths/suggestions for scored rows, packing
+    OPENAI_PACK_SIZE resumes per request (1 = one request per resume).
+    Rows are processed in the given order; once the token budget can't cover
+    the next request the remaining rows stay "pending" (enriched on demand).
+    """
+    pack_size = max(1, int(getattr(settings, "OPENAI_PACK_SIZE", 1) or 1))
+
+    for i in range(0, len(rows), pack_size):
+        pack = rows[i:i + pack_size]
+
+        if budget is not None and not budget.can_afford(
+            _estimate_tokens(job_text, [row["resume"].extracted_text for row in pack])
+        ):
+            for row in rows[i:]:
+                row["model_meta"]["openai_skipped"] = "token_budget"
+            break
+
+        if len(pack) == 1:
+            _enrich_one(job_text, pack[0], budget)
+            continue
 
-    for resume in batch.resumes.all():
         try:
-            if not resume.extracted_text:
-                resume.status = "extracting"
-                resume.save(update_fields=["status"])
-                resume.extracted_text = extract_text(resume)
-                resume.save(update_fields=["extracted_text"])
-
-            needs_parse = (
-                not resume.extracted
-                or "skills" not in resume.extracted
-                or "project_categories" not in resume.extracted
-                or "total_years_experience" not in resume.extracted
+            answers = _openai_explain_and_suggest_packed(
+                job_text=job_text,
+                items=[
+                    {
+                        "id": str(row["resume"].id),
+                        "resume_text": row["resume"].extracted_text,
+                        "score": row["score"],
+                        "missing": row["missing"],
+                    }
+                    for row in pack
+                ],
+                budget=budget,
             )
-            if needs_parse:
-                resume.extracted = parse_resume_heuristic(resume.extracted_text)
-                resume.status = "parsed"
-                resume.save(update_fields=["extracted", "status"])
-
-            res_skills = _normalize_set(resume.extracted.get("skills", []))
-            matched = sorted(jd_skills & res_skills)
-            missing = sorted(jd_skills - res_skills)
-
-            overlap = _jaccard(jd_skills, res_skills)
-            score = int(round(overlap * 100))
-
-            categories = resume.extracted.get("project_categories", []) or []
-            exp_years = resume.extracted.get("total_years_experience", None)
-
-            reasoning = "Score computed using skill overlap between job description keywords and extracted resume skills."
-            strengths = []
-            suggestions = _heuristic_suggestions(missing, job_title, categories)
-            model_meta = {"mode": "heuristic_with_optional_openai", "matched_skills": matched[:12]}
-
-            if use_openai:
-                try:
-                    ai = _openai_explain_and_suggest(
-                        job_text=job_text,
-                        resume_text=resume.extracted_text,
-                        score=score,
-                        missing=missing,
-                    )
-                    if ai.get("reasoning"):
-                        reasoning = ai["reasoning"]
-                    strengths = ai.get("strengths", []) or strengths
-                    suggestions = ai.get("candidate_suggestions", []) or suggestions
-                    model_meta.update(ai.get("model_meta", {}))
-                except (AuthenticationError,) as e:
-                    model_meta["openai_error"] = f"auth_error: {str(e)}"
-                except (RateLimitError, APIConnectionError) as e:
-                    model_meta["openai_error"] = f"temporary_error: {str(e)}"
-                except Exception as e:
-                    model_meta["openai_error"] = f"other_error: {str(e)}"
-
-            if exp_years is not None and strengths:
-                strengths.append(f"Estimated experience: ~{exp_years} years")
-
-            RankingResult.objects.update_or_create(
+        except Exception as e:
+            for row in pack:
+                _mark_failed(row, e)
+            continue
+
+        for row in pack:
+            ai = answers.get(str(row["resume"].id))
+            if ai is None:
+                # model skipped this resume in the pack: fall back to a single request
+                _enrich_one(job_text, row, budget)
+            else:
+                _apply_ai(row, ai)
+
+
+def _rows_to_enrich(rows: list[dict], batch: RankingBatch, job) -> list[dict]:
+    """
+    Pick rows for batch-time enrichment per OPENAI_ENRICH_POLICY, best scores
+    first. top_k is over the whole batch's results for `job`, not just `rows`
+    (one enrich chunk's share).
+    """
+    policy = getattr(settings, "OPENAI_ENRICH_POLICY", "all")
+    if policy not in ENRICH_POLICIES:
+        logger.warning("Unknown OPENAI_ENRICH_POLICY=%r, using 'all'", policy)
+        policy = "all"
+    if policy == "on_demand":
+        return []
+
+    ranked = sorted(rows, key=lambda r: (-r["score"], r["resume"].id))
+    if policy == "top_k":
+        k = max(0, int(getattr(settings, "OPENAI_ENRICH_TOP_K", 10)))
+        top = set(
+            RankingResult.objects.filter(batch=batch, job=job)
+            .order_by("-score", "resume_id").values_list("id", flat=True)[:k]
+        )
+        return [row for row in ranked if row["result"].id in top]
+    return ranked
+
+
+def _final_strengths(row: dict) -> list[str]:
+    if "final_strengths" in row:  # the row's own stored strengths, kept when enrichment is reused
+        return list(row["final_strengths"])
+    strengths = list(row["strengths"])
+    exp_years = row["resume"].extracted.get("total_years_experience", None)
+    if exp_years is not None and strengths:
+        strengths.append(f"Estimated experience: ~{exp_years} years")
+    return strengths
+
+
+def enrich_result(result: RankingResult) -> RankingResult:
+    """
+    On-demand enrichment for a result left "pending" at batch time (policy,
+    top-k cut-off or token budget). Called when the detail page is first
+    opened; the OpenAI output is stored on the RankingResult so it runs once.
+    """
+    meta = dict(result.model_meta or {})
+    if meta.get("enrichment") != "pending" or not openai_enabled():
+        return result
+
+    row = _result_row(result)
+    meta = row["model_meta"]
+    meta.pop("openai_skipped", None)
+    meta["enriched_on_demand"] = True
+    canon = duplicate_group_ids([result.resume_id])
+    donor = _matching_donor(row, _enriched_donors(result.job_id, canon).get(canon.get(result.resume_id), []))
+    if donor is not None:
+        _reuse_enrichment(row, donor.reasoning, donor.candidate_suggestions, donor.id)
+    else:
+        _enrich_one(result.job.raw_text or "", row)
+
+    result.reasoning = row["reasoning"]
+    result.strengths = _final_strengths(row)
+    result.candidate_suggestions = row["suggestions"]
+    result.model_meta = row["model_meta"]
+    result.save(update_fields=["reasoning", "strengths", "candidate_suggestions", "model_meta", "updated_at"])
+    bump_batch_cache_version(result.batch_id)
+    return result
+
+
+def _score_row(resume, res_skills: set[str], jd: dict, use_openai: bool) -> dict:
+    matched = sorted((skill_label(x) for x in jd["skills"] & res_skills), key=str.lower)
+    missing = sorted((skill_label(x) for x in jd["skills"] - res_skills), key=str.lower)
+
+    overlap = _jaccard(jd["skills"], res_skills)
+    score = int(round(overlap * 100))
+
+    categories = resume.extracted.get("project_categories", []) or []
+
+    return {
+        "resume": resume,
+        "job": jd["job"],
+        "score": score,
+        "overlap": overlap,
+        "matched": matched,
+        "missing": missing,
+        "reasoning": "Score computed using skill overlap between job description keywords and extracted resume skills.",
+        "strengths": [],
+        "suggestions": _heuristic_suggestions(missing, jd["title"], categories),
+        "model_meta": {
+            "mode": "heuristic_with_optional_openai",
+            "matched_skills": matched[:12],
+            "enrichment": "pending" if use_openai else "off",
+        },
+    }
+
+
+def _write_results(batch, rows: list[dict]) -> None:
+    """Upsert all results of a batch with a few multi-row INSERT ... ON CONFLICT statements."""
+    RankingResult.objects.bulk_create(
+        [
+            RankingResult(
                 batch=batch,
-                job=job,
-                resume=resume,
-                defaults={
-                    "score": score,
-                    "score_breakdown": {
-                        "skill_overlap": overlap,
-                        "matched_skills_count": len(matched),
-                        "missing_skills_count": len(missing),
-                    },
-                    "reasoning": reasoning,
-                    "missing_required": missing,
-                    "strengths": strengths,
-                    "candidate_suggestions": suggestions,
-                    "model_meta": model_meta,
+                job=row["job"],
+                resume=row["resume"],
+                score=row["score"],
+                score_breakdown={
+                    "skill_overlap": row["overlap"],
+                    "matched_skills_count": len(row["matched"]),
+                    "missing_skills_count": len(row["missing"]),
                 },
+                reasoning=row["reasoning"],
+                missing_required=row["missing"],
+                strengths=_final_strengths(row),
+                candidate_suggestions=row["suggestions"],
+                model_meta=row["model_meta"],
             )
+            for row in rows
+        ],
+        batch_size=RESULT_WRITE_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["batch", "job", "resume"],
+        update_fields=[
+            "score", "score_breakdown", "reasoning", "missing_required", "strengths",
+            "candidate_suggestions", "model_meta", "updated_at",
+        ],
+    )
 
-        except Exception as e:
-            resume.status = "failed"
-            resume.error_message = str(e)
-            resume.save(update_fields=["status", "error_message"])
 
-    batch.status = "completed"
-    batch.completed_at = timezone.now()
-    batch.save(update_fields=["status", "completed_at"])
+def _score_resumes(resumes, profiles: list[dict], use_openai: bool, probe: MemoryProbe | None = None) -> list[dict]:
+    """
+    Score resumes against every JD profile. Resumes not yet processed at
+    upload time (apps/resumes/tasks.py) get a fresh look in case the upload
+    task finished meanwhile, and are only extracted/parsed here if still needed.
+    With a `probe`, RSS is recorded around each resume.
+    """
+    rows = []
+    for resume in resumes:
+        with probe.item(resume.id) if probe else nullcontext():
+            try:
+                if not (resume.extracted_text and is_parsed(resume)):
+                    resume.refresh_from_db(fields=["extracted_text", "extracted", "parser_version", "status"])
+                    ensure_parsed(resume)
+
+                res_skills = skill_ids_from_extracted(resume.extracted)
+                rows.extend(_score_row(resume, res_skills, jd, use_openai) for jd in profiles)
+
+            except Exception as e:
+                mark_failed(resume, e)
+    return rows
+
+
+def _result_row(result: RankingResult) -> dict:
+    """A stored result in the row shape the enrichment helpers work on."""
+    return {
+        "result": result,
+        "resume": result.resume,
+        "score": result.score,
+        "missing": list(result.missing_required or []),
+        "reasoning": result.reasoning,
+        "strengths": [],
+        "suggestions": list(result.candidate_suggestions or []),
+        "model_meta": dict(result.model_meta or {}),
+    }
+
+
+def _same_outcome(row: dict, score: int, missing: list) -> bool:
+    """Whether an enrichment written for (score, missing) also explains `row`."""
+    return row["missing"] == list(missing or []) and abs(row["score"] - score) <= REUSE_SCORE_TOLERANCE
+
+
+def _matching_donor(row: dict, donors: list[RankingResult]) -> RankingResult | None:
+    return next((d for d in donors if _same_outcome(row, d.score, d.missing_required)), None)
+
+
+def _reuse_enrichment(row: dict, reasoning: str, suggestions: list, source_id: int) -> None:
+    """Copy a near-duplicate's OpenAI text; the row keeps its own heuristic strengths."""
+    row["reasoning"] = reasoning
+    row["final_strengths"] = list(row["result"].strengths or [])
+    row["suggestions"] = list(suggestions or [])
+    row["model_meta"]["enrichment"] = "reused"
+    row["model_meta"]["reused_from"] = source_id
+    row["model_meta"].pop("openai_skipped", None)
+
+
+def _enriched_donors(job_id: int, canon: dict[int, int]) -> dict[int, list[RankingResult]]:
+    """Group key -> OpenAI-enriched results for `job_id` among the resumes in `canon`, most recent first."""
+    if not canon:
+        return {}
+    donors: dict[int, list[RankingResult]] = {}
+    results = (
+        RankingResult.objects.with_details()
+        .filter(job_id=job_id, resume_id__in=list(canon), model_meta__enrichment="done")
+        .only("id", "resume_id", "score", "missing_required", "reasoning", "candidate_suggestions")
+        .order_by("-updated_at", "-id")
+    )
+    for result in results:
+        donors.setdefault(canon[result.resume_id], []).append(result)
+    return donors
+
+
+def _enrich_results(batch: RankingBatch, resume_ids: list[int], budget: _TokenBudget) -> None:
+    """
+    Batch-time OpenAI enrichment over the stored results of `resume_ids`
+    (an enrich chunk); policy applies per JD. Near-duplicate resumes
+    (Resume.duplicate_of) are enriched once per heuristic outcome: a result
+    reuses an earlier enriched result of its group for the same JD with the
+    same missing skills and a score within REUSE_SCORE_TOLERANCE, and only
+    one row per group and outcome goes to OpenAI (plan_enrichment keeps a
+    group in one chunk).
+    """
+    pending = list(
+        RankingResult.objects.with_details()
+        .filter(batch=batch, resume_id__in=resume_ids, model_meta__enrichment="pending")
+        .select_related("resume")
+    )
+    canon = duplicate_group_ids({r.resume_id for r in pending})
+    now = timezone.now()
+    for job in batch.job_list():
+        rows = [_result_row(r) for r in pending if r.job_id == job.id]
+        groups: dict[int, list[dict]] = {}
+        for row in sorted(rows, key=lambda r: (-r["score"], r["resume"].id)):
+            groups.setdefault(canon.get(row["resume"].id, row["resume"].id), []).append(row)
+
+        donors = _enriched_donors(job.id, canon)
+        todo, followers = [], []
+        for key, group in groups.items():
+            leads = []
+            for row in group:
+                donor = _matching_donor(row, donors.get(key, []))
+                if donor is not None:
+                    _reuse_enrichment(row, donor.reasoning, donor.candidate_suggestions, donor.id)
+                    continue
+                lead = next((other for other in leads if _same_outcome(row, other["score"], other["missing"])), None)
+                if lead is None:
+                    leads.append(row)
+                else:
+                    followers.append((row, lead))
+            todo += leads
+
+        _enrich_with_openai(job.raw_text or "", _rows_to_enrich(todo, batch, job), budget)
+        for row, lead in followers:
+            if lead["model_meta"].get("enrichment") == "done":
+                _reuse_enrichment(row, lead["reasoning"], lead["suggestions"], lead["result"].id)
+
+        for row in rows:
+            result = row["result"]
+            result.reasoning = row["reasoning"]
+            result.strengths = _final_strengths(row)
+            result.candidate_suggestions = row["suggestions"]
+            result.model_meta = row["model_meta"]
+            result.updated_at = now
+        RankingResult.objects.bulk_update(
+            [row["result"] for row in rows],
+            ["reasoning", "strengths", "candidate_suggestions", "model_meta", "updated_at"],
+            batch_size=RESULT_WRITE_BATCH_SIZE,
+        )
+
+
+@shared_task(bind=True)
+@query_budget
+def run_batch_ranking(self, batch_id: int):
+    """
+    Rank a batch's resumes against its JD, or against every JD of a multi-JD
+    batch. The batch is split into chunks that the fair-share dispatcher
+    interleaves with other users' work (apps/ranking/services/scheduling.py);
+    finalize_batch runs once the last chunk is scored (and again once the
+    last enrich chunk is done).
+    """
+    batch = RankingBatch.objects.get(id=batch_id)
+    if scheduling.plan_chunks(batch):
+        dispatch_chunks.delay()
+    else:
+        finalize_batch.delay(batch.id)
+
+
+_dispatch_state = threading.local()
+
+
+@shared_task(ignore_result=True)
+@query_budget
+def dispatch_chunks():
+    """
+    Enqueue as many pending chunks as the lanes have free slots, each on its
+    lane's queue. Runs after every planned batch and finished chunk.
+    """
+    if getattr(_dispatch_state, "active", False):
+        # eager mode: a chunk finished inside the loop below, which will look again
+        _dispatch_state.again = True
+        return
+    _dispatch_state.active = True
+    try:
+        while True:
+            _dispatch_state.again = False
+            for chunk_id, lane, kind in scheduling.claim_chunks():
+                task = enrich_chunk if kind == "enrich" else rank_chunk
+                task.apply_async(args=[chunk_id], queue=lane)
+            if not _dispatch_state.again:
+                break
+    finally:
+        _dispatch_state.active = False
+
+
+@shared_task(ignore_result=True)
+@query_budget
+def rank_chunk(chunk_id: int):
+    """Score one chunk of a batch (each resume parsed once, then scored per JD) and upsert its results."""
+    chunk = scheduling.start_chunk(chunk_id)
+    if chunk is None:
+        return
+    batch = chunk.batch
+    status = "done"
+    with MemoryProbe() as probe:
+        try:
+            profiles = [jd_profile(job) for job in batch.job_list()]
+            order = {rid: n for n, rid in enumerate(chunk.resume_ids)}
+            resumes = sorted(Resume.objects.filter(id__in=chunk.resume_ids), key=lambda r: order[r.id])
+            _write_results(batch, _score_resumes(resumes, profiles, openai_enabled(), probe))
+        except Exception:
+            logger.exception("Batch %s: chunk %s failed", batch.id, chunk.index)
+            status = "failed"
+
+    last = scheduling.finish_chunk(chunk, status, {"memory": probe.summary(), "queries": current_stats().summary()})
+    bump_batch_cache_version(batch.id)
+    if last:
+        finalize_batch.delay(batch.id)
+    dispatch_chunks.delay()
+
+
+@shared_task(ignore_result=True)
+@query_budget
+def enrich_chunk(chunk_id: int):
+    """OpenAI enrichment of one enrich chunk's pending results, on its batch's lane."""
+    chunk = scheduling.start_chunk(chunk_id)
+    if chunk is None:
+        return
+    batch = chunk.batch
+    budget = _ChunkTokenBudget(chunk, getattr(settings, "OPENAI_BATCH_TOKEN_BUDGET", 0))
+    status = "done"
+    try:
+        _enrich_results(batch, chunk.resume_ids, budget)
+    except Exception:
+        logger.exception("Batch %s: enrich chunk %s failed", batch.id, chunk.index)
+        status = "failed"
+    logger.info("Batch %s: enrich chunk %s spent %s OpenAI tokens (batch budget=%s)",
+                batch.id, chunk.index, budget.spent, budget.limit or "unlimited")
+
+    last = scheduling.finish_chunk(chunk, status, {"queries": current_stats().summary()})
+    bump_batch_cache_version(batch.id)
+    if last:
+        finalize_batch.delay(batch.id)
+    dispatch_chunks.delay()
+
+
+def _enrichment_groups(batch: RankingBatch) -> list[list[int]]:
+    """Resumes with results awaiting enrichment, near-duplicates grouped, best score first."""
+    best: dict[int, int] = {}
+    rows = (
+        RankingResult.objects.filter(batch=batch, model_meta__enrichment="pending")
+        .order_by("-score", "resume_id").values_list("resume_id", "score")
+    )
+    for resume_id, score in rows:
+        best.setdefault(resume_id, score)
+    canon = duplicate_group_ids(set(best))
+    groups: dict[int, list[int]] = {}
+    for resume_id in best:
+        groups.setdefault(canon.get(resume_id, resume_id), []).append(resume_id)
+    return list(groups.values())
+
+
+@shared_task(ignore_result=True)
+@query_budget
+def finalize_batch(batch_id: int):
+    """
+    Bookkeeping once a batch's chunks are finished; runs on the interactive
+    queue, so no OpenAI work here. After scoring: merge the chunk metrics and,
+    with OpenAI on, plan enrich chunks (dispatched like rank chunks, on the
+    batch's lane) and leave the batch "finalizing". Otherwise, or when the
+    last enrich chunk calls it again, mark the batch completed (or failed).
+    """
+    # the running -> finalizing transition and the enrich plan commit together, so a concurrent
+    # finalize from another rank chunk never sees a finalizing batch with nothing left to run
+    with transaction.atomic():
+        scored = RankingBatch.objects.filter(id=batch_id, status="running").update(status="finalizing")
+        if not scored and scheduling.has_unfinished_chunks(batch_id):
+            return  # another chunk's finalize got here first, or enrichment is still running
+        batch = RankingBatch.objects.select_related("job").prefetch_related("jobs").get(id=batch_id)
+        if batch.status != "finalizing":
+            return
+
+        chunks = list(batch.chunks.values("kind", "status", "metrics", "openai_tokens"))
+        rank = [c for c in chunks if c["kind"] == "rank"]
+        batch.metrics = {
+            **batch.metrics,
+            "memory": merge_summaries([c["metrics"].get("memory") for c in rank]),
+            "queries": merge_query_summaries([c["metrics"].get("queries") for c in chunks]),
+            "openai_tokens": sum(c["openai_tokens"] for c in chunks),
+        }
+        enriching = False
+        if rank and all(c["status"] == "failed" for c in rank):
+            status = "failed"
+        elif scored and openai_enabled() and scheduling.plan_enrichment(batch, _enrichment_groups(batch)):
+            batch.save(update_fields=["metrics"])
+            enriching = True
+        else:
+            status = "completed"
+
+        if not enriching and not RankingBatch.objects.filter(id=batch_id, status="finalizing").update(
+            status=status, completed_at=timezone.now(), metrics=batch.metrics,
+        ):
+            return
+
+    bump_batch_cache_version(batch.id)
+    if enriching:
+        dispatch_chunks.delay()
+    else:
+        drain_deferred_batches.delay()
+
+
+@shared_task(ignore_result=True)
+@query_budget
+def drain_deferred_batches():
+    """
+    Start deferred batches (oldest first) while the backlog is below
+    RANKING_BACKLOG_SOFT_LIMIT. Runs after every finished batch and from beat.
+    """
+    while (batch := admission.next_deferred()) is not None:
+        logger.info("Batch %s: starting deferred batch", batch.id)
+        run_batch_ranking.delay(batch.id)
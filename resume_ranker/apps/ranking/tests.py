@@ -0,0 +1,423 @@
+import json
+import re
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from celery import current_app
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.jobs.models import JobDescription
+from apps.ranking import tasks
+from apps.ranking.models import BatchChunk, RankingBatch, RankingResult
+from apps.ranking.services import admission, llm, scheduling
+from apps.ranking.services.admission import Overloaded
+from apps.ranking.services.scheduling import _pick_fair
+from apps.resumes.models import Resume
+from apps.resumes.services.parsing import PARSER_VERSION, parse_resume_heuristic
+
+JD_TEXT = "Python developer: Django, PostgreSQL, Docker, Git, REST APIs"
+TOKENS_PER_CALL = 100
+
+
+def make_user(name: str) -> User:
+    return User.objects.create(username=name)
+
+
+def make_batch(user, status: str = "running", resumes: int = 0) -> RankingBatch:
+    job = JobDescription.objects.create(created_by=user, title="Python Dev", raw_text="Python Django SQL")
+    batch = RankingBatch.objects.create(created_by=user, job=job, status=status)
+    if resumes:
+        batch.resumes.add(*Resume.objects.bulk_create(
+            Resume(uploaded_by=user, file=f"resumes/cv{i}.pdf") for i in range(resumes)
+        ))
+    return batch
+
+
+def make_parsed_resumes(user, texts: list[str]) -> list[Resume]:
+    return Resume.objects.bulk_create(
+        Resume(uploaded_by=user, file=f"resumes/cv{i}.pdf", original_filename=f"cv{i}.pdf", extracted_text=text,
+               extracted=parse_resume_heuristic(text), parser_version=PARSER_VERSION, status="parsed")
+        for i, text in enumerate(texts)
+    )
+
+
+class FakeCompletions:
+    """Stands in for client.chat.completions; answers one resume per request (OPENAI_PACK_SIZE=1)."""
+
+    def __init__(self):
+        self.calls = []
+
+    def create(self, **kwargs):
+        prompt = kwargs["messages"][1]["content"]
+        self.calls.append(prompt)
+        score = re.search(r"match_score: (\d+)", prompt).group(1)
+        content = json.dumps({"reasoning": f"scored {score}", "strengths": ["AI strength"],
+                              "candidate_suggestions": ["AI tip"]})
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(total_tokens=TOKENS_PER_CALL),
+        )
+
+
+class FakeOpenAITestCase(TestCase):
+    def setUp(self):
+        self.completions = FakeCompletions()
+        client = SimpleNamespace(chat=SimpleNamespace(completions=self.completions))
+        llm.register_client("openai", lambda: client)
+        self.addCleanup(llm.register_client, "openai", llm._openai_client)
+
+        override = override_settings(USE_OPENAI=True, OPENAI_API_KEY="test-key", OPENAI_PACK_SIZE=1)
+        override.enable()
+        self.addCleanup(override.disable)
+        for name, value in (("task_always_eager", True), ("task_eager_propagates", True)):
+            self.addCleanup(setattr, current_app.conf, name, getattr(current_app.conf, name))
+            setattr(current_app.conf, name, value)
+
+
+def make_chunks(batch, n: int, lane: str = "bulk", **fields) -> list[BatchChunk]:
+    return [
+        BatchChunk.objects.create(batch=batch, created_by=batch.created_by, lane=lane, index=i, resume_ids=[i],
+                                  **fields)
+        for i in range(n)
+    ]
+
+
+class PickFairTests(SimpleTestCase):
+    def test_least_loaded_user_first(self):
+        pending = [
+            {"id": 1, "created_by_id": 10},
+            {"id": 2, "created_by_id": 10},
+            {"id": 3, "created_by_id": 10},
+            {"id": 4, "created_by_id": 20},
+            {"id": 5, "created_by_id": 30},
+        ]
+        self.assertEqual(_pick_fair(pending, {10: 1}, 3), [4, 5, 1])
+
+    def test_round_robin_in_age_order(self):
+        pending = [
+            {"id": 1, "created_by_id": 10},
+            {"id": 2, "created_by_id": 20},
+            {"id": 3, "created_by_id": 10},
+            {"id": 4, "created_by_id": 20},
+        ]
+        self.assertEqual(_pick_fair(pending, {}, 10), [1, 2, 3, 4])
+
+    def test_big_batch_does_not_take_every_slot(self):
+        pending = [{"id": i, "created_by_id": 10} for i in range(1, 41)] + [{"id": 41, "created_by_id": 20}]
+        picked = _pick_fair(pending, {}, 4)
+        self.assertEqual(picked, [1, 41, 2, 3])
+
+    def test_no_slots(self):
+        self.assertEqual(_pick_fair([{"id": 1, "created_by_id": 10}], {}, 0), [])
+
+
+@override_settings(RANKING_LANE_SLOTS={"interactive": 2, "bulk": 2})
+class ClaimChunksTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob = make_user("alice"), make_user("bob")
+
+    def test_fills_lane_slots_fairly(self):
+        big = make_chunks(make_batch(self.alice), 5)
+        small = make_chunks(make_batch(self.bob), 1)
+        claimed = scheduling.claim_chunks()
+        self.assertEqual(claimed, [(big[0].id, "bulk", "rank"), (small[0].id, "bulk", "rank")])
+        self.assertEqual(scheduling.claim_chunks(), [])  # lane full until a chunk finishes
+
+        chunk = scheduling.start_chunk(big[0].id)
+        self.assertFalse(scheduling.finish_chunk(chunk, "done"))
+        self.assertEqual(scheduling.claim_chunks(), [(big[1].id, "bulk", "rank")])
+
+    def test_lanes_are_independent(self):
+        make_chunks(make_batch(self.alice), 3, lane="bulk")
+        make_chunks(make_batch(self.bob), 3, lane="interactive")
+        lanes = [lane for _, lane, _ in scheduling.claim_chunks()]
+        self.assertEqual(sorted(lanes), ["bulk", "bulk", "interactive", "interactive"])
+
+    def test_last_chunk(self):
+        first, second = make_chunks(make_batch(self.alice), 2)
+        scheduling.claim_chunks()
+        self.assertFalse(scheduling.finish_chunk(scheduling.start_chunk(first.id), "done"))
+        self.assertTrue(scheduling.finish_chunk(scheduling.start_chunk(second.id), "failed"))
+
+
+class StaleChunkTests(TestCase):
+    def setUp(self):
+        self.batch = make_batch(make_user("alice"))
+        self.now = timezone.now()
+
+    def test_requeue(self):
+        queued_at = self.now - timedelta(seconds=1000)
+        queued, running, slow = make_chunks(self.batch, 3)
+        BatchChunk.objects.filter(id=queued.id).update(status="queued", dispatched_at=queued_at)
+        BatchChunk.objects.filter(id=slow.id).update(status="running", dispatched_at=queued_at, started_at=queued_at)
+        BatchChunk.objects.filter(id=running.id).update(
+            status="running", dispatched_at=self.now - timedelta(hours=4), started_at=self.now - timedelta(hours=4),
+        )
+
+        scheduling._requeue_stale(self.now)
+        statuses = dict(BatchChunk.objects.values_list("id", "status"))
+        self.assertEqual(statuses, {queued.id: "pending", running.id: "pending", slow.id: "running"})
+
+    def test_requeued_run_cannot_finish(self):
+        chunk = make_chunks(self.batch, 1, status="queued")[0]
+        first_run = scheduling.start_chunk(chunk.id)
+        # requeued and picked up again by another worker
+        BatchChunk.objects.filter(id=chunk.id).update(started_at=first_run.started_at + timedelta(seconds=1))
+        second_run = BatchChunk.objects.get(id=chunk.id)
+
+        self.assertFalse(scheduling.finish_chunk(first_run, "done"))
+        self.assertEqual(BatchChunk.objects.get(id=chunk.id).status, "running")
+        self.assertTrue(scheduling.finish_chunk(second_run, "done"))
+
+
+@override_settings(RANKING_CHUNK_SIZE=3)
+class PlanEnrichmentTests(TestCase):
+    def test_groups_stay_together(self):
+        batch = make_batch(make_user("alice"))
+        make_chunks(batch, 2, lane="interactive")
+        groups = [[1, 2], [3], [4, 5, 6, 7], [8]]
+        self.assertEqual(scheduling.plan_enrichment(batch, groups), 3)
+        chunks = list(batch.chunks.filter(kind="enrich").order_by("index").values("index", "lane", "resume_ids"))
+        self.assertEqual([c["resume_ids"] for c in chunks], [[1, 2, 3], [4, 5, 6, 7], [8]])
+        self.assertEqual({c["lane"] for c in chunks}, {"interactive"})
+
+    def test_nothing_to_enrich(self):
+        batch = make_batch(make_user("alice"))
+        make_chunks(batch, 1)
+        self.assertEqual(scheduling.plan_enrichment(batch, []), 0)
+
+    def test_rerun_drops_enrich_chunks(self):
+        batch = make_batch(make_user("alice"))
+        make_chunks(batch, 2, status="done")
+        scheduling.plan_enrichment(batch, [[1], [2]])
+        self.assertEqual(scheduling.plan_chunks(batch), 2)
+        self.assertEqual(list(batch.chunks.values_list("kind", "status").distinct()), [("rank", "pending")])
+
+
+@override_settings(RANKING_USER_MAX_IN_FLIGHT=10, RANKING_BACKLOG_SOFT_LIMIT=8, RANKING_BACKLOG_HARD_LIMIT=20)
+class AdmissionTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob = make_user("alice"), make_user("bob")
+
+    def test_counts(self):
+        make_batch(self.alice, "running", resumes=3)
+        make_batch(self.alice, "finalizing", resumes=2)
+        make_batch(self.alice, "deferred", resumes=4)
+        make_batch(self.bob, "completed", resumes=5)
+        self.assertEqual(admission.backlog(), 5)
+        self.assertEqual(admission.deferred(), 4)
+        self.assertEqual(admission.user_load(self.alice), 9)
+        self.assertEqual(admission.user_load(self.bob), 0)
+
+    def test_queued_then_deferred(self):
+        self.assertEqual(admission.admit(self.alice, 5), "queued")
+        make_batch(self.bob, "running", resumes=8)
+        self.assertEqual(admission.admit(self.alice, 5), "deferred")
+
+    def test_user_limit(self):
+        make_batch(self.alice, "deferred", resumes=8)
+        with self.assertRaises(Overloaded) as caught:
+            admission.admit(self.alice, 3)
+        self.assertGreaterEqual(caught.exception.retry_after, admission.MIN_RETRY_AFTER)
+        self.assertEqual(admission.admit(self.bob, 3), "queued")
+
+    def test_hard_limit(self):
+        make_batch(self.alice, "running", resumes=10)
+        make_batch(self.bob, "deferred", resumes=8)
+        with self.assertRaises(Overloaded):
+            admission.admit(make_user("carol"), 3)
+
+    @override_settings(RANKING_BACKLOG_SOFT_LIMIT=0, RANKING_BACKLOG_HARD_LIMIT=0, RANKING_USER_MAX_IN_FLIGHT=0)
+    def test_limits_off(self):
+        make_batch(self.alice, "running", resumes=30)
+        self.assertEqual(admission.admit(self.alice, 100), "queued")
+
+    def test_next_deferred_oldest_first_when_room(self):
+        busy = make_batch(self.bob, "running", resumes=8)
+        first = make_batch(self.alice, "deferred", resumes=2)
+        second = make_batch(self.alice, "deferred", resumes=2)
+        self.assertIsNone(admission.next_deferred())
+
+        RankingBatch.objects.filter(id=busy.id).update(status="completed")
+        self.assertEqual(admission.next_deferred().id, first.id)
+        self.assertEqual(admission.next_deferred().id, second.id)
+        self.assertIsNone(admission.next_deferred())
+        self.assertEqual(set(RankingBatch.objects.filter(id__in=[first.id, second.id]).values_list("status", flat=True)),
+                         {"queued"})
+
+    def test_drain_stops_at_soft_limit(self):
+        deferred = [make_batch(self.alice, "deferred", resumes=3) for _ in range(4)]
+
+        def start(batch_id):  # what run_batch_ranking does first
+            RankingBatch.objects.filter(id=batch_id).update(status="running")
+
+        with mock.patch.object(tasks.run_batch_ranking, "delay", side_effect=start) as run, \
+                self.assertLogs("apps.ranking.tasks", "INFO"):
+            tasks.drain_deferred_batches()
+        self.assertEqual([c.args[0] for c in run.call_args_list], [b.id for b in deferred[:3]])
+        self.assertEqual(RankingBatch.objects.get(id=deferred[3].id).status, "deferred")
+
+
+@override_settings(RANKING_CHUNK_SIZE=2, RANKING_INTERACTIVE_MAX_RESUMES=2, OPENAI_ENRICH_POLICY="all")
+class EnrichChunkTests(FakeOpenAITestCase):
+    def setUp(self):
+        super().setUp()
+        user = make_user("alice")
+        self.batch = make_batch(user, status="queued")
+        self.batch.job.raw_text = JD_TEXT
+        self.batch.job.save()
+        skills = ["Python", "Django", "PostgreSQL", "Docker", "Git"]
+        texts = [f"Skills\n{', '.join(skills[:n + 1])}\nExperience\nEngineer 2019 - 2024" for n in range(5)]
+        self.batch.resumes.add(*make_parsed_resumes(user, texts))
+
+    def run_batch(self):
+        with mock.patch.object(tasks.enrich_chunk, "apply_async", wraps=tasks.enrich_chunk.apply_async) as sent, \
+                self.assertLogs("apps.ranking.tasks", "INFO"):
+            tasks.run_batch_ranking.delay(self.batch.id)
+        self.batch.refresh_from_db()
+        return sent
+
+    def test_enriched_on_the_batch_lane(self):
+        sent = self.run_batch()
+        self.assertEqual(self.batch.status, "completed")
+        self.assertEqual(len(self.completions.calls), 5)
+        self.assertEqual(self.batch.metrics["openai_tokens"], 5 * TOKENS_PER_CALL)
+        self.assertEqual({c.kwargs["queue"] for c in sent.call_args_list}, {"bulk"})
+        chunks = list(self.batch.chunks.values_list("kind", "lane", "status"))
+        self.assertEqual(sorted(chunks), [("enrich", "bulk", "done")] * 3 + [("rank", "bulk", "done")] * 3)
+        self.assertEqual({r.model_meta["enrichment"] for r in RankingResult.objects.with_details()}, {"done"})
+
+    def test_finalize_does_not_enrich(self):
+        with mock.patch.object(tasks, "dispatch_chunks"):  # leave the planned enrich chunks pending
+            tasks.run_batch_ranking(self.batch.id)
+            for chunk_id, _, kind in scheduling.claim_chunks():
+                tasks.rank_chunk(chunk_id)
+            tasks.finalize_batch(self.batch.id)
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.status, "finalizing")
+        self.assertEqual(self.completions.calls, [])
+        self.assertEqual(self.batch.chunks.filter(kind="enrich", status="pending").count(), 3)
+
+    def test_finalizing_only_with_enrich_plan(self):
+        """A batch is never seen finalizing without its enrich chunks, which a second finalize would complete."""
+        with mock.patch.object(tasks, "dispatch_chunks"), mock.patch.object(tasks.finalize_batch, "delay"), \
+                mock.patch.object(scheduling, "plan_enrichment", side_effect=RuntimeError("planning failed")):
+            tasks.run_batch_ranking(self.batch.id)
+            for chunk_id, _, kind in scheduling.claim_chunks():
+                tasks.rank_chunk(chunk_id)
+            with self.assertRaises(RuntimeError):
+                tasks.finalize_batch(self.batch.id)
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.status, "running")
+        self.assertFalse(self.batch.chunks.filter(kind="enrich").exists())
+
+        with mock.patch.object(tasks, "dispatch_chunks"):
+            tasks.finalize_batch(self.batch.id)
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.status, "finalizing")
+        self.assertEqual(self.batch.chunks.filter(kind="enrich").count(), 3)
+
+    @override_settings(OPENAI_ENRICH_POLICY="top_k", OPENAI_ENRICH_TOP_K=2)
+    def test_top_k_across_chunks(self):
+        self.run_batch()
+        enriched = RankingResult.objects.with_details().filter(model_meta__enrichment="done")
+        best = RankingResult.objects.order_by("-score", "resume_id")[:2]
+        self.assertEqual(set(enriched.values_list("id", flat=True)), {r.id for r in best})
+        self.assertEqual(len(self.completions.calls), 2)
+        rest = RankingResult.objects.with_details().exclude(id__in=[r.id for r in best])
+        self.assertEqual([r.model_meta["enrichment"] for r in rest], ["pending"] * 3)
+        self.assertEqual(self.batch.status, "completed")
+
+    @override_settings(OPENAI_ENRICH_POLICY="on_demand")
+    def test_on_demand_from_result_detail(self):
+        self.run_batch()
+        self.assertEqual(self.completions.calls, [])
+        self.assertEqual(self.batch.status, "completed")
+
+        result = RankingResult.objects.order_by("score", "id").first()
+        self.client.force_login(self.batch.created_by)
+        url = reverse("dashboard:result_detail", args=[result.id])
+        self.assertContains(self.client.get(url), f"scored {result.score}")
+        self.assertEqual(len(self.completions.calls), 1)
+        result = RankingResult.objects.with_details().get(id=result.id)
+        self.assertEqual(result.model_meta["enrichment"], "done")
+        self.assertTrue(result.model_meta["enriched_on_demand"])
+
+        self.client.get(url)  # stored: opening it again makes no request
+        self.assertEqual(len(self.completions.calls), 1)
+        others = RankingResult.objects.with_details().exclude(id=result.id)
+        self.assertEqual({r.model_meta["enrichment"] for r in others}, {"pending"})
+
+    def test_token_budget_shared_by_chunks(self):
+        with override_settings(OPENAI_BATCH_TOKEN_BUDGET=1):  # no request fits
+            self.run_batch()
+        self.assertEqual(self.completions.calls, [])
+        self.assertEqual(self.batch.status, "completed")
+        self.assertEqual(RankingResult.objects.with_details().filter(model_meta__enrichment="pending").count(), 5)
+
+
+@override_settings(OPENAI_ENRICH_POLICY="all")
+class DuplicateReuseTests(FakeOpenAITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user("alice")
+        self.canonical = make_parsed_resumes(self.user, ["Skills\nPython, Django"])[0]
+        self.job = make_batch(self.user).job
+
+    def add_results(self, outcomes: list[tuple[int, list[str]]]) -> list[RankingResult]:
+        """One pending result per (score, missing) outcome, each on a near-duplicate of the canonical resume."""
+        batch = RankingBatch.objects.create(created_by=self.user, job=self.job, status="finalizing")
+        results = []
+        for score, missing in outcomes:
+            resume = make_parsed_resumes(self.user, ["Skills\nPython, Django"])[0]
+            Resume.objects.filter(id=resume.id).update(duplicate_of=self.canonical)
+            results.append(RankingResult.objects.create(
+                batch=batch, job=batch.job, resume=resume, score=score, missing_required=missing,
+                strengths=[f"own {score}"], model_meta={"enrichment": "pending"},
+            ))
+        return results
+
+    def enrich(self, outcomes: list[tuple[int, list[str]]]) -> list[RankingResult]:
+        results = self.add_results(outcomes)
+        tasks._enrich_results(results[0].batch, [r.resume_id for r in results], tasks._TokenBudget(0))
+        return [RankingResult.objects.with_details().get(id=r.id) for r in results]
+
+    def test_reused_within_batch_for_same_outcome(self):
+        lead, close, other_score, other_missing = self.enrich([(80, []), (78, []), (60, []), (80, ["Docker"])])
+        self.assertEqual(len(self.completions.calls), 3)
+        self.assertEqual(lead.model_meta["enrichment"], "done")
+        self.assertEqual(close.model_meta, {"enrichment": "reused", "reused_from": lead.id})
+        self.assertEqual(close.reasoning, lead.reasoning)
+        self.assertEqual(close.strengths, ["own 78"])
+        for result in (other_score, other_missing):
+            self.assertEqual(result.model_meta["enrichment"], "done")
+            self.assertEqual(result.reasoning, f"scored {result.score}")
+
+    def test_reused_across_batches_for_same_outcome(self):
+        (donor,) = self.enrich([(80, [])])
+        reused, own = self.enrich([(83, []), (80, ["Docker"])])
+        self.assertEqual(len(self.completions.calls), 2)
+        self.assertEqual(reused.model_meta["reused_from"], donor.id)
+        self.assertEqual(reused.candidate_suggestions, donor.candidate_suggestions)
+        self.assertEqual(own.model_meta["enrichment"], "done")
+
+    def test_on_demand_reuses_donor(self):
+        (donor,) = self.enrich([(80, [])])
+        reused, own = self.add_results([(82, []), (80, ["Docker"])])
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("dashboard:result_detail", args=[reused.id]))
+        self.assertContains(response, donor.reasoning)
+        reused = RankingResult.objects.with_details().get(id=reused.id)
+        self.assertEqual(reused.model_meta,
+                         {"enrichment": "reused", "reused_from": donor.id, "enriched_on_demand": True})
+        self.assertEqual(reused.strengths, ["own 82"])
+        self.assertEqual(len(self.completions.calls), 1)
+
+        self.client.get(reverse("dashboard:result_detail", args=[own.id]))
+        self.assertEqual(len(self.completions.calls), 2)
+        self.assertEqual(RankingResult.objects.with_details().get(id=own.id).model_meta["enrichment"], "done")
@@ -1,8 +1,16 @@
 from django.contrib import admin
+
+from apps.dashboard.admin_utils import ScalableAdminMixin
 from .models import Resume
 
 @admin.register(Resume)
-class ResumeAdmin(admin.ModelAdmin):
-    list_display = ("id", "original_filename", "uploaded_by", "status", "created_at")
-    list_filter = ("status", "created_at")
+class ResumeAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ("id", "original_filename", "uploaded_by", "status", "parser_version", "duplicate_of", "created_at")
+    list_filter = ("status", "parser_version", "created_at")
+    list_select_related = ("uploaded_by", "duplicate_of")
     search_fields = ("original_filename",)
+    raw_id_fields = ("duplicate_of",)
+    changelist_defer = (
+        "extracted_text", "extracted", "minhash",
+        "duplicate_of__extracted_text", "duplicate_of__extracted", "duplicate_of__minhash",
+    )
@@ -0,0 +1,117 @@
+"""
+CompressedTextField: a text attribute stored compressed in a binary column.
+
+Stored format is one header byte followed by the payload:
+    0x00  raw UTF-8 (short texts, not worth compressing)
+    0x01  zlib
+    0x02  zstd (needs the optional `zstandard` package to write or read)
+The empty string is stored as b"" so `filter(field="")` keeps working.
+
+Values read from the database stay compressed until the attribute is first
+accessed on the instance, so listing rows that never touch the text costs
+no decompression.
+"""
+import zlib
+
+from django import forms
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+RAW, ZLIB, ZSTD = b"\x00", b"\x01", b"\x02"
+MIN_COMPRESS_BYTES = 256
+
+
+def _codec() -> str:
+    codec = getattr(settings, "TEXT_COMPRESSION", "zlib")
+    if codec == "zstd" and zstandard is None:
+        return "zlib"
+    return codec
+
+
+def compress_text(text: str) -> bytes:
+    if not text:
+        return b""
+    data = text.encode("utf-8")
+    if len(data) < MIN_COMPRESS_BYTES:
+        return RAW + data
+    level = int(getattr(settings, "TEXT_COMPRESSION_LEVEL", 6))
+    if _codec() == "zstd":
+        return ZSTD + zstandard.ZstdCompressor(level=level).compress(data)
+    return ZLIB + zlib.compress(data, level)
+
+
+def decompress_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    data = bytes(value)  # Postgres hands back memoryview
+    if not data:
+        return ""
+    header, payload = data[:1], data[1:]
+    if header == RAW:
+        return payload.decode("utf-8")
+    if header == ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if header == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Text was stored with zstd; install the 'zstandard' package to read it.")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown compressed text header: {header!r}")
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """Decompresses on first access and keeps the str on the instance."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if not isinstance(value, str):
+            value = decompress_text(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        # defining __set__ makes this a data descriptor, so __get__ runs even
+        # though the raw value lives in instance.__dict__
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.BinaryField):
+    descriptor_class = CompressedTextDescriptor
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("editable", True)
+        super().__init__(*args, **kwargs)
+
+    def _check_str_default_value(self):
+        return []  # the Python-side value is text, so a str default is the right type
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if kwargs.get("editable") is True:
+            del kwargs["editable"]
+        return name, path, args, kwargs
+
+    def get_prep_value(self, value):
+        if isinstance(value, str):
+            return compress_text(value)
+        if isinstance(value, memoryview):
+            return bytes(value)
+        return value
+
+    def to_python(self, value):
+        return decompress_text(value)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{"form_class": forms.CharField, "widget": forms.Textarea, **kwargs})
@@ -0,0 +1,62 @@
+import os
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.resumes.models import Resume
+from apps.resumes.services.extraction import _extract_docx_python_docx, _extract_docx_xml
+
+
+class Command(BaseCommand):
+    help = "Benchmark DOCX extraction: streaming document.xml fast path vs python-docx (throughput + peak memory)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="DOCX files to benchmark.")
+        parser.add_argument("--from-db", type=int, default=0, help="Also use the first N uploaded .docx resumes.")
+        parser.add_argument("--repeat", type=int, default=20, help="Timing loops per file.")
+
+    def handle(self, *args, **options):
+        paths = list(options["paths"])
+        if options["from_db"]:
+            qs = Resume.objects.filter(original_filename__iendswith=".docx").order_by("id")
+            for r in qs[: options["from_db"]]:
+                try:
+                    paths.append(r.file.path)
+                except NotImplementedError:
+                    raise CommandError("Storage backend has no local paths; pass files explicitly.")
+
+        paths = [p for p in paths if os.path.exists(p)]
+        if not paths:
+            raise CommandError("No DOCX files found. Pass paths or use --from-db N.")
+
+        total_bytes = sum(os.path.getsize(p) for p in paths)
+        repeat = options["repeat"]
+        self.stdout.write(f"{len(paths)} file(s), {total_bytes / 1024:.1f} KiB, {repeat} loops")
+
+        for label, fn in [
+            ("python-docx", _extract_docx_python_docx),
+            ("streaming xml", _extract_docx_xml),
+        ]:
+            chars = sum(len(fn(p)) for p in paths)  # warm-up + output size
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for p in paths:
+                    fn(p)
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            peak = 0
+            for p in paths:
+                tracemalloc.reset_peak()
+                fn(p)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+            files_per_s = (repeat * len(paths)) / elapsed
+            mib_per_s = (repeat * total_bytes) / elapsed / (1024 * 1024)
+            self.stdout.write(
+                f"  {label:<14} {files_per_s:8.1f} files/s  {mib_per_s:7.2f} MiB/s  "
+                f"peak {peak / 1024:8.1f} KiB  chars={chars}"
+            )
@@ -0,0 +1,97 @@
+import json
+import re
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.jobs.management.commands.seed_jds import JOB_TEMPLATES
+from apps.resumes.models import Resume
+from apps.resumes.services.parsing import extract_skill_ids
+from apps.resumes.services.taxonomy import ALIAS_TO_ID, tokenize
+
+
+CORPUS_PATH = Path(__file__).resolve().parents[2] / "data" / "skill_regression_corpus.json"
+
+# The keyword list extract_skills() used before the taxonomy, kept here only as
+# the speed baseline ("no slower than the old substring scan").
+LEGACY_KEYWORDS = [
+    "python", "django", "flask", "fastapi", "rest", "api", "graphql",
+    "celery", "redis", "postgresql", "mysql", "sqlite", "mongodb",
+    "docker", "kubernetes", "aws", "gcp", "azure",
+    "javascript", "typescript", "react", "angular", "vue", "html", "css",
+    "bootstrap", "tailwind",
+    "pandas", "numpy", "scikit-learn", "sklearn", "tensorflow", "pytorch",
+    "power bi", "tableau", "excel", "nlp", "computer vision",
+    "pytest", "unittest", "selenium", "postman",
+    "git", "github", "linux",
+]
+
+
+def _normalize(s: str) -> str:
+    return re.sub(r"\s+", " ", (s or "").strip().lower())
+
+
+def _legacy_substring(text: str, keywords: list[str]) -> list[str]:
+    t = _normalize(text)
+    return [kw for kw in keywords if kw in t]
+
+
+def _token_matcher(text: str) -> list[str]:
+    return extract_skill_ids(text, tokenize(text))
+
+
+class Command(BaseCommand):
+    help = "Check skill matching against the regression corpus and benchmark it against substring matching."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200, help="Timing loops over the text set.")
+        parser.add_argument("--from-db", type=int, default=0, help="Also time the first N extracted resumes in the DB.")
+        parser.add_argument("--skip-bench", action="store_true", help="Only run the regression corpus.")
+
+    def handle(self, *args, **options):
+        with open(CORPUS_PATH, encoding="utf-8") as fh:
+            corpus = json.load(fh)
+
+        failures = 0
+        for case in corpus:
+            got = extract_skill_ids(case["text"])
+            missing = [x for x in case.get("expect", []) if x not in got]
+            unwanted = [x for x in case.get("reject", []) if x in got]
+            if missing or unwanted:
+                failures += 1
+                self.stdout.write(self.style.ERROR(
+                    f"FAIL {case['name']}: missing={missing} unwanted={unwanted} got={got}"
+                ))
+        self.stdout.write(f"Regression corpus: {len(corpus) - failures}/{len(corpus)} passed")
+
+        if not options["skip_bench"]:
+            self._bench(corpus, options["repeat"], options["from_db"])
+
+        if failures:
+            raise CommandError(f"{failures} regression case(s) failed.")
+        self.stdout.write(self.style.SUCCESS("Skill matcher OK"))
+
+    def _bench(self, corpus, repeat: int, from_db: int):
+        texts = [c["text"] for c in corpus] + [t["raw_text"] for t in JOB_TEMPLATES]
+        if from_db:
+            qs = Resume.objects.exclude(extracted_text="").order_by("id").only("extracted_text")
+            texts += [r.extracted_text for r in qs[:from_db]]  # via the model so the text is decompressed
+
+        all_aliases = sorted(ALIAS_TO_ID, key=len, reverse=True)
+        contenders = [
+            ("substring (old keyword list)", lambda t: _legacy_substring(t, LEGACY_KEYWORDS)),
+            ("substring (all taxonomy aliases)", lambda t: _legacy_substring(t, all_aliases)),
+            ("token matcher (incl. tokenize)", _token_matcher),
+        ]
+
+        chars = sum(len(t) for t in texts)
+        self.stdout.write(f"Benchmark: {len(texts)} texts, {chars} chars, {repeat} loops")
+        for label, fn in contenders:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for t in texts:
+                    fn(t)
+            elapsed = time.perf_counter() - start
+            per_text_us = elapsed / (repeat * len(texts)) * 1e6
+            self.stdout.write(f"  {label:<34} {elapsed:8.3f}s  {per_text_us:8.1f} us/text")
@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.ranking.models import RankingResult
+from apps.resumes.models import Resume
+
+
+def _table_bytes(table: str) -> int | None:
+    with connection.cursor() as cur:
+        if connection.vendor == "postgresql":
+            cur.execute("SELECT pg_total_relation_size(%s)", [table])
+            return cur.fetchone()[0]
+        if connection.vendor == "sqlite":
+            try:
+                cur.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [table])
+            except Exception:  # SQLite built without dbstat
+                return None
+            return cur.fetchone()[0]
+    return None
+
+
+def _db_bytes() -> int | None:
+    with connection.cursor() as cur:
+        if connection.vendor == "postgresql":
+            cur.execute("SELECT pg_database_size(current_database())")
+            return cur.fetchone()[0]
+        if connection.vendor == "sqlite":
+            cur.execute("PRAGMA page_count")
+            pages = cur.fetchone()[0]
+            cur.execute("PRAGMA freelist_count")
+            pages -= cur.fetchone()[0]
+            cur.execute("PRAGMA page_size")
+            return pages * cur.fetchone()[0]
+    return None
+
+
+def _kib(n) -> str:
+    return "n/a" if n is None else f"{n / 1024:,.1f} KiB"
+
+
+class Command(BaseCommand):
+    help = "Report storage used by resume text / result JSON and time typical row reads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Timing loops per query.")
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+
+        with connection.cursor() as cur:
+            cur.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(extracted_text)), 0) FROM resumes_resume")
+            n_resumes, stored = cur.fetchone()
+        plain = sum(len(r.extracted_text.encode("utf-8")) for r in Resume.objects.only("extracted_text").iterator())
+        n_results = RankingResult.objects.count()
+
+        self.stdout.write(f"database (used pages)      {_kib(_db_bytes())}")
+        self.stdout.write(f"resumes_resume table       {_kib(_table_bytes('resumes_resume'))}  ({n_resumes} rows)")
+        self.stdout.write(f"ranking_rankingresult      {_kib(_table_bytes('ranking_rankingresult'))}  ({n_results} rows)")
+        ratio = f"{stored / plain:.2f}" if plain else "-"
+        self.stdout.write(f"extracted_text stored      {_kib(stored)}  (plain {_kib(plain)}, ratio {ratio})")
+
+        results = RankingResult.objects.select_related("resume").defer("resume__extracted_text")
+        cases = [
+            ("resumes, text read", lambda: [r.extracted_text for r in Resume.objects.all()], n_resumes),
+            ("resumes, text untouched", lambda: [r.extracted for r in Resume.objects.all()], n_resumes),
+            ("results list (default)", lambda: list(results.all()), n_results),
+            ("results with_details()", lambda: list(results.with_details()), n_results),
+        ]
+        self.stdout.write(f"Row reads ({repeat} loops):")
+        for label, fn, rows in cases:
+            fn()  # warm-up
+            start = time.perf_counter()
+            for _ in range(repeat):
+                fn()
+            elapsed = time.perf_counter() - start
+            rate = (rows * repeat) / elapsed if elapsed else 0.0
+            self.stdout.write(f"  {label:<26} {rate:10,.0f} rows/s")
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.resumes.models import Resume
+from apps.resumes.services.dedup import index_resume
+
+
+class Command(BaseCommand):
+    help = "Compute MinHash/LSH signatures for resumes that lack one and link near-duplicates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-index every resume, not only missing ones.")
+
+    def handle(self, *args, **options):
+        qs = Resume.objects.exclude(extracted_text=b"").order_by("id")  # oldest first: they become canonical
+        if not options["all"]:
+            qs = qs.filter(minhash__isnull=True)
+
+        start = time.perf_counter()
+        indexed = linked = 0
+        for resume in qs.only("id", "uploaded_by_id", "extracted_text").iterator(chunk_size=200):
+            index_resume(resume)
+            indexed += 1
+            linked += resume.duplicate_of_id is not None
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"Indexed {indexed} resumes in {elapsed:.1f}s; {linked} linked to an earlier near-duplicate.")
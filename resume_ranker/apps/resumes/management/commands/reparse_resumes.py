@@ -0,0 +1,119 @@
+"""
+Re-parse resumes whose `parser_version` is older than parsing.PARSER_VERSION,
+from the stored `extracted_text` (files are never re-extracted).
+
+The main process pages through stale resumes by id and ships each chunk's
+still-compressed text to a pool of worker processes, which decompress and
+parse it; results are written back with one bulk_update per chunk. Every
+chunk is committed on its own and stamped with the new version, so an
+interrupted run simply continues where it stopped when started again.
+"""
+import multiprocessing
+import os
+import time
+from collections import deque
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from apps.ranking.caching import bump_batch_cache_version
+from apps.ranking.models import RankingResult
+from apps.resumes.fields import decompress_text
+from apps.resumes.models import Resume
+from apps.resumes.services.parsing import PARSER_VERSION, parse_resume_heuristic
+
+
+def _parse_chunk(rows: list[tuple[int, bytes]]) -> list[tuple[int, dict | None, str]]:
+    """(id, extracted, error) per row; runs in a pool worker."""
+    out = []
+    for rid, raw in rows:
+        try:
+            out.append((rid, parse_resume_heuristic(decompress_text(raw)), ""))
+        except Exception as e:
+            out.append((rid, None, str(e)))
+    return out
+
+
+class Command(BaseCommand):
+    help = "Re-parse resumes produced by an older parser version from their stored text, in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parser processes (1 = inline).")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Resumes per worker task and bulk write.")
+        parser.add_argument("--limit", type=int, default=0, help="Stop after this many resumes (0 = all stale).")
+        parser.add_argument("--all", action="store_true", help="Re-parse every resume with text, not only stale ones.")
+
+    def _chunks(self, qs, size: int, limit: int):
+        last_id, seen = 0, 0
+        while not limit or seen < limit:
+            take = min(size, limit - seen) if limit else size
+            rows = [
+                (rid, bytes(raw))
+                for rid, raw in qs.filter(id__gt=last_id).order_by("id").values_list("id", "extracted_text")[:take]
+            ]
+            if not rows:
+                return
+            last_id, seen = rows[-1][0], seen + len(rows)
+            yield rows
+
+    def _write(self, results) -> tuple[int, int, set[int]]:
+        parsed = [Resume(id=rid, extracted=data, parser_version=PARSER_VERSION, status="parsed")
+                  for rid, data, _ in results if data is not None]
+        failed = [Resume(id=rid, status="failed", error_message=f"Re-parse failed: {err}")
+                  for rid, data, err in results if data is None]
+        with transaction.atomic():
+            Resume.objects.bulk_update(parsed, ["extracted", "parser_version", "status"])
+            Resume.objects.bulk_update(failed, ["status", "error_message"])
+        batch_ids = set(
+            RankingResult.objects.filter(resume_id__in=[r.id for r in parsed]).values_list("batch_id", flat=True)
+        )
+        return len(parsed), len(failed), batch_ids
+
+    def handle(self, *args, **options):
+        qs = Resume.objects.exclude(extracted_text=b"")
+        if not options["all"]:
+            qs = qs.filter(parser_version__lt=PARSER_VERSION)
+        total = qs.count()
+        if options["limit"]:
+            total = min(total, options["limit"])
+        self.stdout.write(f"{total} resume(s) to re-parse with parser v{PARSER_VERSION}.")
+        if not total:
+            return
+
+        chunks = self._chunks(qs, max(1, options["chunk_size"]), options["limit"])
+        workers = max(1, options["workers"])
+        pool = None
+        if workers > 1:
+            connections.close_all()  # don't share the parent's DB sockets with forked workers
+            pool = multiprocessing.Pool(workers, initializer=django.setup)
+
+        start = time.perf_counter()
+        done = failed = 0
+        bumped: set[int] = set()
+        pending = deque()
+        try:
+            while True:
+                # keep every worker busy (and the next chunk queued) while finished chunks are written
+                while len(pending) < workers + 1 and (rows := next(chunks, None)):
+                    pending.append(pool.apply_async(_parse_chunk, (rows,)) if pool else _parse_chunk(rows))
+                if not pending:
+                    break
+                head = pending.popleft()
+                ok, bad, batch_ids = self._write(head.get() if pool else head)
+                done, failed = done + ok, failed + bad
+                # cached result tables render resume.extracted
+                for batch_id in batch_ids - bumped:
+                    bump_batch_cache_version(batch_id)
+                bumped |= batch_ids
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"  {done + failed}/{total}  {(done + failed) / elapsed:.0f} resumes/s")
+        finally:
+            if pool:
+                pool.terminate()
+                pool.join()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-parsed {done} resume(s) in {elapsed:.1f}s ({failed} failed, {len(bumped)} batch caches invalidated)."
+        ))
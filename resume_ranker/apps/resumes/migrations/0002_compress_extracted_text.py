@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:05
+
+import apps.resumes.fields
+from django.db import migrations
+
+CHUNK = 500
+
+
+def _copy(apps, src: str, dst: str):
+    Resume = apps.get_model("resumes", "Resume")
+    last_pk = 0
+    while True:
+        chunk = list(Resume.objects.filter(pk__gt=last_pk).order_by("pk").only("pk", src)[:CHUNK])
+        if not chunk:
+            break
+        for r in chunk:
+            setattr(r, dst, getattr(r, src) or "")
+        Resume.objects.bulk_update(chunk, [dst])
+        last_pk = chunk[-1].pk
+
+
+def compress_forward(apps, schema_editor):
+    _copy(apps, "extracted_text", "extracted_text_z")
+
+
+def compress_backward(apps, schema_editor):
+    _copy(apps, "extracted_text_z", "extracted_text")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='extracted_text_z',
+            field=apps.resumes.fields.CompressedTextField(blank=True, default=''),
+        ),
+        migrations.RunPython(compress_forward, compress_backward, elidable=True),
+        migrations.RemoveField(
+            model_name='resume',
+            name='extracted_text',
+        ),
+        migrations.RenameField(
+            model_name='resume',
+            old_name='extracted_text_z',
+            new_name='extracted_text',
+        ),
+    ]
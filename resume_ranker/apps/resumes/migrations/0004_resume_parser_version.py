@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0003_resume_dedup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='parser_version',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
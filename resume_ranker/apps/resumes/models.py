@@ -1,14 +1,19 @@
 from django.db import models
 from django.conf import settings
 
+from .fields import CompressedTextField
+
 class Resume(models.Model):
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="resumes")
 
     file = models.FileField(upload_to="resumes/%Y/%m/%d/")
     original_filename = models.CharField(max_length=255, blank=True)
 
-    extracted_text = models.TextField(blank=True)
+    # zlib/zstd-compressed; decompressed lazily on first access
+    extracted_text = CompressedTextField(blank=True, default="")
     extracted = models.JSONField(default=dict, blank=True)
+    # parsing.PARSER_VERSION that produced `extracted`; 0 = unknown / never parsed
+    parser_version = models.PositiveSmallIntegerField(default=0, db_index=True, editable=False)
 
     status = models.CharField(
         max_length=30,
@@ -22,7 +27,24 @@ class Resume(models.Model):
     )
     error_message = models.TextField(blank=True)
 
+    # near-duplicate detection (apps/resumes/services/dedup.py); NULL = not indexed yet
+    minhash = models.BinaryField(null=True, blank=True, editable=False)
+    duplicate_of = models.ForeignKey(
+        "self", null=True, blank=True, on_delete=models.SET_NULL, related_name="duplicates",
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.original_filename or self.file.name
+
+
+class ResumeBand(models.Model):
+    """One LSH band bucket of a resume's MinHash signature."""
+
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name="lsh_bands")
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=["uploaded_by", "bucket"], name="resume_band_lookup_idx")]
@@ -0,0 +1,162 @@
+"""
+Near-duplicate resumes (the same candidate re-uploaded with small edits).
+
+Each resume gets a MinHash signature of its word 5-gram shingles, computed
+once its text is extracted. The signature is split into LSH bands; each band
+is hashed into a ResumeBand row, so finding candidates is one indexed lookup
+on (uploaded_by, bucket) rather than a scan over every resume. Candidates
+are confirmed by the estimated Jaccard similarity of the full signatures.
+
+A resume whose best match reaches RESUME_DUPLICATE_THRESHOLD gets
+`duplicate_of` set to that match's canonical (earliest) resume; only earlier
+resumes are candidates, and indexing an older resume after its re-uploads
+moves their group onto it. Matching is scoped to one uploader.
+"""
+import hashlib
+import random
+import re
+from array import array
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from apps.resumes.models import Resume, ResumeBand
+
+NUM_PERM = 128
+BANDS = 16  # 8 rows per band: pairs above ~0.7 Jaccard almost always share a bucket
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 5
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+# fixed seed: signatures are stored, so every process must use the same permutations
+_rng = random.Random(0x5EED)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_WORD = re.compile(r"\w+")
+
+
+def _hash32(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def shingles(text: str) -> set[int]:
+    words = _WORD.findall((text or "").lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {_hash32(" ".join(words))} if words else set()
+    return {_hash32(" ".join(words[i:i + SHINGLE_WORDS])) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def signature(text: str) -> bytes:
+    """NUM_PERM uint32 minimums packed little-endian; b"" for text without words."""
+    hashes = shingles(text)
+    if not hashes:
+        return b""
+    sig = array("I", (min(((a * h + b) % _PRIME) & _MASK for h in hashes) for a, b in _PERMS))
+    return sig.tobytes()
+
+
+def _unpack(sig: bytes) -> array:
+    out = array("I")
+    out.frombytes(bytes(sig))
+    return out
+
+
+def similarity(sig_a: bytes, sig_b: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    if not sig_a or not sig_b:
+        return 0.0
+    a, b = _unpack(sig_a), _unpack(sig_b)
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def band_buckets(sig: bytes) -> list[int]:
+    """One signed 64-bit bucket per band (band number is part of the hash)."""
+    if not sig:
+        return []
+    step = ROWS * 4
+    return [
+        int.from_bytes(hashlib.blake2b(bytes([band]) + sig[band * step:(band + 1) * step], digest_size=8).digest(),
+                       "little", signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def _threshold() -> float:
+    return float(getattr(settings, "RESUME_DUPLICATE_THRESHOLD", 0.85))
+
+
+def _candidates(resume: Resume, buckets: list[int]):
+    """(id, duplicate_of_id, minhash) of the uploader's other resumes sharing an LSH bucket with `resume`."""
+    return (
+        Resume.objects
+        .filter(id__in=ResumeBand.objects.filter(uploaded_by_id=resume.uploaded_by_id, bucket__in=buckets)
+                .values("resume_id"))
+        .exclude(id=resume.id)
+        .values_list("id", "duplicate_of_id", "minhash")
+    )
+
+
+def find_duplicate(resume: Resume, sig: bytes, buckets: list[int]) -> tuple[int, float] | None:
+    """(canonical resume id, similarity) of the best earlier match at or above the threshold, else None."""
+    if not buckets:
+        return None
+    best = None
+    for rid, dup_of, other in _candidates(resume, buckets).filter(id__lt=resume.id):
+        sim = similarity(sig, other)
+        if sim >= _threshold() and (best is None or (sim, -rid) > (best[1], -best[2])):
+            # a stale link to a later resume (or to `resume` itself) is not a canonical
+            best = (dup_of if dup_of and dup_of < rid else rid, sim, rid)
+    return best[:2] if best else None
+
+
+def _adopt_later(resume: Resume, root: int, sig: bytes, buckets: list[int]) -> None:
+    """
+    Relink groups of later matching resumes to `root` when `resume` is
+    indexed after them (re-uploads indexed out of order, index_duplicates
+    backfills), so every group keeps its earliest resume as canonical.
+    """
+    later = {
+        dup_of or rid
+        for rid, dup_of, other in _candidates(resume, buckets).filter(id__gt=resume.id)
+        if similarity(sig, other) >= _threshold()
+    }
+    later = {key for key in later if key > root}
+    if later:
+        Resume.objects.filter(Q(id__in=later) | Q(duplicate_of_id__in=later)).exclude(id=root).update(
+            duplicate_of_id=root,
+        )
+
+
+def index_resume(resume: Resume) -> Resume:
+    """Compute the signature, store its LSH bands and link `resume` to its canonical near-duplicate."""
+    sig = signature(resume.extracted_text)
+    buckets = band_buckets(sig)
+    match = find_duplicate(resume, sig, buckets)
+
+    with transaction.atomic():
+        resume.minhash = sig
+        resume.duplicate_of_id = match[0] if match else None  # also clears a stale link
+        resume.save(update_fields=["minhash", "duplicate_of"])
+        ResumeBand.objects.filter(resume=resume).delete()
+        ResumeBand.objects.bulk_create([
+            ResumeBand(resume=resume, uploaded_by_id=resume.uploaded_by_id, bucket=b) for b in buckets
+        ])
+        if buckets:
+            _adopt_later(resume, resume.duplicate_of_id or resume.id, sig, buckets)
+    return resume
+
+
+def duplicate_group_ids(resume_ids) -> dict[int, int]:
+    """
+    resume id -> group key (canonical resume id) for the given resumes and
+    every other resume in their groups.
+    """
+    keys = dict(Resume.objects.filter(id__in=resume_ids).values_list("id", "duplicate_of_id"))
+    canon = {rid: dup_of or rid for rid, dup_of in keys.items()}
+    roots = set(canon.values())
+    for rid, dup_of in Resume.objects.filter(Q(id__in=roots) | Q(duplicate_of_id__in=roots)).values_list(
+        "id", "duplicate_of_id",
+    ):
+        canon[rid] = dup_of or rid
+    return canon
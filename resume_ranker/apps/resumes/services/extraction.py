@@ -1,22 +1,181 @@
-from pypdf import PdfReader
-import docx
+"""
+Text extraction per file type. pypdf and python-docx are imported inside the
+extractors, so they load only in processes that actually extract (Celery
+workers), not in web workers that merely import the ranking tasks.
+"""
+import importlib
+import logging
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
 
-def extract_text_from_pdf(path: str) -> str:
-    reader = PdfReader(path)
+from . import ocr
+from .streams import open_resume_stream
+
+logger = logging.getLogger(__name__)
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+DOCX_HEADER_RE = re.compile(r"^word/header\d*\.xml$")
+# property blocks hold tab-stop definitions etc., never text
+DOCX_SKIP_TAGS = {MC_FALLBACK, W_NS + "pPr", W_NS + "rPr", W_NS + "sectPr", W_NS + "tblPr", W_NS + "trPr", W_NS + "tcPr"}
+
+def extract_text_from_pdf(source) -> str:
+    """`source` is a path or a seekable binary stream."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(source)
     parts = []
-    for page in reader.pages:
-        parts.append(page.extract_text() or "")
+    low_text_pages = {}
+    for i, page in enumerate(reader.pages):
+        txt = page.extract_text() or ""
+        parts.append(txt)
+        if ocr.needs_ocr(txt):
+            low_text_pages[i] = page
+
+    # scanned/image-only pages: optional local OCR (see services/ocr.py)
+    if low_text_pages and ocr.ocr_enabled():
+        for i, txt in ocr.ocr_pages(low_text_pages).items():
+            if len(txt.strip()) > len(parts[i].strip()):
+                parts[i] = txt
+
     return "\n".join(parts).strip()
 
-def extract_text_from_docx(path: str) -> str:
+def _iter_docx_xml_lines(stream):
+    """
+    Stream one WordprocessingML part with iterparse and yield text lines:
+    one per paragraph, one per table row (cells joined by tabs). Text boxes
+    come out as their own lines; mc:Fallback copies are skipped so they are
+    not duplicated, as are property blocks (pPr tab stops etc.). Finished
+    paragraphs/rows are cleared to keep memory flat.
+    """
+    para_bufs: list[list[str]] = []   # one buffer per open w:p (text boxes nest)
+    cells: list[list[str]] = []       # one list per open w:tc
+    rows: list[list[str]] = []        # one list per open w:tr
+    skip_depth = 0
+
+    def emit(line: str):
+        if cells:
+            cells[-1].append(line)
+            return None
+        return line
+
+    for event, el in ET.iterparse(stream, events=("start", "end")):
+        tag = el.tag
+        if event == "start":
+            if tag in DOCX_SKIP_TAGS:
+                skip_depth += 1
+            elif skip_depth:
+                continue
+            elif tag == W_NS + "p":
+                para_bufs.append([])
+            elif tag == W_NS + "tc":
+                cells.append([])
+            elif tag == W_NS + "tr":
+                rows.append([])
+            continue
+
+        if tag in DOCX_SKIP_TAGS:
+            skip_depth -= 1
+            el.clear()
+            continue
+        if skip_depth:
+            continue
+
+        if tag == W_NS + "t":
+            if para_bufs:
+                para_bufs[-1].append(el.text or "")
+        elif tag == W_NS + "tab":
+            if para_bufs:
+                para_bufs[-1].append("\t")
+        elif tag in (W_NS + "br", W_NS + "cr"):
+            if para_bufs:
+                para_bufs[-1].append("\n")
+        elif tag == W_NS + "p":
+            line = emit("".join(para_bufs.pop()))
+            el.clear()
+            if line is not None:
+                yield line
+        elif tag == W_NS + "tc":
+            cell = " ".join(x.strip() for x in cells.pop() if x.strip())
+            if rows:
+                rows[-1].append(cell)
+        elif tag == W_NS + "tr":
+            line = emit("\t".join(c for c in rows.pop() if c))
+            el.clear()
+            if line is not None:
+                yield line
+        elif tag == W_NS + "tbl":
+            el.clear()
+
+
+def _extract_docx_xml(path) -> str:
+    """Fast path: read word/header*.xml + word/document.xml straight from the zip."""
+    lines: list[str] = []
+    with zipfile.ZipFile(path) as zf:
+        names = set(zf.namelist())
+        seen_headers = set()
+        for name in sorted(n for n in names if DOCX_HEADER_RE.match(n)):
+            with zf.open(name) as fh:
+                header = [ln for ln in _iter_docx_xml_lines(fh) if ln.strip()]
+            key = tuple(header)
+            if header and key not in seen_headers:  # first/even/default headers often repeat
+                seen_headers.add(key)
+                lines.extend(header)
+        with zf.open("word/document.xml") as fh:
+            lines.extend(_iter_docx_xml_lines(fh))
+    return "\n".join(lines).strip()
+
+
+def _extract_docx_python_docx(path) -> str:
+    import docx
+
     d = docx.Document(path)
     return "\n".join([p.text for p in d.paragraphs]).strip()
 
+
+def extract_text_from_docx(path) -> str:
+    """
+    Streams the DOCX XML (paragraphs, tables, text boxes, headers).
+    Falls back to python-docx (body paragraphs only) if the package is unusual.
+    """
+    try:
+        return _extract_docx_xml(path)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+        logger.info("DOCX fast path failed (%s); falling back to python-docx", e)
+    if hasattr(path, "seek"):
+        path.seek(0)
+    return _extract_docx_python_docx(path)
+
+
+# file extension -> extractor taking a seekable binary stream
+EXTRACTORS = {
+    ".pdf": extract_text_from_pdf,
+    ".docx": extract_text_from_docx,
+}
+
+
+# what extract_text needs on every call (python-docx is only the DOCX fallback)
+BACKEND_MODULES = ("pypdf",)
+
+
+def preload_backends() -> None:
+    """Import the extraction libraries now (worker warm-up) instead of inside the first task."""
+    for name in BACKEND_MODULES:
+        importlib.import_module(name)
+
+
+def get_extractor(extension: str):
+    try:
+        return EXTRACTORS[extension]
+    except KeyError:
+        raise ValueError("Unsupported file type. Only PDF/DOCX supported.") from None
+
+
 def extract_text(resume) -> str:
-    path = resume.file.path
+    """Reads through the storage backend (local disk or S3), never via `file.path`."""
     name = (resume.original_filename or "").lower()
-    if name.endswith(".pdf"):
-        return extract_text_from_pdf(path)
-    if name.endswith(".docx"):
-        return extract_text_from_docx(path)
-    raise ValueError("Unsupported file type. Only PDF/DOCX supported.")
+    extractor = get_extractor(os.path.splitext(name)[1])
+    with open_resume_stream(resume) as fh:
+        return extractor(fh)
@@ -0,0 +1,129 @@
+"""
+Worker memory instrumentation: RSS around each resume a task handles and,
+with MEMORY_TRACEMALLOC, the allocation sites that grew most over the task.
+
+RSS comes from /proc/self/statm (current resident size; falls back to the
+peak from getrusage elsewhere), so a reading costs one small file read.
+tracemalloc slows Python allocations noticeably; keep it off unless hunting
+a leak.
+"""
+import os
+import resource
+import sys
+import tracemalloc
+from contextlib import contextmanager
+
+from django.conf import settings
+
+TOP_ITEMS = 5
+TOP_SITES = 10
+MIB = 1024 * 1024
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _mib(n: int) -> float:
+    return round(n / MIB, 1)
+
+
+class MemoryProbe:
+    """
+    with MemoryProbe() as probe:
+        for resume in resumes:
+            with probe.item(resume.id):
+                ...
+    summary = probe.summary()
+    """
+
+    def __init__(self, trace: bool | None = None):
+        self.trace = getattr(settings, "MEMORY_TRACEMALLOC", False) if trace is None else trace
+        self.items: list[tuple[object, int]] = []
+        self.rss_start = self.rss_end = self.rss_peak = 0
+        self.sites: list[dict] = []
+        self._started_tracing = False
+        self._snapshot = None
+
+    def __enter__(self):
+        self.rss_start = self.rss_peak = rss_bytes()
+        if self.trace:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            self._snapshot = tracemalloc.take_snapshot()
+        return self
+
+    def __exit__(self, *exc):
+        self.rss_end = rss_bytes()
+        self.rss_peak = max(self.rss_peak, self.rss_end)
+        if self._snapshot is not None:
+            stats = tracemalloc.take_snapshot().compare_to(self._snapshot, "lineno")
+            self.sites = [
+                {
+                    "where": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+                    "size_kib": round(s.size_diff / 1024, 1),
+                    "count": s.count_diff,
+                }
+                for s in stats[:TOP_SITES] if s.size_diff > 0
+            ]
+            self._snapshot = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+    @contextmanager
+    def item(self, key):
+        before = rss_bytes()
+        try:
+            yield
+        finally:
+            after = rss_bytes()
+            self.rss_peak = max(self.rss_peak, after)
+            self.items.append((key, after - before))
+
+    def summary(self) -> dict:
+        top = sorted(self.items, key=lambda kv: kv[1], reverse=True)[:TOP_ITEMS]
+        out = {
+            "pid": os.getpid(),
+            "rss_start_mib": _mib(self.rss_start),
+            "rss_end_mib": _mib(self.rss_end),
+            "rss_peak_mib": _mib(self.rss_peak),
+            "rss_growth_mib": _mib(self.rss_end - self.rss_start),
+            "items": len(self.items),
+            "top_items": [{"id": key, "rss_delta_kib": delta // 1024} for key, delta in top if delta > 0],
+        }
+        if self.trace:
+            out["tracemalloc"] = self.sites
+        return out
+
+
+def merge_summaries(summaries: list[dict]) -> dict:
+    """Combine per-task summaries (e.g. a batch's chunks) into one."""
+    summaries = [s for s in summaries if s]
+    if not summaries:
+        return {}
+    sites: dict[str, dict] = {}
+    for s in summaries:
+        for site in s.get("tracemalloc", []):
+            agg = sites.setdefault(site["where"], {"where": site["where"], "size_kib": 0.0, "count": 0})
+            agg["size_kib"] = round(agg["size_kib"] + site["size_kib"], 1)
+            agg["count"] += site["count"]
+    items = [item for s in summaries for item in s.get("top_items", [])]
+    out = {
+        "tasks": len(summaries),
+        "processes": len({s.get("pid") for s in summaries}),
+        "rss_peak_mib": max(s["rss_peak_mib"] for s in summaries),
+        "rss_growth_mib": round(sum(s["rss_growth_mib"] for s in summaries), 1),
+        "items": sum(s["items"] for s in summaries),
+        "top_items": sorted(items, key=lambda i: i["rss_delta_kib"], reverse=True)[:TOP_ITEMS],
+    }
+    if sites:
+        out["tracemalloc"] = sorted(sites.values(), key=lambda s: s["size_kib"], reverse=True)[:TOP_SITES]
+    return out
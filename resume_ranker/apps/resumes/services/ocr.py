@@ -0,0 +1,130 @@
+"""
+Optional OCR fallback for image-only (scanned) PDF pages.
+
+Only pages whose extracted text is below OCR_MIN_CHARS_PER_PAGE are sent to a
+local Tesseract binary. Each page image runs in its own subprocess, all of a
+page's images share one wall-clock deadline, and on POSIX each process gets a
+CPU-seconds limit (set by a `sh -c ulimit` wrapper rather than preexec_fn,
+which is unsafe in threaded workers); at most OCR_WORKERS pages run at
+once and at most OCR_MAX_PAGES pages per document are OCR'd, so one scanned
+resume cannot starve the rest of the batch. Results are cached by page hash.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "ocr:v1:"
+
+
+def _cfg(name: str, default):
+    return getattr(settings, name, default)
+
+
+def ocr_enabled() -> bool:
+    return bool(_cfg("OCR_ENABLED", False)) and shutil.which(_cfg("OCR_TESSERACT_CMD", "tesseract")) is not None
+
+
+def needs_ocr(page_text: str) -> bool:
+    return len((page_text or "").strip()) < int(_cfg("OCR_MIN_CHARS_PER_PAGE", 40))
+
+
+def page_images(page) -> list[bytes]:
+    """Raw bytes of the images embedded in a pypdf page (scans are usually one full-page image)."""
+    try:
+        return [img.data for img in page.images]
+    except Exception as e:  # undecodable filters, missing Pillow for non-JPEG images, ...
+        logger.info("OCR: could not read page images: %s", e)
+        return []
+
+
+def page_hash(images: list[bytes]) -> str:
+    h = hashlib.sha256()
+    for data in images:
+        h.update(hashlib.sha256(data).digest())
+    return h.hexdigest()
+
+
+def _with_cpu_limit(cmd: list[str]) -> list[str]:
+    """Run `cmd` under `ulimit -t OCR_PAGE_CPU_SECONDS`; exec keeps the timeout's kill aimed at tesseract."""
+    if os.name != "posix":
+        return cmd
+    seconds = str(int(_cfg("OCR_PAGE_CPU_SECONDS", 15)))
+    return ["sh", "-c", 'ulimit -t "$0" && exec "$@"', seconds, *cmd]
+
+
+def _tesseract(image: bytes, timeout: float) -> str:
+    cmd = [
+        _cfg("OCR_TESSERACT_CMD", "tesseract"), "stdin", "stdout",
+        "-l", _cfg("OCR_LANG", "eng"),
+    ]
+    # one thread per tesseract process; parallelism comes from OCR_WORKERS
+    env = {**os.environ, "OMP_THREAD_LIMIT": "1"}
+    proc = subprocess.run(
+        _with_cpu_limit(cmd),
+        input=image,
+        capture_output=True,
+        timeout=timeout,
+        env=env,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode("utf-8", "replace").strip()[:300] or f"exit {proc.returncode}")
+    return proc.stdout.decode("utf-8", "replace").strip()
+
+
+def ocr_page(images: list[bytes]) -> str:
+    if not images:
+        return ""
+
+    key = CACHE_PREFIX + page_hash(images)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    timeout = float(_cfg("OCR_PAGE_TIMEOUT", 20))
+    deadline = time.monotonic() + timeout
+    parts, failed = [], False
+    for image in images:
+        remaining = deadline - time.monotonic()
+        try:
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired("tesseract", timeout)
+            parts.append(_tesseract(image, remaining))
+        except subprocess.TimeoutExpired:
+            failed = True
+            logger.warning("OCR: page timed out after %ss", timeout)
+            break
+        except Exception as e:
+            failed = True
+            logger.warning("OCR: tesseract failed: %s", e)
+    text = "\n".join(p for p in parts if p).strip()
+
+    # don't pin a timeout/crash in the cache; a later run may have more budget
+    if not failed:
+        cache.set(key, text, int(_cfg("OCR_CACHE_TIMEOUT", 60 * 60 * 24 * 7)))
+    return text
+
+
+def ocr_pages(pages: dict[int, object]) -> dict[int, str]:
+    """
+    pages: {page_index: pypdf page} for the low-text pages.
+    Returns {page_index: ocr_text}; only the first OCR_MAX_PAGES pages are processed.
+    """
+    if not pages:
+        return {}
+
+    selected = sorted(pages)[: int(_cfg("OCR_MAX_PAGES", 5))]
+    images = {i: page_images(pages[i]) for i in selected}
+
+    with ThreadPoolExecutor(max_workers=max(1, int(_cfg("OCR_WORKERS", 2)))) as pool:
+        texts = pool.map(ocr_page, [images[i] for i in selected])
+        return dict(zip(selected, texts))
@@ -1,33 +1,28 @@
 import re
 from datetime import date
 
-# ---------- Skill keywords (lightweight heuristic) ----------
-SKILL_KEYWORDS = [
-    # Backend
-    "python", "django", "flask", "fastapi", "rest", "api", "graphql",
-    "celery", "redis", "postgresql", "mysql", "sqlite", "mongodb",
-    "docker", "kubernetes", "aws", "gcp", "azure",
-    # Frontend
-    "javascript", "typescript", "react", "angular", "vue", "html", "css",
-    "bootstrap", "tailwind",
-    # Data/AI
-    "pandas", "numpy", "scikit-learn", "sklearn", "tensorflow", "pytorch",
-    "power bi", "tableau", "excel", "nlp", "computer vision",
-    # Testing / tools
-    "pytest", "unittest", "selenium", "postman",
-    "git", "github", "linux",
-]
+from .taxonomy import (
+    SKILLS, PhraseMatcher, canonical_id, categories_for, expand_with_parents, find_skill_ids, skill_label, tokenize,
+)
+
+# Bump whenever parse_resume_heuristic's output changes (new keys, better
+# heuristics, taxonomy updates). Resumes stamped with an older version are
+# re-parsed from their stored text by `manage.py reparse_resumes`, or lazily
+# by ensure_parsed when a batch needs them.
+PARSER_VERSION = 1
+
+# ---------- Skills ----------
+# Skill names, aliases, parent/child relations and categories live in the
+# canonical taxonomy (apps/resumes/data/skill_taxonomy.json, see taxonomy.py).
+SKILL_KEYWORDS = [s.label for s in SKILLS.values()]
 
+# Extra non-skill signals for project categories (skills bring their own categories).
 CATEGORY_RULES = {
-    "Backend": ["django", "flask", "fastapi", "rest", "api", "postgresql", "mysql", "redis", "celery"],
-    "Frontend": ["react", "angular", "vue", "javascript", "typescript", "html", "css", "bootstrap", "tailwind"],
-    "Cloud/DevOps": ["aws", "gcp", "azure", "docker", "kubernetes", "ci/cd", "jenkins", "github actions", "terraform"],
-    "Data/Analytics": ["power bi", "tableau", "pandas", "numpy", "excel", "analytics", "dashboard", "sql"],
-    "AI/ML": ["machine learning", "deep learning", "tensorflow", "pytorch", "scikit-learn", "nlp", "computer vision"],
-    "Testing/QA": ["selenium", "postman", "pytest", "qa", "test case", "jira"],
-    "Mobile": ["android", "kotlin", "flutter", "dart", "firebase"],
-    "Cybersecurity": ["kali", "siem", "firewall", "pentest", "vulnerability", "ethical hacking"],
+    "Data/Analytics": ["analytics", "dashboard", "dashboards"],
+    "Testing/QA": ["qa", "test case", "test cases"],
+    "Cybersecurity": ["vulnerability", "vulnerabilities", "security monitoring", "incident response"],
 }
+CATEGORY_MATCHER = PhraseMatcher({k: cat for cat, keys in CATEGORY_RULES.items() for k in keys})
 
 MONTHS = {
     "jan": 1, "january": 1,
@@ -49,36 +44,163 @@ def _normalize(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "").strip().lower())
 
 
+def extract_skill_ids(text: str, tokens: list[str] | None = None) -> list[str]:
+    """Canonical skill ids explicitly mentioned in the text (no implied parents)."""
+    return find_skill_ids(tokens if tokens is not None else tokenize(text))
+
+
 def extract_skills(text: str) -> list[str]:
-    t = _normalize(text)
-    found = []
-    for kw in SKILL_KEYWORDS:
-        if _normalize(kw) in t:
-            found.append(kw)
-
-    # de-dup while keeping order
-    uniq, seen = [], set()
-    for s in found:
-        key = _normalize(s)
-        if key not in seen:
-            uniq.append(s.title() if s.islower() else s)
-            seen.add(key)
-    return uniq
-
-
-def extract_project_categories(text: str, skills: list[str]) -> list[str]:
-    signals = _normalize(text) + " " + " ".join(_normalize(s) for s in (skills or []))
-    cats = []
-    for cat, keys in CATEGORY_RULES.items():
-        if any(_normalize(k) in signals for k in keys):
-            cats.append(cat)
-    return sorted(set(cats))
+    return [skill_label(sid) for sid in extract_skill_ids(text)]
+
+
+def extract_project_categories(
+    text: str,
+    skills: list[str],
+    skill_ids: list[str] | None = None,
+    tokens: list[str] | None = None,
+) -> list[str]:
+    if skill_ids is None:
+        skill_ids = expand_with_parents(canonical_id(s) for s in (skills or []) if canonical_id(s))
+    cats = set(categories_for(skill_ids))
+    cats.update(CATEGORY_MATCHER.find(tokens if tokens is not None else tokenize(text)))
+    return sorted(cats)
+
+
+# ---------------- Section segmentation (single pass) ----------------
+
+# One compiled heading pattern for every section we care about. A heading is a
+# line that starts with the section name and is either alone on the line or
+# followed by ":" / "-" and inline content ("Skills: Python, Django").
+SECTION_HEADINGS = {
+    "experience": r"(?:work|professional|relevant|industry|internship)\s+experience|work\s+history|employment(?:\s+history)?|internships?|experience",
+    "education": r"education(?:al\s+qualifications?)?|academic\s+(?:background|qualifications?)|qualifications?",
+    "projects": r"(?:personal\s+|academic\s+|key\s+)?projects?",
+    "certifications": r"certifications?|certificates?|licen[cs]es?(?:\s*(?:&|and)\s*certifications?)?",
+    "skills": r"(?:technical\s+|key\s+|core\s+)?skills?(?:\s*(?:&|and)\s*tools)?|core\s+competencies|tech(?:nical)?\s+stack",
+    "achievements": r"achievements?|awards?|accomplishments?",
+    "summary": r"(?:professional\s+|career\s+)?summary|profile|objective|about\s+me",
+}
+SECTION_HEADING_RE = re.compile(
+    r"^\s*(?:"
+    + "|".join(f"(?P<{key}>{pat})" for key, pat in SECTION_HEADINGS.items())
+    + r")(?:\s+(?:details|history|highlights))?\s*(?:$|(?::|\s[\-–|]\s)\s*(?P<rest>.*)$)",
+    re.I,
+)
 
+BULLET_RE = re.compile(r"^[\-–•*·▪●◦>]+\s*")
+YEAR_RE = re.compile(r"\b(19[5-9]\d|20\d{2})\b")
+DEGREE_RE = re.compile(
+    r"\b(ph\.?\s?d|doctorate|m\.?\s?tech|b\.?\s?tech|m\.\s?e\b\.?|b\.\s?e\b\.?|mca|bca|mba|bba|m\.?\s?sc|b\.?\s?sc|"
+    r"m\.?\s?com|b\.?\s?com|master(?:'?s)?|bachelor(?:'?s)?|diploma|hsc|ssc|high\s+school|12th|10th)\b",
+    re.I,
+)
+LIST_SPLIT_RE = re.compile(r"\s*[,|;•/]\s*")
+
+MAX_SECTION_ITEMS = 20
+
+
+def segment_sections(text: str) -> dict[str, list[str]]:
+    """
+    Split the resume into sections in ONE pass over its lines.
+    Returns {section_key: [non-empty stripped lines]}; lines before the first
+    recognised heading go to "header". Repeated headings append to the same key.
+    """
+    sections: dict[str, list[str]] = {}
+    current = "header"
+
+    for raw_ln in (text or "").splitlines():
+        ln = raw_ln.strip()
+        if not ln:
+            continue
+
+        m = SECTION_HEADING_RE.match(ln)
+        if m:
+            current = next(k for k in SECTION_HEADINGS if m.group(k))
+            sections.setdefault(current, [])
+            rest = (m.group("rest") or "").strip()
+            if rest:
+                sections[current].append(rest)
+            continue
+
+        sections.setdefault(current, []).append(ln)
+
+    return sections
 
-# ---------------- Experience Estimation (FIXED) ----------------
 
-SECTION_START = re.compile(r"^(work\s+experience|experience|employment|professional\s+experience)\b", re.I)
-SECTION_END = re.compile(r"^(education|projects?|skills?|certifications?|achievements?|summary|profile)\b", re.I)
+def _strip_bullet(ln: str) -> str:
+    return BULLET_RE.sub("", ln).strip()
+
+
+def extract_education(lines: list[str]) -> list[dict]:
+    """
+    Accepts: lines of the Education section
+    Returns: [{"text": ..., "degree": "B.Tech" | None, "year": 2022 | None}]
+    """
+    out = []
+    for ln in lines or []:
+        txt = _strip_bullet(ln)
+        if not txt:
+            continue
+        deg = DEGREE_RE.search(txt)
+        years = YEAR_RE.findall(txt)
+        out.append({
+            "text": txt,
+            "degree": deg.group(1) if deg else None,
+            "year": int(years[-1]) if years else None,
+        })
+    return out[:MAX_SECTION_ITEMS]
+
+
+def extract_certifications(lines: list[str]) -> list[str]:
+    out = [_strip_bullet(ln) for ln in (lines or [])]
+    return [x for x in out if x][:MAX_SECTION_ITEMS]
+
+
+def extract_projects(lines: list[str]) -> list[dict]:
+    """
+    [{"title": ..., "details": [...]}]
+    A short, non-bullet line without a closing period starts a new project when
+    the previous project's details have ended (bullet or full sentence);
+    everything else (tech stack line, bullets, sentences) is a detail.
+    """
+    projects: list[dict] = []
+    prev_closed = True
+    for ln in lines or []:
+        is_bullet = bool(BULLET_RE.match(ln))
+        txt = _strip_bullet(ln)
+        if not txt:
+            continue
+        looks_like_title = not is_bullet and len(txt.split()) <= 12 and not txt.endswith(".")
+        if looks_like_title and (not projects or prev_closed):
+            projects.append({"title": txt, "details": []})
+            prev_closed = False
+            continue
+        if not projects:
+            projects.append({"title": txt, "details": []})
+        else:
+            projects[-1]["details"].append(txt)
+        prev_closed = is_bullet or txt.endswith(".")
+    return projects[:MAX_SECTION_ITEMS]
+
+
+def extract_listed_skills(lines: list[str]) -> list[str]:
+    """Skills exactly as the candidate listed them in the Skills section."""
+    out, seen = [], set()
+    for ln in lines or []:
+        txt = _strip_bullet(ln)
+        # "Languages: Python, Java" -> keep only the list part
+        if ":" in txt:
+            txt = txt.split(":", 1)[1]
+        for item in LIST_SPLIT_RE.split(txt):
+            item = item.strip(" .")
+            key = _normalize(item)
+            if item and key not in seen and len(item) <= 60:
+                out.append(item)
+                seen.add(key)
+    return out[:MAX_SECTION_ITEMS * 3]
+
+
+# ---------------- Experience Estimation (FIXED) ----------------
 
 DATE_RANGE_RE = re.compile(
     r"((?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec|"
@@ -92,20 +214,7 @@ DATE_RANGE_RE = re.compile(
 
 
 def _extract_experience_section_lines(text: str) -> list[str]:
-    lines = [ln.strip() for ln in (text or "").splitlines() if ln.strip()]
-    in_exp = False
-    exp_lines = []
-
-    for ln in lines:
-        if SECTION_START.search(ln):
-            in_exp = True
-            continue
-        if in_exp and SECTION_END.search(ln):
-            break
-        if in_exp:
-            exp_lines.append(ln)
-
-    return exp_lines
+    return segment_sections(text).get("experience", [])
 
 
 def _parse_month_year(token: str) -> tuple[int, int] | None:
@@ -130,12 +239,13 @@ def _month_index(y: int, m: int) -> int:
     return y * 12 + (m - 1)
 
 
-def estimate_total_years_experience(text: str) -> float | None:
+def estimate_total_years_experience(text: str, sections: dict[str, list[str]] | None = None) -> float | None:
     """
     Stronger heuristic to avoid wrong experience for freshers:
     1) Accept ONLY "Total Experience: X years" (strict).
     2) Else compute from date ranges ONLY inside Experience/Employment section.
     3) If no experience section and resume says "fresher" => return 0.0
+    Pass `sections` from segment_sections() to avoid re-scanning the text.
     """
     raw = (text or "").strip()
     low = raw.lower()
@@ -152,7 +262,9 @@ def estimate_total_years_experience(text: str) -> float | None:
         return max(float(x) for x in explicit)
 
     # (2) Only look at Experience section for date ranges
-    exp_lines = _extract_experience_section_lines(raw)
+    if sections is None:
+        sections = segment_sections(raw)
+    exp_lines = sections.get("experience", [])
     if not exp_lines:
         return 0.0 if says_fresher else None
 
@@ -192,16 +304,22 @@ def estimate_total_years_experience(text: str) -> float | None:
 
 
 def parse_resume_heuristic(text: str) -> dict:
-    skills = extract_skills(text)
-    years = estimate_total_years_experience(text)
-    categories = extract_project_categories(text, skills)
+    sections = segment_sections(text)
+    tokens = tokenize(text)
+    explicit_ids = extract_skill_ids(text, tokens)
+    skill_ids = expand_with_parents(explicit_ids)
+    skills = [skill_label(sid) for sid in explicit_ids]
+    years = estimate_total_years_experience(text, sections)
+    categories = extract_project_categories(text, skills, skill_ids, tokens)
 
     return {
         "skills": skills,
+        "skill_ids": skill_ids,
         "total_years_experience": years,
         "project_categories": categories,
-        # extend later:
-        "education": [],
-        "certifications": [],
-        "projects": [],
-    }
\ No newline at end of file
+        "experience": sections.get("experience", [])[:MAX_SECTION_ITEMS * 2],
+        "education": extract_education(sections.get("education", [])),
+        "certifications": extract_certifications(sections.get("certifications", [])),
+        "projects": extract_projects(sections.get("projects", [])),
+        "listed_skills": extract_listed_skills(sections.get("skills", [])),
+    }
@@ -0,0 +1,46 @@
+"""
+Extraction + parsing for one resume, shared by the upload-time task
+(apps/resumes/tasks.py) and batch ranking. Idempotent: work already done
+(text extracted, structured fields parsed) is skipped.
+"""
+from apps.resumes.models import Resume
+from .dedup import index_resume
+from .extraction import extract_text
+from .parsing import PARSER_VERSION, parse_resume_heuristic
+
+# keys run_batch_ranking relies on; a resume parsed by an older parser may lack some
+REQUIRED_EXTRACTED_KEYS = ("skills", "project_categories", "total_years_experience")
+
+
+def is_parsed(resume: Resume) -> bool:
+    """Parsed by the current parser (older output is re-parsed from the stored text)."""
+    return (
+        resume.parser_version >= PARSER_VERSION
+        and bool(resume.extracted)
+        and all(k in resume.extracted for k in REQUIRED_EXTRACTED_KEYS)
+    )
+
+
+def ensure_parsed(resume: Resume) -> Resume:
+    """Extract and parse `resume` if needed. Exceptions propagate; callers mark the resume failed."""
+    if not resume.extracted_text:
+        resume.status = "extracting"
+        resume.save(update_fields=["status"])
+        resume.extracted_text = extract_text(resume)
+        resume.save(update_fields=["extracted_text"])
+
+    if resume.minhash is None:
+        index_resume(resume)
+
+    if not is_parsed(resume):
+        resume.extracted = parse_resume_heuristic(resume.extracted_text)
+        resume.parser_version = PARSER_VERSION
+        resume.status = "parsed"
+        resume.save(update_fields=["extracted", "parser_version", "status"])
+    return resume
+
+
+def mark_failed(resume: Resume, error: Exception) -> None:
+    resume.status = "failed"
+    resume.error_message = str(error)
+    resume.save(update_fields=["status", "error_message"])
@@ -0,0 +1,157 @@
+"""
+Read uploaded resumes through the storage API instead of `FieldFile.path`,
+so extraction works the same on local disk and on S3-compatible storage.
+
+`open_resume_stream()` yields a seekable binary stream (pypdf and zipfile
+both seek):
+
+- local / already-seekable files are used as is;
+- with EXTRACTION_RANGE_READS on an S3 storage (django-storages), a
+  `RangeReader` fetches only the byte ranges the parser touches - for a DOCX
+  that is the zip directory plus word/document.xml, not the embedded media;
+- anything else is copied in chunks into a SpooledTemporaryFile that stays in
+  memory up to EXTRACTION_SPOOL_MAX_MEMORY bytes and spills to disk beyond.
+"""
+import io
+import logging
+import shutil
+import tempfile
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK = 64 * 1024
+
+
+def _cfg(name: str, default):
+    return getattr(settings, name, default)
+
+
+class RangeReader(io.RawIOBase):
+    """
+    Seekable, read-only stream over `fetch(start, end_inclusive) -> bytes`.
+    Reads are served from fixed-size blocks; at most `max_blocks` are kept
+    (LRU), so memory stays bounded however large the object is.
+    """
+
+    def __init__(self, fetch, size: int, *, block_size: int = 256 * 1024, max_blocks: int = 16):
+        super().__init__()
+        self._fetch = fetch
+        self._size = size
+        self._block_size = max(4096, block_size)
+        self._max_blocks = max(1, max_blocks)
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._pos = 0
+        self.requests = 0  # range requests issued, for diagnostics
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("negative seek position")
+        self._pos = pos
+        return pos
+
+    def _block(self, index: int) -> bytes:
+        data = self._blocks.get(index)
+        if data is not None:
+            self._blocks.move_to_end(index)
+            return data
+        start = index * self._block_size
+        end = min(start + self._block_size, self._size) - 1
+        data = self._fetch(start, end)
+        self.requests += 1
+        self._blocks[index] = data
+        if len(self._blocks) > self._max_blocks:
+            self._blocks.popitem(last=False)
+        return data
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        want = min(len(view), max(0, self._size - self._pos))
+        done = 0
+        while done < want:
+            index, offset = divmod(self._pos, self._block_size)
+            block = self._block(index)
+            n = min(want - done, len(block) - offset)
+            if n <= 0:  # short read from the backend
+                break
+            view[done:done + n] = block[offset:offset + n]
+            done += n
+            self._pos += n
+        return done
+
+
+def _s3_range_reader(field_file) -> RangeReader | None:
+    """RangeReader for django-storages' S3Storage (also MinIO / other S3 APIs); None for other backends."""
+    storage = field_file.storage
+    if not (hasattr(storage, "bucket_name") and hasattr(storage, "connection")):
+        return None
+    client = storage.connection.meta.client
+    key = storage._normalize_name(field_file.name)
+
+    def fetch(start: int, end: int) -> bytes:
+        resp = client.get_object(Bucket=storage.bucket_name, Key=key, Range=f"bytes={start}-{end}")
+        return resp["Body"].read()
+
+    return RangeReader(
+        fetch,
+        storage.size(field_file.name),
+        block_size=int(_cfg("EXTRACTION_RANGE_BLOCK_SIZE", 256 * 1024)),
+        max_blocks=int(_cfg("EXTRACTION_RANGE_MAX_BLOCKS", 16)),
+    )
+
+
+def _is_seekable(fh) -> bool:
+    try:
+        return bool(fh.seekable())
+    except (AttributeError, ValueError, OSError):
+        return False
+
+
+@contextmanager
+def open_resume_stream(resume):
+    """Context manager yielding a seekable binary stream over `resume.file`."""
+    if _cfg("EXTRACTION_RANGE_READS", False):
+        reader = _s3_range_reader(resume.file)
+        if reader is not None:
+            try:
+                yield reader
+            finally:
+                logger.debug("range reads for %s: %s request(s)", resume.file.name, reader.requests)
+                reader.close()
+            return
+
+    fh = resume.file.storage.open(resume.file.name, "rb")
+    try:
+        raw = getattr(fh, "file", fh)  # unwrap django.core.files.File
+        if _is_seekable(raw):
+            raw.seek(0)
+            yield raw
+            return
+
+        max_memory = int(_cfg("EXTRACTION_SPOOL_MAX_MEMORY", 8 * 1024 * 1024))
+        with tempfile.SpooledTemporaryFile(max_size=max_memory) as spool:
+            shutil.copyfileobj(raw, spool, COPY_CHUNK)
+            spool.seek(0)
+            yield spool
+    finally:
+        fh.close()
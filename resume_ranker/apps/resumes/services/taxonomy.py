@@ -0,0 +1,171 @@
+import json
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+# Canonical skill taxonomy (ids, labels, aliases, parent, categories).
+# Edit the JSON file to add skills/aliases; everything below is compiled once at import.
+TAXONOMY_PATH = Path(__file__).resolve().parent.parent / "data" / "skill_taxonomy.json"
+
+
+class Skill(NamedTuple):
+    id: str
+    label: str
+    parent: str | None
+    categories: tuple[str, ...]
+
+
+def _norm_alias(s: str) -> str:
+    return re.sub(r"\s+", " ", (s or "").strip().lower())
+
+
+def _load(path: Path) -> tuple[dict[str, Skill], dict[str, str]]:
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+
+    skills: dict[str, Skill] = {}
+    alias_to_id: dict[str, str] = {}
+    for item in data.get("skills", []):
+        sid = item["id"]
+        skills[sid] = Skill(
+            id=sid,
+            label=item.get("label") or sid,
+            parent=item.get("parent"),
+            categories=tuple(item.get("categories", []) or []),
+        )
+        for alias in [item.get("label") or sid, *(item.get("aliases", []) or [])]:
+            key = _norm_alias(alias)
+            if key in alias_to_id and alias_to_id[key] != sid:
+                raise ValueError(f"Skill alias '{alias}' is used by both '{alias_to_id[key]}' and '{sid}'")
+            alias_to_id[key] = sid
+
+    for s in skills.values():
+        if s.parent and s.parent not in skills:
+            raise ValueError(f"Skill '{s.id}' has unknown parent '{s.parent}'")
+    return skills, alias_to_id
+
+
+def _ancestors(skills: dict[str, Skill], sid: str) -> tuple[str, ...]:
+    out, seen = [], {sid}
+    parent = skills[sid].parent
+    while parent and parent not in seen:
+        out.append(parent)
+        seen.add(parent)
+        parent = skills[parent].parent
+    return tuple(out)
+
+
+# Tokens are runs of letters/digits, optionally followed by "+"/"#" (c++, c#).
+# Everything else (spaces, "/", "-", ".") is a boundary, so "ci/cd" -> ci cd,
+# "scikit-learn" -> scikit learn and "node.js" -> node js.
+TOKEN_RE = re.compile(r"[a-z0-9]+[+#]*")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens; compute once per text and reuse for every lookup."""
+    return TOKEN_RE.findall((text or "").lower())
+
+
+class PhraseMatcher:
+    """
+    Whole-token phrase lookup: {("power", "bi"): value, ("api",): value, ...}.
+    find() walks the token list once, trying the longest phrase that can start
+    at each position, so "rapid" never matches "api" and "power bi" is one hit.
+    """
+
+    def __init__(self, phrases: dict[str, str]):
+        self._phrases: dict[tuple[str, ...], str] = {}
+        self._max_len: dict[str, int] = {}
+        for phrase, value in phrases.items():
+            key = tuple(tokenize(phrase))
+            if not key:
+                continue
+            if self._phrases.get(key, value) != value:
+                raise ValueError(f"Phrase '{phrase}' is ambiguous: '{self._phrases[key]}' vs '{value}'")
+            self._phrases[key] = value
+            self._max_len[key[0]] = max(self._max_len.get(key[0], 0), len(key))
+
+    def get(self, tokens: list[str]) -> str | None:
+        """Exact lookup of a whole phrase."""
+        return self._phrases.get(tuple(tokens))
+
+    def find(self, tokens: list[str]) -> list[str]:
+        """Values found in `tokens`, in order of first appearance, de-duplicated."""
+        out, seen = [], set()
+        phrases, max_len = self._phrases, self._max_len
+        i, n = 0, len(tokens)
+        while i < n:
+            longest = max_len.get(tokens[i])
+            if not longest:
+                i += 1
+                continue
+            for size in range(min(longest, n - i), 0, -1):
+                value = phrases.get(tuple(tokens[i:i + size]))
+                if value is not None:
+                    if value not in seen:
+                        out.append(value)
+                        seen.add(value)
+                    i += size
+                    break
+            else:
+                i += 1
+        return out
+
+
+SKILLS, ALIAS_TO_ID = _load(TAXONOMY_PATH)
+ANCESTORS = {sid: _ancestors(SKILLS, sid) for sid in SKILLS}
+SKILL_MATCHER = PhraseMatcher(ALIAS_TO_ID)
+
+
+def find_skill_ids(tokens: list[str]) -> list[str]:
+    """
+    Canonical ids of skills mentioned in a tokenized text (see tokenize()),
+    in order of first appearance. One pass, whole tokens only.
+    """
+    return SKILL_MATCHER.find(tokens)
+
+
+def canonical_id(name: str) -> str | None:
+    """'sklearn' / 'Scikit-Learn' -> 'scikit-learn'; None if not in the taxonomy."""
+    return ALIAS_TO_ID.get(_norm_alias(name)) or SKILL_MATCHER.get(tokenize(name))
+
+
+def expand_with_parents(ids) -> list[str]:
+    """Add implied parent skills (GitHub => Git, PostgreSQL => SQL), keeping order."""
+    out, seen = [], set()
+    for sid in ids or []:
+        for x in (sid, *ANCESTORS.get(sid, ())):
+            if x not in seen:
+                out.append(x)
+                seen.add(x)
+    return out
+
+
+def skill_label(sid: str) -> str:
+    s = SKILLS.get(sid)
+    return s.label if s else sid
+
+
+def categories_for(ids) -> set[str]:
+    cats = set()
+    for sid in ids or []:
+        s = SKILLS.get(sid)
+        if s:
+            cats.update(s.categories)
+    return cats
+
+
+def skill_ids_from_extracted(extracted: dict) -> set[str]:
+    """
+    Canonical ids (with parents) for a parsed resume/JD dict. Older parses only
+    stored display names under "skills"; those are mapped through the aliases.
+    """
+    extracted = extracted or {}
+    if "skill_ids" in extracted:
+        return set(extracted.get("skill_ids") or [])
+
+    ids = []
+    for name in extracted.get("skills", []) or []:
+        sid = canonical_id(str(name))
+        ids.append(sid or _norm_alias(str(name)))
+    return set(expand_with_parents(ids))
@@ -0,0 +1,35 @@
+import logging
+
+from celery import shared_task
+
+from apps.dashboard.querybudget import query_budget
+from apps.resumes.models import Resume
+from apps.resumes.services.memory import MemoryProbe
+from apps.resumes.services.pipeline import ensure_parsed, is_parsed, mark_failed
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+@query_budget
+def process_resume(resume_id: int):
+    """
+    Extract + parse a resume as soon as it is uploaded, independent of any
+    batch, so batch ranking usually finds it ready and only has to score.
+    """
+    resume = Resume.objects.filter(id=resume_id).first()
+    if resume is None or (resume.extracted_text and is_parsed(resume)):
+        return
+    with MemoryProbe() as probe:
+        try:
+            ensure_parsed(resume)
+        except Exception as e:
+            # the batch retries extraction for resumes without text
+            logger.warning("Upload-time processing failed for resume %s: %s", resume_id, e)
+            mark_failed(resume, e)
+    mem = probe.summary()
+    logger.info(
+        "Resume %s processed: RSS %.1f -> %.1f MiB (%+.1f)",
+        resume_id, mem["rss_start_mib"], mem["rss_end_mib"], mem["rss_growth_mib"],
+        extra={"memory": mem},
+    )
@@ -0,0 +1,298 @@
+"""
+Extraction through the storage API (services/streams.py): RangeReader on its
+own, the spooling fallback for non-seekable files, range reads against a
+fake S3 storage, and PDF/DOCX extraction from S3 with range reads on and off.
+The S3 tests run against moto and are skipped unless moto, boto3 and
+django-storages (requirements-dev.txt) are installed.
+"""
+import importlib.util
+import io
+import os
+import tempfile
+import zipfile
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.test import SimpleTestCase, override_settings
+
+from apps.resumes.models import Resume
+from apps.resumes.services import streams
+from apps.resumes.services.extraction import extract_text
+from apps.resumes.services.streams import RangeReader
+
+HAS_S3_MOCK = all(importlib.util.find_spec(name) for name in ("moto", "boto3", "storages"))
+BUCKET = "resume-ranker-test"
+LINES = ["Senior Software Engineer", "Python, Django, PostgreSQL, Docker"]
+# incompressible payload stored ahead of word/document.xml, like embedded images
+MEDIA_SIZE = 1024 * 1024
+
+
+def make_pdf(lines: list[str]) -> bytes:
+    """A one-page text PDF (Helvetica, one line per entry)."""
+    text = " ".join(f"({line}) '" for line in lines)
+    content = f"BT /F1 11 Tf 50 780 Td 14 TL {text} ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R"
+        b" /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (n, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.writelines(b"%010d 00000 n \n" % offset for offset in offsets)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_docx(lines: list[str], media_size: int = MEDIA_SIZE) -> bytes:
+    """A minimal DOCX with `media_size` bytes of stored media ahead of the document part."""
+    w = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    paragraphs = "".join(f"<w:p><w:r><w:t>{line}</w:t></w:r></w:p>" for line in lines)
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(
+            "[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType='
+            '"application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>',
+        )
+        zf.writestr("word/media/image1.bin", os.urandom(media_size), compress_type=zipfile.ZIP_STORED)
+        zf.writestr("word/document.xml", f'<w:document xmlns:w="{w}"><w:body>{paragraphs}</w:body></w:document>')
+    return out.getvalue()
+
+
+class RangeReaderTests(SimpleTestCase):
+    def setUp(self):
+        self.data = bytes(range(256)) * 64  # 16 KiB
+        self.fetched = []
+
+    def reader(self, **kwargs) -> RangeReader:
+        def fetch(start, end):
+            self.fetched.append((start, end))
+            return self.data[start:end + 1]
+
+        return RangeReader(fetch, len(self.data), block_size=4096, **kwargs)
+
+    def test_reads_across_blocks(self):
+        reader = self.reader()
+        reader.seek(4000)
+        self.assertEqual(reader.read(200), self.data[4000:4200])
+        self.assertEqual(reader.tell(), 4200)
+        self.assertEqual(self.fetched, [(0, 4095), (4096, 8191)])
+
+    def test_seek_whence(self):
+        reader = self.reader()
+        self.assertEqual(reader.seek(-10, io.SEEK_END), len(self.data) - 10)
+        self.assertEqual(reader.read(), self.data[-10:])
+        self.assertEqual(reader.read(5), b"")
+        reader.seek(100)
+        self.assertEqual(reader.seek(-50, io.SEEK_CUR), 50)
+        self.assertEqual(reader.read(3), self.data[50:53])
+        with self.assertRaises(ValueError):
+            reader.seek(-1)
+
+    def test_block_cache_is_lru(self):
+        reader = self.reader(max_blocks=2)
+        for pos in (0, 10, 4096, 0):  # blocks 0, 0, 1, 0: two fetches
+            reader.seek(pos)
+            reader.read(1)
+        self.assertEqual(reader.requests, 2)
+
+        reader.seek(8192)
+        reader.read(1)  # evicts block 1, the least recently used
+        reader.seek(0)
+        reader.read(1)
+        self.assertEqual(reader.requests, 3)
+        reader.seek(4096)
+        reader.read(1)
+        self.assertEqual(reader.requests, 4)
+
+    def test_full_read(self):
+        reader = self.reader()
+        self.assertEqual(io.BufferedReader(reader).read(), self.data)
+        self.assertEqual(reader.requests, 4)
+
+
+class _Unseekable(io.RawIOBase):
+    """A network-style stream: readable, not seekable."""
+
+    def __init__(self, data: bytes):
+        super().__init__()
+        self._buf = io.BytesIO(data)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def readinto(self, buffer) -> int:
+        return self._buf.readinto(buffer)
+
+
+class UnseekableStorage(FileSystemStorage):
+    def open(self, name, mode="rb"):
+        with super().open(name, mode) as fh:
+            return File(_Unseekable(fh.read()), name=name)
+
+
+class SpoolFallbackTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        storages = {
+            **settings.STORAGES,
+            "default": {"BACKEND": f"{__name__}.UnseekableStorage", "OPTIONS": {"location": tmp.name}},
+        }
+        override = override_settings(STORAGES=storages)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def extract(self, name: str, data: bytes) -> tuple[str, list]:
+        resume = Resume(file=default_storage.save(name, ContentFile(data)), original_filename=name)
+        spools = []
+        real = tempfile.SpooledTemporaryFile
+
+        def spy(*args, **kwargs):
+            spools.append(real(*args, **kwargs))
+            return spools[-1]
+
+        with mock.patch.object(streams.tempfile, "SpooledTemporaryFile", spy):
+            return extract_text(resume), spools
+
+    def test_pdf_in_memory(self):
+        text, spools = self.extract("resume.pdf", make_pdf(LINES))
+        self.assertIn("Senior Software Engineer", text)
+        self.assertEqual(len(spools), 1)
+        self.assertFalse(spools[0]._rolled)
+
+    @override_settings(EXTRACTION_SPOOL_MAX_MEMORY=4096)
+    def test_docx_spills_to_disk(self):
+        text, spools = self.extract("resume.docx", make_docx(LINES, media_size=64 * 1024))
+        self.assertEqual(text.splitlines(), LINES)
+        self.assertEqual(len(spools), 1)
+        self.assertTrue(spools[0]._rolled)
+
+
+class FakeS3Storage(FileSystemStorage):
+    """Local files behind the parts of S3Storage that _s3_range_reader uses; records every ranged GET."""
+
+    bucket_name = BUCKET
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.ranges = []
+        self.connection = SimpleNamespace(meta=SimpleNamespace(client=SimpleNamespace(get_object=self._get_object)))
+
+    def _normalize_name(self, name):
+        return name
+
+    def _get_object(self, Bucket, Key, Range):
+        start, end = map(int, Range.removeprefix("bytes=").split("-"))
+        self.ranges.append((start, end))
+        with super().open(Key, "rb") as fh:
+            fh.seek(start)
+            return {"Body": io.BytesIO(fh.read(end - start + 1))}
+
+    def open(self, name, mode="rb"):
+        raise AssertionError("range reads must not open the whole object")
+
+
+@override_settings(EXTRACTION_RANGE_READS=True, EXTRACTION_RANGE_BLOCK_SIZE=16 * 1024)
+class RangeReadExtractionTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        storages = {
+            **settings.STORAGES,
+            "default": {"BACKEND": f"{__name__}.FakeS3Storage", "OPTIONS": {"location": tmp.name}},
+        }
+        override = override_settings(STORAGES=storages)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def extract(self, name: str, data: bytes) -> str:
+        name = default_storage.save(f"resumes/{name}", ContentFile(data))
+        return extract_text(Resume(file=name, original_filename=name))
+
+    def test_pdf(self):
+        self.assertIn("Python, Django, PostgreSQL, Docker", self.extract("resume.pdf", make_pdf(LINES)))
+        self.assertTrue(default_storage.ranges)
+
+    def test_docx_skips_media(self):
+        self.assertEqual(self.extract("resume.docx", make_docx(LINES)).splitlines(), LINES)
+        fetched = sum(end - start + 1 for start, end in default_storage.ranges)
+        self.assertGreater(fetched, 0)
+        self.assertLess(fetched, MEDIA_SIZE // 4)
+
+
+@skipUnless(HAS_S3_MOCK, "needs moto, boto3 and django-storages")
+@override_settings(EXTRACTION_RANGE_BLOCK_SIZE=16 * 1024)
+class S3ExtractionTests(SimpleTestCase):
+    def setUp(self):
+        import boto3
+        import moto
+
+        mock_aws = getattr(moto, "mock_aws", None) or moto.mock_s3  # moto < 5
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+
+        storages = {
+            **settings.STORAGES,
+            "default": {
+                "BACKEND": "storages.backends.s3.S3Storage",
+                "OPTIONS": {"bucket_name": BUCKET, "region_name": "us-east-1", "file_overwrite": False},
+            },
+        }
+        override = override_settings(STORAGES=storages)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def extract(self, name: str, data: bytes) -> tuple[str, list[RangeReader]]:
+        resume = Resume(file=default_storage.save(f"resumes/{name}", ContentFile(data)), original_filename=name)
+        readers = []
+        real = streams._s3_range_reader
+
+        def spy(field_file):
+            readers.append(real(field_file))
+            return readers[-1]
+
+        with mock.patch.object(streams, "_s3_range_reader", spy):
+            return extract_text(resume), readers
+
+    def test_pdf(self):
+        for range_reads in (False, True):
+            with self.subTest(range_reads=range_reads), override_settings(EXTRACTION_RANGE_READS=range_reads):
+                text, readers = self.extract("resume.pdf", make_pdf(LINES))
+                self.assertIn("Python, Django, PostgreSQL, Docker", text)
+                self.assertEqual(len(readers), int(range_reads))
+
+    def test_docx(self):
+        for range_reads in (False, True):
+            with self.subTest(range_reads=range_reads), override_settings(EXTRACTION_RANGE_READS=range_reads):
+                text, readers = self.extract("resume.docx", make_docx(LINES))
+                self.assertEqual(text.splitlines(), LINES)
+                self.assertEqual(len(readers), int(range_reads))
+
+    @override_settings(EXTRACTION_RANGE_READS=True)
+    def test_docx_range_reads_skip_media(self):
+        text, (reader,) = self.extract("resume.docx", make_docx(LINES))
+        self.assertEqual(text.splitlines(), LINES)
+        # the zip directory and word/document.xml, not the embedded media
+        self.assertLess(reader.requests * 16 * 1024, MEDIA_SIZE // 4)
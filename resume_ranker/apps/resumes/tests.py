@@ -0,0 +1,433 @@
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.resumes.fields import RAW, ZLIB, ZSTD, compress_text, decompress_text, zstandard
+from apps.resumes.management.commands import reparse_resumes
+from apps.resumes.management.commands.bench_skills import CORPUS_PATH
+from apps.resumes.models import Resume, ResumeBand
+from apps.resumes.services.dedup import (
+    BANDS, NUM_PERM, band_buckets, duplicate_group_ids, index_resume, signature, similarity,
+)
+from apps.resumes.services import ocr
+from apps.resumes.services.extraction import extract_text_from_docx
+from apps.resumes.services.parsing import (
+    MAX_SECTION_ITEMS, PARSER_VERSION, extract_certifications, extract_education, extract_listed_skills, extract_projects,
+    extract_skill_ids, segment_sections,
+)
+
+# stands in for tesseract: "sleep" images hang, "fail" images exit 1, others are echoed back
+FAKE_TESSERACT = f"""#!{sys.executable}
+import sys, time
+image = sys.stdin.buffer.read()
+if image == b"sleep":
+    time.sleep(30)
+if image == b"fail":
+    sys.exit("unreadable image")
+print("text of", image.decode())
+"""
+
+SECTIONED_RESUME = """Jane Doe
+jane@example.com
+
+Professional Summary
+Backend engineer.
+Skills: Python, Django | PostgreSQL
+Education
+- B.Tech in Computer Science, XYZ University, 2016 - 2020
+Higher Secondary (12th), 2016
+Projects
+Resume Ranker
+Python, Django, Celery
+- Ranks resumes against job descriptions
+Chat App
+Built a real-time chat with WebSockets.
+Certifications
+• AWS Certified Developer – Associate
+Experience - Engineer at Acme
+Education Details
+M.Sc Data Science 2022
+"""
+
+LONG_TEXT = "Senior Python developer – Django, PostgreSQL, Celery. " * 40
+
+
+W_NS = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+)
+
+
+def docx_bytes(body: str, headers: dict[str, str] | None = None) -> bytes:
+    """A DOCX zip with `body` as word/document.xml's w:body and optional header parts."""
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as zf:
+        zf.writestr("word/document.xml", f"<w:document {W_NS}><w:body>{body}</w:body></w:document>")
+        for name, xml in (headers or {}).items():
+            zf.writestr(f"word/{name}", f"<w:hdr {W_NS}>{xml}</w:hdr>")
+    return out.getvalue()
+
+
+def para(*runs: str) -> str:
+    return "<w:p>" + "".join(f"<w:r><w:t>{run}</w:t></w:r>" for run in runs) + "</w:p>"
+
+
+def resume_text(seed: int, words: int = 400) -> str:
+    rng = random.Random(seed)
+    vocab = [f"word{n}" for n in range(2000)]
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+
+def edited(text: str, changes: int = 3) -> str:
+    """`text` with a few words replaced, like a re-upload with small edits."""
+    words = text.split()
+    for n in range(changes):
+        words[(n + 1) * len(words) // (changes + 1)] = f"edit{n}"
+    return " ".join(words)
+
+
+class SkillRegressionCorpusTests(SimpleTestCase):
+    """data/skill_regression_corpus.json, as `bench_skills --skip-bench` checks it."""
+
+    def test_corpus(self):
+        with open(CORPUS_PATH, encoding="utf-8") as fh:
+            corpus = json.load(fh)
+        self.assertTrue(corpus)
+        for case in corpus:
+            with self.subTest(case["name"]):
+                got = extract_skill_ids(case["text"])
+                self.assertEqual([x for x in case.get("expect", []) if x not in got], [], "missing")
+                self.assertEqual([x for x in case.get("reject", []) if x in got], [], "unwanted")
+
+
+class SectionParsingTests(SimpleTestCase):
+    def setUp(self):
+        self.sections = segment_sections(SECTIONED_RESUME)
+
+    def test_headings(self):
+        self.assertEqual(list(self.sections),
+                         ["header", "summary", "skills", "education", "projects", "certifications", "experience"])
+        self.assertEqual(self.sections["summary"], ["Backend engineer."])
+        # inline content after ":" or " - " stays in the section
+        self.assertEqual(self.sections["skills"], ["Python, Django | PostgreSQL"])
+        self.assertEqual(self.sections["experience"], ["Engineer at Acme"])
+        # a repeated heading appends to the earlier section
+        self.assertEqual(self.sections["education"][-1], "M.Sc Data Science 2022")
+
+    def test_text_before_first_heading(self):
+        self.assertEqual(self.sections["header"], ["Jane Doe", "jane@example.com"])
+        # words that merely start with a heading are not headings
+        self.assertEqual(segment_sections("Experienced engineer\nSkill-ful\n"),
+                         {"header": ["Experienced engineer", "Skill-ful"]})
+        self.assertEqual(segment_sections(""), {})
+
+    def test_education(self):
+        self.assertEqual(extract_education(self.sections["education"]), [
+            {"text": "B.Tech in Computer Science, XYZ University, 2016 - 2020", "degree": "B.Tech", "year": 2020},
+            {"text": "Higher Secondary (12th), 2016", "degree": "12th", "year": 2016},
+            {"text": "M.Sc Data Science 2022", "degree": "M.Sc", "year": 2022},
+        ])
+        self.assertEqual(extract_education(["Self-taught"]), [{"text": "Self-taught", "degree": None, "year": None}])
+
+    def test_certifications(self):
+        self.assertEqual(extract_certifications(self.sections["certifications"]),
+                         ["AWS Certified Developer – Associate"])
+        self.assertEqual(len(extract_certifications([f"Cert {n}" for n in range(30)])), MAX_SECTION_ITEMS)
+        self.assertEqual(extract_certifications(["-", "•"]), [])
+
+    def test_projects(self):
+        self.assertEqual(extract_projects(self.sections["projects"]), [
+            {"title": "Resume Ranker",
+             "details": ["Python, Django, Celery", "Ranks resumes against job descriptions"]},
+            {"title": "Chat App", "details": ["Built a real-time chat with WebSockets."]},
+        ])
+        self.assertEqual(extract_projects([]), [])
+
+    def test_listed_skills(self):
+        self.assertEqual(extract_listed_skills(self.sections["skills"]), ["Python", "Django", "PostgreSQL"])
+        self.assertEqual(extract_listed_skills(["Languages: Python, python; Go"]), ["Python", "Go"])
+
+
+class DocxExtractionTests(SimpleTestCase):
+    def extract(self, body: str, headers: dict[str, str] | None = None) -> list[str]:
+        return extract_text_from_docx(io.BytesIO(docx_bytes(body, headers))).splitlines()
+
+    def test_paragraphs_and_runs(self):
+        body = para("Senior ", "Engineer") + '<w:p><w:r><w:t>A</w:t><w:tab/><w:t>B</w:t></w:r></w:p>'
+        self.assertEqual(self.extract(body), ["Senior Engineer", "A\tB"])
+
+    def test_table_rows(self):
+        row = "<w:tr><w:tc>{}</w:tc><w:tc>{}</w:tc></w:tr>"
+        body = "<w:tbl><w:tblPr/>" + row.format(para("Skills"), para("Python") + para("Django")) + "</w:tbl>"
+        self.assertEqual(self.extract(body), ["Skills\tPython Django"])
+
+    def test_text_box_fallback_not_duplicated(self):
+        box = (
+            "<w:p><w:r><mc:AlternateContent><mc:Choice>"
+            f"<w:txbxContent>{para('Contact: a@b.co')}</w:txbxContent>"
+            f"</mc:Choice><mc:Fallback><w:txbxContent>{para('Contact: a@b.co')}</w:txbxContent></mc:Fallback>"
+            "</mc:AlternateContent></w:r></w:p>"
+        )
+        self.assertEqual([line for line in self.extract(box) if line.strip()], ["Contact: a@b.co"])
+
+    def test_properties_skipped(self):
+        body = '<w:p><w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/></w:tabs></w:pPr><w:r><w:t>Name</w:t></w:r></w:p>'
+        self.assertEqual(self.extract(body), ["Name"])
+
+    def test_headers_first_and_deduplicated(self):
+        headers = {"header1.xml": para("Jane Doe"), "header2.xml": para("Jane Doe"), "header3.xml": para("Page")}
+        self.assertEqual(self.extract(para("Experience"), headers), ["Jane Doe", "Page", "Experience"])
+
+
+@skipUnless(os.name == "posix", "fake tesseract is a script")
+class OcrTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cmd = os.path.join(tmp.name, "tesseract")
+        with open(cmd, "w") as fh:
+            fh.write(FAKE_TESSERACT)
+        os.chmod(cmd, 0o755)
+
+        override = override_settings(OCR_ENABLED=True, OCR_TESSERACT_CMD=cmd, OCR_PAGE_TIMEOUT=5.0)
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+
+    def test_pages(self):
+        self.assertTrue(ocr.ocr_enabled())
+        self.assertEqual(ocr.ocr_page([b"scan1", b"scan2"]), "text of scan1\ntext of scan2")
+        self.assertEqual(cache.get(ocr.CACHE_PREFIX + ocr.page_hash([b"scan1", b"scan2"])),
+                         "text of scan1\ntext of scan2")
+        self.assertEqual(ocr.ocr_page([]), "")
+
+    @override_settings(OCR_PAGE_TIMEOUT=1.0)
+    def test_timeout_is_per_page(self):
+        start = time.monotonic()
+        with self.assertLogs(ocr.logger, "WARNING"):
+            self.assertEqual(ocr.ocr_page([b"sleep", b"sleep", b"sleep"]), "")
+        self.assertLess(time.monotonic() - start, 2.5)
+
+    def test_failures_not_cached(self):
+        images = [b"scan1", b"fail"]
+        with self.assertLogs(ocr.logger, "WARNING") as logs:
+            self.assertEqual(ocr.ocr_page(images), "text of scan1")
+        self.assertIn("unreadable image", logs.output[0])
+        self.assertIsNone(cache.get(ocr.CACHE_PREFIX + ocr.page_hash(images)))
+
+    @override_settings(OCR_MAX_PAGES=2)
+    def test_max_pages(self):
+        pages = {i: SimpleNamespace(images=[SimpleNamespace(data=f"page{i}".encode())]) for i in (4, 0, 3, 1)}
+        self.assertEqual(ocr.ocr_pages(pages), {0: "text of page0", 1: "text of page1"})
+
+
+class CompressTextTests(SimpleTestCase):
+    def test_round_trips(self):
+        for text in ("", "short résumé", LONG_TEXT):
+            with self.subTest(length=len(text)):
+                self.assertEqual(decompress_text(compress_text(text)), text)
+
+    def test_headers(self):
+        self.assertEqual(compress_text(""), b"")
+        self.assertEqual(compress_text("short")[:1], RAW)
+        packed = compress_text(LONG_TEXT)
+        self.assertEqual(packed[:1], ZLIB)
+        self.assertLess(len(packed), len(LONG_TEXT.encode()) // 4)
+
+    def test_reads_memoryview_and_str(self):
+        self.assertEqual(decompress_text(memoryview(compress_text(LONG_TEXT))), LONG_TEXT)
+        self.assertEqual(decompress_text("already text"), "already text")
+        self.assertEqual(decompress_text(None), "")
+
+    def test_unknown_header(self):
+        with self.assertRaises(ValueError):
+            decompress_text(b"\x09payload")
+
+    @skipUnless(zstandard, "needs zstandard")
+    @override_settings(TEXT_COMPRESSION="zstd")
+    def test_zstd(self):
+        packed = compress_text(LONG_TEXT)
+        self.assertEqual(packed[:1], ZSTD)
+        self.assertEqual(decompress_text(packed), LONG_TEXT)
+
+    @skipUnless(zstandard is None, "zstandard is installed")
+    @override_settings(TEXT_COMPRESSION="zstd")
+    def test_zstd_falls_back_to_zlib(self):
+        self.assertEqual(compress_text(LONG_TEXT)[:1], ZLIB)
+
+
+class CompressedTextFieldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="owner")
+
+    def create(self, text: str) -> Resume:
+        return Resume.objects.create(uploaded_by=self.user, file="resumes/cv.docx", extracted_text=text)
+
+    def test_stored_compressed(self):
+        resume = self.create(LONG_TEXT)
+        stored = bytes(Resume.objects.values_list("extracted_text", flat=True).get(id=resume.id))
+        self.assertEqual(stored[:1], ZLIB)
+        self.assertEqual(Resume.objects.get(id=resume.id).extracted_text, LONG_TEXT)
+
+    def test_decompressed_on_first_access(self):
+        resume = Resume.objects.get(id=self.create(LONG_TEXT).id)
+        self.assertNotIsInstance(resume.__dict__["extracted_text"], str)
+        self.assertEqual(resume.extracted_text, LONG_TEXT)
+        self.assertIsInstance(resume.__dict__["extracted_text"], str)
+
+    def test_update_and_empty_filter(self):
+        empty = self.create("")
+        resume = self.create("short")
+        Resume.objects.filter(id=resume.id).update(extracted_text=LONG_TEXT)
+        self.assertEqual(Resume.objects.get(id=resume.id).extracted_text, LONG_TEXT)
+        self.assertEqual(list(Resume.objects.filter(extracted_text="").values_list("id", flat=True)), [empty.id])
+
+    def test_deferred(self):
+        resume = Resume.objects.defer("extracted_text").get(id=self.create(LONG_TEXT).id)
+        self.assertEqual(resume.extracted_text, LONG_TEXT)
+
+
+class MinHashTests(SimpleTestCase):
+    def test_signature(self):
+        sig = signature(resume_text(1))
+        self.assertEqual(len(sig), NUM_PERM * 4)
+        self.assertEqual(sig, signature(resume_text(1)))
+        self.assertEqual(signature(""), b"")
+        self.assertEqual(signature("  ...  "), b"")
+
+    def test_similarity(self):
+        text = resume_text(1)
+        self.assertEqual(similarity(signature(text), signature(text)), 1.0)
+        self.assertGreaterEqual(similarity(signature(text), signature(edited(text))), 0.85)
+        self.assertLess(similarity(signature(text), signature(resume_text(2))), 0.1)
+        self.assertEqual(similarity(b"", signature(text)), 0.0)
+
+    def test_bands(self):
+        text = resume_text(1)
+        buckets = band_buckets(signature(text))
+        self.assertEqual(len(buckets), BANDS)
+        self.assertTrue(set(buckets) & set(band_buckets(signature(edited(text)))))
+        self.assertFalse(set(buckets) & set(band_buckets(signature(resume_text(2)))))
+        self.assertEqual(band_buckets(b""), [])
+
+
+class DuplicateGroupingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="recruiter")
+        cls.other_user = User.objects.create(username="other")
+
+    def index(self, text: str, user=None) -> Resume:
+        resume = Resume.objects.create(uploaded_by=user or self.user, file="resumes/cv.pdf", extracted_text=text)
+        return index_resume(resume)
+
+    def test_links_to_canonical_resume(self):
+        text = resume_text(1)
+        first = self.index(text)
+        second = self.index(edited(text))
+        third = self.index(edited(edited(text), changes=2))
+        unrelated = self.index(resume_text(2))
+
+        self.assertIsNone(first.duplicate_of_id)
+        self.assertEqual(second.duplicate_of_id, first.id)
+        self.assertEqual(third.duplicate_of_id, first.id)  # the group's earliest resume, not its best match
+        self.assertIsNone(unrelated.duplicate_of_id)
+        self.assertEqual(ResumeBand.objects.filter(resume=first).count(), BANDS)
+
+        groups = duplicate_group_ids([second.id, unrelated.id])
+        self.assertEqual(groups, {first.id: first.id, second.id: first.id, third.id: first.id,
+                                  unrelated.id: unrelated.id})
+
+    def test_scoped_to_uploader(self):
+        text = resume_text(1)
+        self.index(text)
+        self.assertIsNone(self.index(text, user=self.other_user).duplicate_of_id)
+
+    def test_reindex_canonical(self):
+        text = resume_text(1)
+        first = self.index(text)
+        second = self.index(edited(text))
+        self.assertIsNone(index_resume(first).duplicate_of_id)
+        Resume.objects.filter(id=first.id).update(duplicate_of=first)  # a self-link left by an older indexer
+        self.assertIsNone(index_resume(Resume.objects.get(id=first.id)).duplicate_of_id)
+        self.assertEqual(Resume.objects.get(id=second.id).duplicate_of_id, first.id)
+
+    def test_out_of_order_indexing(self):
+        text = resume_text(1)
+        older = Resume.objects.create(uploaded_by=self.user, file="resumes/cv.pdf", extracted_text=text)
+        newer = self.index(edited(text))
+        newest = self.index(edited(edited(text), changes=2))
+        self.assertEqual(newest.duplicate_of_id, newer.id)
+
+        self.assertIsNone(index_resume(older).duplicate_of_id)
+        self.assertEqual(
+            dict(Resume.objects.filter(id__in=[newer.id, newest.id]).values_list("id", "duplicate_of_id")),
+            {newer.id: older.id, newest.id: older.id},
+        )
+        self.assertEqual(index_resume(Resume.objects.get(id=newer.id)).duplicate_of_id, older.id)
+
+    def test_reindex_replaces_bands(self):
+        resume = self.index(resume_text(1))
+        resume.extracted_text = resume_text(3)
+        index_resume(resume)
+        self.assertEqual(
+            set(ResumeBand.objects.filter(resume=resume).values_list("bucket", flat=True)),
+            set(band_buckets(signature(resume_text(3)))),
+        )
+
+
+class ReparseResumesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username="owner")
+        cls.stale = [
+            Resume.objects.create(uploaded_by=user, file="resumes/cv.pdf", extracted_text=f"Skills\nPython {n}").id
+            for n in range(5)
+        ]
+        cls.current = Resume.objects.create(uploaded_by=user, file="resumes/cv.pdf", extracted_text="Skills\nGo",
+                                            extracted={"kept": True}, parser_version=PARSER_VERSION).id
+
+    def reparse(self, fail_on_chunk: int | None = None, **options) -> list[int]:
+        """Run the command inline, one resume per chunk; returns the ids it parsed."""
+        parsed = []
+        real = reparse_resumes._parse_chunk
+
+        def spy(rows):
+            if len(parsed) == fail_on_chunk:
+                raise KeyboardInterrupt
+            parsed.extend(rid for rid, _ in rows)
+            return real(rows)
+
+        with mock.patch.object(reparse_resumes, "_parse_chunk", spy):
+            call_command("reparse_resumes", workers=1, chunk_size=1, stdout=io.StringIO(), **options)
+        return parsed
+
+    def stale_ids(self) -> list[int]:
+        return list(Resume.objects.filter(parser_version__lt=PARSER_VERSION).order_by("id").values_list("id", flat=True))
+
+    def test_resumes_after_partial_runs(self):
+        self.assertEqual(self.reparse(limit=2), self.stale[:2])
+        self.assertEqual(self.stale_ids(), self.stale[2:])
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.reparse(fail_on_chunk=2)  # one chunk written, the next parsed ahead, then interrupted
+        self.assertEqual(self.stale_ids(), self.stale[3:])
+
+        self.assertEqual(self.reparse(), self.stale[3:])
+        self.assertEqual(self.stale_ids(), [])
+        self.assertEqual(self.reparse(), [])
+        self.assertEqual(Resume.objects.get(id=self.current).extracted, {"kept": True})
+        self.assertIn("Python", Resume.objects.get(id=self.stale[0]).extracted["skills"])
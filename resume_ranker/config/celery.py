@@ -1,8 +1,25 @@
+import logging
 import os
 from celery import Celery
+from celery.signals import worker_process_init
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", os.getenv("DJANGO_SETTINGS_MODULE", "config.settings.dev"))
 
 app = Celery("resume_ranker")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+@worker_process_init.connect
+def warm_up_worker_process(**kwargs):
+    """Preload parser/extraction state and recent JD profiles in each pool process before its first task."""
+    from django.conf import settings
+
+    if not getattr(settings, "WORKER_WARMUP", True):
+        return
+    from apps.ranking.services.profiles import warm_up
+
+    try:
+        warm_up()
+    except Exception:  # a cold worker is still a working worker
+        logging.getLogger(__name__).exception("Worker warm-up failed")
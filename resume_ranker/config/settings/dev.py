@@ -1,3 +1,4 @@
 from .base import *  # noqa
 DEBUG = True
 ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
+QUERY_BUDGET_VIEWS = env.bool("QUERY_BUDGET_VIEWS", default=True)
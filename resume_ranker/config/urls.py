@@ -6,6 +6,7 @@ from django.conf.urls.static import static
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("accounts/", include("django.contrib.auth.urls")),
+    path("api/v1/", include(("apps.api.urls", "api"), namespace="api")),
     path("", include(("apps.dashboard.urls", "dashboard"), namespace="dashboard")),
 ]
 